@@ -8,7 +8,7 @@ from typing import List
 
 from manager import __app_name__
 from enums import StatusCode, Provider
-from manager.models import FunctionModel, ScheduleModel, TriggerModel
+from manager.models import FunctionModel, ScheduleModel, StateModel, TriggerModel
 from manager.provider.AWS.AWSProvider import AWSProvider
 from manager.provider.abstract_provider import BackendProvider
 
@@ -21,7 +21,7 @@ CONFIG_DIR_PATH = Path('./manager')
 CONFIG_FILE_PATH = CONFIG_DIR_PATH / "config.ini"
 
 # Table configuration
-REGISTERED_TABLES = [FunctionModel, ScheduleModel, TriggerModel]
+REGISTERED_TABLES = [FunctionModel, ScheduleModel, TriggerModel, StateModel]
 
 class ConfigManager:
     def __init__(self) -> None:
@@ -5,7 +5,7 @@ from pynamodb.models import MetaModel
 
 from enums import StatusCode, Errors
 from manager.types import FunctionItem
-from manager.models import FunctionModel, ScheduleModel, TriggerModel, Models
+from manager.models import FunctionModel, ScheduleModel, StateModel, TriggerModel, Models
 from manager.utils import dynamoutils
 from pynamodb.exceptions import DoesNotExist
 
@@ -27,8 +27,8 @@ class DatabaseHandler:
     def __init__(self):
         self.models = {
             'Function': FunctionModel,
-            'Trigger': TriggerModel
-        
+            'Trigger': TriggerModel,
+            'State': StateModel
         }
 
     # FUNCTIONS_______________
@@ -118,3 +118,45 @@ class DatabaseHandler:
         if target == Models.FUNCTION:
             function = self.read_function(target_id)
             function.update(actions=[FunctionModel.schedule.set(None)]) 
+
+    # STATE___________________
+    def read_state(self, key: str) -> Any:
+        """
+        Reads an ingestion state entry, like the watermark of an endpoint
+        return: The stored value, None if the key was never written
+        """
+        try:
+            namespace, name = dynamoutils.split_state_key(key)
+            return StateModel.get(hash_key=namespace, range_key=name).value
+        except DoesNotExist:
+            return None
+
+    def write_state(self, key: str, value: Any) -> StatusCode:
+        """Stores an ingestion state entry, replacing its previous value"""
+        try:
+            namespace, name = dynamoutils.split_state_key(key)
+            StateModel(namespace, name, value=value).save()
+        except:
+            logger.exception("DB Write Error")
+            return StatusCode.DB_WRITE_ERROR
+        return StatusCode.SUCCESS
+
+    def delete_state(self, key: str) -> StatusCode:
+        """Removes an ingestion state entry, ignoring missing keys"""
+        try:
+            namespace, name = dynamoutils.split_state_key(key)
+            StateModel.get(hash_key=namespace, range_key=name).delete()
+        except DoesNotExist:
+            pass
+        return StatusCode.SUCCESS
+
+    def read_state_keys(self, prefix: str = '') -> List[str]:
+        """
+        Lists the keys of the ingestion state entries starting with the prefix, by a query
+        of the namespace up to the last '/' of the prefix. Keys in folders below it are not listed.
+        """
+        namespace, name = dynamoutils.split_state_key(prefix)
+        condition = StateModel.name.startswith(name) if name else None
+        items = StateModel.query(namespace, range_key_condition=condition, attributes_to_get=['namespace', 'name'])
+        return [dynamoutils.join_state_key(item.namespace, item.name) for item in items]
+
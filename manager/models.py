@@ -17,6 +17,7 @@ HOST = parser[env]['dynamodb_host']
 FUNCTION_TABLE_NAME = parser['DEFAULT']['function_table_name']
 SCHEDULE_TABLE_NAME = parser['DEFAULT']['schedule_table_name']
 TRIGGER_TABLE_NAME = parser['DEFAULT']['trigger_table_name']
+STATE_TABLE_NAME = parser['DEFAULT'].get('state_table_name', 'State')
 
 def get_current_time_utc():
     return datetime.now(timezone.utc)
@@ -58,8 +59,23 @@ class ScheduleModel(Model):
     cron = BinaryAttribute()
     associated = ListAttribute(default=[])
 
+class StateModel(Model):
+    """
+    Ingestion state kept across executions, like the watermarks of endpoints.
+    Keys are split at their last '/', so the keys of a folder like
+    `checkpoint/{run}/` share a partition and are listed by a query.
+    """
+    class Meta:
+        table_name = STATE_TABLE_NAME
+        host = HOST
+    namespace = UnicodeAttribute(hash_key=True)
+    name = UnicodeAttribute(range_key=True)
+    value = JSONAttribute(null=True)
+    updatedAt = UTCDateTimeAttribute(default=get_current_time_utc)
+
 class Models(Enum):
     """Defines the list of models for import in other modules"""
     FUNCTION = FunctionModel
     SCHEDULE = ScheduleModel
-    TRIGGER = TriggerModel 
\ No newline at end of file
+    TRIGGER = TriggerModel
+    STATE = StateModel 
\ No newline at end of file
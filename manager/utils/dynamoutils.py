@@ -3,6 +3,7 @@ Utility methods to work with the function Models
 in pynamodb
 """
 import pickle
+from typing import Tuple
 from manager.models import FunctionModel, ScheduleModel
 
 def load_function_instance(function: FunctionModel) -> FunctionModel:
@@ -26,3 +27,18 @@ def load_schedule_instance(schedule: ScheduleModel) -> ScheduleModel:
         if isinstance(schedule.cron, bytes):
             schedule.cron = pickle.loads(schedule.cron)
     return schedule
+
+# Namespace of the state keys without a folder, hash keys must not be empty
+ROOT_NAMESPACE = '.'
+
+def split_state_key(key: str) -> Tuple[str, str]:
+    """
+    Splits a state key into the namespace and name of the StateModel
+    at its last '/', e.g. `checkpoint/run/users` into `checkpoint/run/` and `users`
+    """
+    folder, separator, name = key.rpartition('/')
+    return (folder + separator) or ROOT_NAMESPACE, name
+
+def join_state_key(namespace: str, name: str) -> str:
+    """Reverses split_state_key"""
+    return name if namespace == ROOT_NAMESPACE else namespace + name
@@ -75,10 +75,11 @@ class Compiler(BaseCompiler):
       """
       compiled_function_requests = [] 
       # Endpoints contain one or multiple endpoints
-      for endpoint in graph._endpoints:
-        head = self._spawn_head()
-        # Want to retain the dependency graph
-        compiled_function_requests.append(self._function_compiler.compile(head, endpoint)) 
+      # Stages retain the dependency graph, endpoints within a stage are independent
+      for stage in graph.execution_stages():
+        for endpoint in stage.endpoints:
+          head = self._spawn_head()
+          compiled_function_requests.append(self._function_compiler.compile(head, endpoint)) 
 
       return compiled_function_requests
       
@@ -7,7 +7,10 @@ class BodyParserNodeBase:
     
 @dataclass
 class BodyParserNodeDefaults:
-    pass
+    # ijson prefix of the records of streamed endpoints, see Streaming
+    records: str = ''
+    # Expression parsing the body of the response
+    Body: str = 'response.json()'
 
 @dataclass
 class BodyParserNode(BodyParserNodeDefaults, CompilerNode, BodyParserNodeBase):
@@ -4,6 +4,8 @@ Compiler
 * Use a graph to create nested elements as 
 
 """
+import dataclasses
+import json
 from typing import Union, List, Dict, Optional
 from dataclasses import dataclass
 
@@ -13,6 +15,9 @@ from restmap.compiler.BaseCompiler import BaseCompiler
 from restmap.compiler.CompilerNode import CompilerNode
 from restmap.compiler.function.AuthenticatorNode import AuthenticatorNode
 from restmap.compiler.function.ResponseHandlerNode import ResponseHandlerNode
+from restmap.compiler.function.SessionNode import SessionNode
+from restmap.resolver.nodes.RateLimit import RateLimit
+from utils.jsonstream import ijson_prefix
 
 
 # FUNCTION_COMPILER__________________________
@@ -97,21 +102,25 @@ class FunctionCompiler(BaseCompiler):
         expected_nodes = [HeaderNode.HeaderNode, HandlerNode.HandlerNode, BodyParserNode.BodyParserNode, ResponseHandlerNode]
         assert all([node in head._children] for node in expected_nodes)
 
-        code = ""
         # TODO Resolve the graph for all functions
         # TODO Handle the fact if not all elements are valid
-        code += self._compile_header(head, function)
-        code += self._compile_request(head, function)
-        code += self._compile_body(head, function)
-        code += self._compile_response(head, function) 
+        # The session is created at module level, the request is sent by the handler
+        imports = self._compile_session(head, function)
+        body = '\n'.join([
+            self._compile_header(head, function),
+            self._compile_request(head, function),
+            self._compile_body(head, function),
+            self._compile_response(head, function),
+        ])
+        code = self.env.get_template('functions/api_request.jinja').render(imports=imports, body=body)
 
         # Passes the completed compilation graph to a specific compiler plugin
         # allowing specific languages and framework combinations to implement the 
         # compilation to code based on the same overall resolved compilation attributes
         # that are passed to them at this point
         # Render code template
-        requirements = self._compile_requirements(head)
-        deployment_params = self._compile_params()
+        requirements = self._compile_requirements(head, function)
+        deployment_params = self._compile_params(function)
 
         return DeployableFunction(
             code=code,
@@ -147,15 +156,41 @@ class FunctionCompiler(BaseCompiler):
             }
         }
         # Instantiate the node
-        header = self.header(parent=parent)
+        header = self.header(
+            parent=parent,
+            UserAgent=agent,
+            Accept=response_types_allowed,
+            AcceptLanguage=response_language_allowed
+        )
         # Conditionally append authenticator
         return header.compile_code()
 
+    def _compile_session(self, parent: CompilerNode, graph: ResolutionGraph) -> str:
+        """
+        Compiles the pooled keep-alive session requests are sent through,
+        configured by the BaseURLNode of the compiled endpoint
+        """
+        base = getattr(graph, 'base', None) or graph
+        session = self.session(
+            parent=parent,
+            base_url=getattr(base, 'url', ''),
+            pool_size=getattr(base, 'pool_size', 10),
+            conditional=getattr(graph, 'conditional', False),
+            rate_limit=json.dumps(dataclasses.asdict(getattr(base, 'rate_limit', None) or RateLimit()))
+        )
+        return session.compile_code()
+
     def _compile_request(self, parent: CompilerNode, graph: ResolutionGraph) -> str:
         """
         Compiles the request to be executed against the target endpoint
         """
-        request = self.request(parent=parent)
+        base = getattr(graph, 'base', None)
+        request = self.request(
+            parent=parent,
+            url=base.get_url().rstrip('/') + graph.relative if base is not None else getattr(graph, 'url', ''),
+            stream=getattr(graph, 'streaming', None) is not None,
+            conditional=getattr(graph, 'conditional', False)
+        )
         # Generate all elements to be nested in the request object based on set parameters
 
         # Compile the configured request handler to code and return code string
@@ -166,7 +201,11 @@ class FunctionCompiler(BaseCompiler):
         Compiles the code handling the response object generation
         from the serverless function
         """
-        response = self.response_handler(parent=parent)
+        response = self.response_handler(
+            parent=parent,
+            stream=getattr(graph, 'streaming', None) is not None,
+            conditional=getattr(graph, 'conditional', False)
+        )
         # Attribute to the reponse object based on set parameters on the graph
         
         return response.compile_code()
@@ -180,16 +219,23 @@ class FunctionCompiler(BaseCompiler):
         or through `custom code components` that contain an executable to be
         automatically executed in the function body.
         """
-        body = self.body_parser(parent=parent)
+        streaming = getattr(graph, 'streaming', None)
+        if streaming is not None:
+            # Streamed endpoints iterate their records lazily instead of loading the body
+            body = self.body_parser(parent=parent, template="functions/aws/stream_parser.jinja", records=ijson_prefix(streaming.records))
+        else:
+            body = self.body_parser(parent=parent)
         # Attribute the list of associated plugins based on attributes on the graph
 
         # Compile code
         return body.compile_code()
 
-    def _compile_requirements(self, head: CompilerNode):
+    def _compile_requirements(self, head: CompilerNode, graph: ResolutionGraph = None):
         """
         Compiles the list of requirements for the function to be executable
         """
+        if getattr(graph, 'streaming', None) is not None:
+            return [FunctionRequirement(library='ijson', version='3.2.3', imports=['ijson'])]
         return {}
 
     def header(self, 
@@ -215,7 +261,30 @@ class FunctionCompiler(BaseCompiler):
         self._append_to_parent(parent, header)
         return header
          
-    def _compile_params(self) -> DeploymentParams:
+    def session(self,
+        parent: CompilerNode,
+        template: str="functions/aws/session.jinja",
+        **kwargs
+    ) -> SessionNode:
+        """
+        Compiles the HTTP session shared by all requests of the function
+
+        * Keep-alive connection pool sized to the `pool_size` of the BaseURLNode
+        * Retries of throttled requests by the rate limit in the RATE_LIMIT variable
+        * Validators of previous responses for conditional endpoints, kept in the
+          table named by the RESPONSE_CACHE_TABLE variable, or by the warm instance
+        """
+        session = SessionNode(
+            _template=template,
+            _env=self.env,
+            _parent=None,
+            _children=[],
+            **kwargs
+            )
+        self._append_to_parent(parent, session)
+        return session
+
+    def _compile_params(self, graph: ResolutionGraph = None) -> DeploymentParams:
         """
         Compiles the deployment parameters for the function
         given the overall configuration of the elements of the
@@ -224,19 +293,24 @@ class FunctionCompiler(BaseCompiler):
         Caluclated params
         ----------------------
         * Allocated memory
-        * Parallelism
+        * Parallelism: Bound by the `max_concurrency` of the rate limit of
+                       the BaseURLNode
+        * RATE_LIMIT:  The rate limit of the BaseURLNode, read by the session
+                       to retry throttled requests
         * 
         """
+        base = getattr(graph, 'base', None) or graph
+        rate_limit = getattr(base, 'rate_limit', None) or RateLimit()
         return DeploymentParams(
             min_allocated_memory_gb=128,
             max_allocated_memory_gb=256,
             timeout=300,
-            permissions=['DynamoDBReader'],
-            env_variables={},
+            permissions=['DynamoDBReader', 'DynamoDBWriter'] if getattr(graph, 'conditional', False) else ['DynamoDBReader'],
+            env_variables={'RATE_LIMIT': json.dumps(dataclasses.asdict(rate_limit))},
             tags=[],
             is_monitored=True,
             is_traced=True,
-            concurrency=10
+            concurrency=rate_limit.max_concurrency
         )
     # TODO: Remove and replace with build in jinja function
     
@@ -244,6 +318,7 @@ class FunctionCompiler(BaseCompiler):
     def request(self, 
         parent: CompilerNode, 
         template: str="functions/aws/request_handler.jinja",
+        **kwargs
         ) -> HandlerNode.HandlerNode:
         """
         Create the compiled handler Node
@@ -253,19 +328,22 @@ class FunctionCompiler(BaseCompiler):
                 _env=self.env, 
                 _parent=None, 
                 _children=[], 
-                _code='Handler Code\n')
+                _code='Handler Code\n',
+                **kwargs)
         self._append_to_parent(parent, handler)
         return handler
     
     def body_parser(self, 
         parent: CompilerNode,
         template:str="functions/aws/body_parser.jinja",
+        **kwargs
         ) -> BodyParserNode.BodyParserNode:
         parser = BodyParserNode.BodyParserNode(
             _template=template,
             _env=self.env, 
             _parent=None,
-            _children=[]
+            _children=[],
+            **kwargs
             )
         self._append_to_parent(parent, parser)
         return parser
@@ -275,6 +353,7 @@ class FunctionCompiler(BaseCompiler):
         template:str="functions/aws/response_handler.jinja",
         parse_to: str = 'json',
         escape_strings: bool = False,
+        **kwargs
         ):
         """
         Parametrizes and appends a ResponseHandler Node to the compilation graph.
@@ -285,7 +364,8 @@ class FunctionCompiler(BaseCompiler):
             _template=template,
             _env=self.env, 
             _parent=None, 
-            _children=[]
+            _children=[],
+            **kwargs
         )
         self._append_to_parent(parent, response_handler)
         return response_handler
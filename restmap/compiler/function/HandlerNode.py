@@ -9,6 +9,13 @@ class HandlerNodeBase:
 class HandlerNodeDefaults:
     timeout: int = 500
     retry: int = 3
+    # Url of the endpoint, its params are formatted from the event
+    url: str = ''
+    method: str = 'get'
+    # Receives the body while it is read, for streamed endpoints
+    stream: bool = False
+    # Sends the validators of the previous response, returning early on 304 Not Modified
+    conditional: bool = False
 
 @dataclass
 class HandlerNode(HandlerNodeDefaults, CompilerNode, HandlerNodeBase):
@@ -25,6 +25,13 @@ class HeaderNode(HeaderNodeDefaults, CompilerNode, HeaderNodeBase):
         # Retrieve the list of parameters set on the inh
         
         # Call the set of functions to generate the code
-        return self._render_template()
+        return self._render_template({
+            'header': {
+                'User-Agent': self.UserAgent,
+                'Accept': self.Accept,
+                'Accept-Language': self.AcceptLanguage,
+                'Cache-Control': self.cache_max_age
+            }
+        })
     
     
@@ -7,7 +7,10 @@ class ResponseHandlerBase:
 
 @dataclass
 class ResponseHandlerDefaults:
-    pass
+    # The body holds the records lazily parsed from a streamed response
+    stream: bool = False
+    # Keeps the validators of the response once the records are part of the output
+    conditional: bool = False
 
 @dataclass
 class ResponseHandlerNode(ResponseHandlerDefaults, CompilerNode , ResponseHandlerBase):
@@ -19,10 +22,9 @@ class ResponseHandlerNode(ResponseHandlerDefaults, CompilerNode , ResponseHandle
         """
         Extract parameters for the compilation from the 
         """
+        body = 'list(body)' if self.stream else 'body'
         param_dict = {
-            'reponse' : {
-                'statusCode': '200',
-                'body': 'json.dumps(body)'
-            }        
+            'response': f"{{'statusCode': 200, 'body': json.dumps({body})}}",
+            'conditional': self.conditional
         }
         return self._render_template(param_dict)
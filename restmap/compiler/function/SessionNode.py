@@ -0,0 +1,29 @@
+from dataclasses import dataclass
+from restmap.compiler.CompilerNode import CompilerNode
+
+@dataclass
+class SessionNodeBase:
+    pass
+
+@dataclass
+class SessionNodeDefaults:
+    # Base url the pooled connections are mounted for, all urls if empty
+    base_url: str = ''
+    pool_size: int = 10
+    # Keeps the validators of responses for conditional requests
+    conditional: bool = False
+    # JSON of the RateLimit, retries throttled requests unless the RATE_LIMIT variable is set
+    rate_limit: str = '{"retries": 3, "backoff": 1.0, "max_retry_after": 300.0}'
+
+@dataclass
+class SessionNode(SessionNodeDefaults, CompilerNode, SessionNodeBase):
+    """
+    Compiles the keep-alive HTTP session of the BaseURLNode the function integrates with
+    """
+
+    def compile_code(self) -> str:
+        """
+        The session is created at module level, so warm function
+        instances reuse its open connections across invocations.
+        """
+        return self._render_template()
@@ -0,0 +1,146 @@
+"""
+Fetchers execute the HTTP requests of the LocalExecutor.
+
+Fetcher
+----------------
+BaseFetcher: Interface executors await to fetch a single url
+URLLibFetcher: Fetches with the standard library urllib in worker threads
+
+Endpoints with Streaming settings are fetched as StreamedResponse, whose
+records are parsed while the body is received and read batch by batch.
+"""
+import asyncio
+import json
+import urllib.error
+import urllib.request
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional
+
+from utils.jsonstream import JSONStream
+
+
+@dataclass
+class Response:
+    """
+    The response received for a single url of an endpoint
+    """
+    endpoint: str
+    url: str
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+    # Format values the url was built from
+    params: dict = field(default_factory=dict)
+    # Number of the page of paginated endpoints
+    page: int = 0
+    # A batch of the records of a streamed response, whose body is not kept
+    records: Optional[list] = None
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 300
+
+    def json(self) -> Any:
+        if self.records is not None:
+            return self.records
+        return json.loads(self.body)
+
+    def header(self, name: str) -> Optional[str]:
+        """Reads a header of the response, ignoring the case of its name"""
+        name = name.lower()
+        for key, value in self.headers.items():
+            if key.lower() == name:
+                return value
+        return None
+
+
+@dataclass
+class StreamedResponse(Response):
+    """
+    A response whose records are parsed while its body is received. The records of
+    successful responses are read from `batches`, the body is only kept for failures.
+    """
+    batches: Optional[AsyncIterator[List[Any]]] = None
+    # Number of body bytes received, complete once the batches are read
+    received: int = 0
+
+    async def aclose(self) -> None:
+        """Stops receiving the body, releasing its connection"""
+        if self.batches is not None:
+            await self.batches.aclose()
+
+
+def iter_batches(chunks: Iterable[bytes], streaming) -> Iterator[List[Any]]:
+    """Parses the chunks of a body into batches of the records selected by the Streaming settings"""
+    parser = JSONStream(streaming.records)
+    batch = []
+    for chunk in chunks:
+        batch.extend(parser.feed(chunk))
+        while len(batch) >= streaming.batch_size:
+            yield batch[:streaming.batch_size]
+            batch = batch[streaming.batch_size:]
+    batch.extend(parser.close())
+    for start in range(0, len(batch), streaming.batch_size):
+        yield batch[start:start + streaming.batch_size]
+
+
+class BaseFetcher(ABC):
+    """
+    Fetches the urls of endpoints for an executor
+    """
+
+    @abstractmethod
+    async def fetch(self, endpoint, url: str, params: Optional[dict] = None, headers: Optional[Dict[str, str]] = None) -> Response:
+        """
+        Requests the url of the given endpoint node
+        @params: Format values the url was built from
+        @headers: Sent in addition to the headers of the fetcher, e.g. the validators of conditional requests
+        """
+
+    async def stream(self, endpoint, url: str, params: Optional[dict], streaming) -> StreamedResponse:
+        """
+        Requests the url, parsing the records of the body as set by the Streaming settings.
+        Fetchers reading the body in chunks override this default, which parses the
+        body once it was received completely.
+        """
+        response = await self.fetch(endpoint, url, params)
+        streamed = StreamedResponse(
+            endpoint=response.endpoint, url=response.url, status=response.status, headers=response.headers,
+            body=b'' if response.ok else response.body, params=response.params, received=len(response.body)
+        )
+        if response.ok:
+            streamed.batches = _aiter(iter_batches((response.body,), streaming))
+        return streamed
+
+    async def close(self) -> None:
+        """Releases the connections held by the fetcher"""
+
+
+class URLLibFetcher(BaseFetcher):
+    """
+    Fetches with urllib in worker threads of the event loop. Error
+    status codes are returned as responses instead of raised.
+    """
+
+    def __init__(self, timeout: float = 30.0, headers: Optional[Dict[str, str]] = None) -> None:
+        self.timeout = timeout
+        self.headers = headers or {}
+
+    async def fetch(self, endpoint, url: str, params: Optional[dict] = None, headers: Optional[Dict[str, str]] = None) -> Response:
+        loop = asyncio.get_running_loop()
+        status, headers, body = await loop.run_in_executor(None, self._request, url, headers)
+        return Response(endpoint=endpoint.name, url=url, status=status, headers=headers, body=body, params=params or {})
+
+    def _request(self, url: str, headers: Optional[Dict[str, str]] = None):
+        request = urllib.request.Request(url, headers={**self.headers, **(headers or {})})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, dict(response.headers), response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, dict(error.headers or {}), error.read()
+
+
+async def _aiter(iterator: Iterator) -> AsyncIterator:
+    for item in iterator:
+        yield item
@@ -0,0 +1,120 @@
+"""
+Host Limiter
+
+Applies the RateLimit of a BaseURLNode to the requests of an executor:
+a token bucket bounds the request rate, an AIMD controlled window the
+number of requests in flight. Throttled responses shrink the window and
+pause the host for the delay given by their Retry-After header.
+"""
+import asyncio
+import email.utils
+import time
+from typing import Callable, Optional
+
+from restmap.resolver.nodes.RateLimit import RateLimit, THROTTLED
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Reads the delay of a Retry-After header, given in seconds or as http date
+    return: Seconds to wait or None if missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - time.time())
+
+
+class HostLimiter:
+    """
+    Rate and concurrency limiter of a single host. Must be created and
+    used on the event loop of the executor.
+    """
+
+    def __init__(self, config: Optional[RateLimit] = None, clock: Callable[[], float] = time.monotonic) -> None:
+        self.config = config or RateLimit()
+        self._clock = clock
+        # Current size of the concurrency window
+        self.limit = float(self.config.concurrency)
+        self.in_flight = 0
+        self.throttled = 0
+        self._tokens = self.config.capacity
+        self._refilled = clock()
+        self._paused_until = 0.0
+        # Time of the last decrease, throttles of requests started before are part of the same overload
+        self._decreased = float('-inf')
+        self._cond = asyncio.Condition()
+
+    async def acquire(self) -> float:
+        """
+        Waits for a free slot of the window, a token and the end of any pause
+        return: Start time of the request, to be passed to `release`
+        """
+        async with self._cond:
+            while True:
+                now = self._clock()
+                if now < self._paused_until:
+                    timeout = self._paused_until - now
+                elif self.in_flight >= int(self.limit):
+                    timeout = None
+                else:
+                    timeout = self._take_token(now)
+                    if timeout == 0:
+                        self.in_flight += 1
+                        return now
+                try:
+                    await asyncio.wait_for(self._cond.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, started: float, status: Optional[int] = None, retry_after: Optional[str] = None) -> Optional[float]:
+        """
+        Frees the slot of a request and adapts the window to its outcome
+        @status: Status code of the response, None if the request failed without response
+        return: Seconds the host asked to wait before retrying, None if not throttled
+        """
+        async with self._cond:
+            self.in_flight -= 1
+            delay = None
+            if status in THROTTLED:
+                self.throttled += 1
+                if started >= self._decreased:
+                    self.limit = max(float(self.config.min_concurrency), self.limit * self.config.decrease)
+                    self._decreased = self._clock()
+                delay = parse_retry_after(retry_after)
+                if delay is not None:
+                    delay = min(delay, self.config.max_retry_after)
+                    self._paused_until = max(self._paused_until, self._clock() + delay)
+            elif status is not None and status < 500:
+                self.limit = min(float(self.config.max_concurrency), self.limit + self.config.increase / self.limit)
+            self._cond.notify_all()
+            return delay
+
+    def backoff(self, attempt: int, delay: Optional[float] = None) -> float:
+        """Seconds to wait before retrying a throttled request"""
+        if delay is not None:
+            return delay
+        return self.config.backoff * 2 ** attempt
+
+    def _take_token(self, now: float) -> float:
+        """
+        Takes a token from the bucket
+        return: 0 if a token was taken, else the seconds until the next token
+        """
+        rate = self.config.rate
+        if rate is None:
+            return 0
+        self._tokens = min(self.config.capacity, self._tokens + (now - self._refilled) * rate)
+        self._refilled = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / rate
@@ -0,0 +1,488 @@
+"""
+Local Executor
+
+Executes a ResolutionGraph in-process on an asyncio event loop, to run,
+profile and benchmark pipelines locally before compiling them to a
+backend provider, or as fallback runner on a plain VM.
+
+The graph is executed stage by stage, see ResolutionGraph.execution_stages:
+
+* Resolvers start a single shared resolution for all params reading them
+* Params are expanded lazily into the format values of their endpoints
+* The urls of all RelativeURLNodes of a stage are fetched concurrently,
+  bounded by a global concurrency limit across all endpoints, and by the
+  adaptive rate limit of the host of each BaseURLNode, see HostLimiter
+* Paginated endpoints request the pages of each url, see Paginator
+* Streamed endpoints hand the records of each response to the sink in
+  batches while the body is received, see Streaming
+* Endpoints with a Watermark request only records newer than the
+  watermark stored in the state store, which is advanced once all
+  records were flushed by the sink, see Watermarks
+* Runs with a run id save the param partitions they completed, so that
+  a run interrupted by a timeout or failed requests resumes where it
+  stopped when executed again with the same id, see Checkpoints
+* Conditional endpoints send the validators of their previous response,
+  a 304 Not Modified answer is neither parsed nor written to the sink
+  again, see ResponseCache
+
+Successful responses are handed to a pluggable sink. The executor acts as
+the provider passed to the nodes: endpoints read by an EndpointResolver
+are resolved into the records fetched from them in an earlier stage.
+"""
+import asyncio
+import functools
+import itertools
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from restmap.executor.Local.Fetcher import BaseFetcher, Response, StreamedResponse
+from restmap.executor.Local.HostLimiter import HostLimiter
+from restmap.executor.Local.Paginator import paginate
+from restmap.executor.Local.SessionFetcher import SessionFetcher
+from restmap.resolver.ResolutionGraph import ExecutionStage, ResolutionGraph
+from restmap.resolver.nodes.EndpointNode import RelativeURLNode
+from restmap.resolver.nodes.RateLimit import THROTTLED
+from restmap.resolver.nodes.resolvers.ResolverCache import ResolverCache
+from restmap.sink.BaseSink import BaseSink
+from restmap.state.BaseStateStore import BaseStateStore
+from restmap.state.Checkpoints import Checkpoints
+from restmap.state.LocalStateStore import LocalStateStore
+from restmap.state.ResponseCache import NOT_MODIFIED, ResponseCache
+from restmap.state.Watermarks import Watermarks
+from utils import jsonpath
+
+
+@dataclass
+class RunStats:
+    """
+    Counters and timings of an execution
+    """
+    requests: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    # Responses with a 429 or 503 status and the retries they caused
+    throttled: int = 0
+    retries: int = 0
+    bytes: int = 0
+    elapsed: float = 0.0
+    # Seconds spent in each stage
+    stages: List[float] = field(default_factory=list)
+    # Url and reason of the first failed requests
+    errors: List[Tuple[str, str]] = field(default_factory=list)
+    # Param combinations of partitions completed by earlier invocations of the run
+    skipped: int = 0
+    # Conditional requests answered with 304 Not Modified, counted as succeeded
+    not_modified: int = 0
+    # Watermarks stored for the next execution, by endpoint name
+    watermarks: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def requests_per_second(self) -> float:
+        return self.requests / self.elapsed if self.elapsed else 0.0
+
+
+class LocalExecutor:
+    """
+    Runs resolution graphs on a local asyncio event loop
+    """
+
+    def __init__(self,
+        sink: BaseSink,
+        fetcher: Optional[BaseFetcher] = None,
+        concurrency: int = 10,
+        cache: Optional[ResolverCache] = None,
+        batch_size: int = 1000,
+        spill_dir: Optional[Union[str, Path]] = None,
+        max_errors: int = 100,
+        state: Optional[BaseStateStore] = None,
+        checkpoint_interval: float = 30.0,
+        response_cache: Optional[ResponseCache] = None,
+        ) -> None:
+        """
+        @sink: Receives all successful responses
+        @fetcher: Executes the requests, through keep-alive sessions per base url if None
+        @concurrency: Maximum number of requests in flight across all endpoints,
+                      the rate limits of the hosts bound the requests per host
+        @cache: ResolverCache memoizing the outputs of the resolvers reading external sources,
+                EndpointResolvers always read the records fetched by the same run
+        @batch_size: Number of param combinations expanded per step, and of a checkpointed partition
+        @spill_dir: Folder shared resolver outputs are spilled to, while consumed
+                    by endpoints of different stages, defaults to the system temp folder
+        @max_errors: Number of failed requests to record in the stats
+        @state: Keeps the watermarks of incremental endpoints across executions,
+                in memory of the executor if None, and the checkpoints of runs
+        @checkpoint_interval: Minimum seconds between saving the checkpoints of a run,
+                              each save flushes the sink
+        @response_cache: Keeps the validators of the responses of conditional endpoints
+                         across executions, in memory of the executor if None
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.sink = sink
+        self.fetcher = fetcher or SessionFetcher()
+        self.concurrency = concurrency
+        self.cache = cache
+        self.batch_size = batch_size
+        self.spill_dir = spill_dir
+        self.max_errors = max_errors
+        self.state = state or LocalStateStore()
+        self.checkpoint_interval = checkpoint_interval
+        self.response_cache = response_cache or ResponseCache()
+        self._results: Dict[str, list] = {}
+        self._watermarks = Watermarks(self.state)
+        self._checkpoints: Optional[Checkpoints] = None
+        self._limiters: Dict[str, HostLimiter] = {}
+
+    # PUBLIC API______________
+    def run(self, graph: ResolutionGraph, run_id: Optional[str] = None) -> RunStats:
+        """
+        Executes the graph on a new event loop and closes the fetcher and sink
+        @run_id: Checkpoints the run to resume it when executed again with the same id
+        """
+        async def main():
+            loop = asyncio.get_running_loop()
+            # Blocking fetchers and resolvers run in threads, size the pool to the concurrency limit
+            loop.set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency + 4))
+            try:
+                return await self.execute(graph, run_id)
+            finally:
+                await self.fetcher.close()
+        try:
+            return asyncio.run(main())
+        finally:
+            self.sink.close()
+
+    async def execute(self, graph: ResolutionGraph, run_id: Optional[str] = None) -> RunStats:
+        """
+        Executes all stages of the graph on the running event loop
+        @run_id: Checkpoints the run to resume it when executed again with the same id
+        """
+        stats = RunStats()
+        started = time.perf_counter()
+        self._results = {}
+        # Limiters are bound to the running event loop
+        self._limiters = {}
+        self._watermarks = Watermarks(self.state)
+        self._checkpoints = None
+        if run_id is not None:
+            self._checkpoints = Checkpoints(self.state, run_id, self.batch_size, self.checkpoint_interval)
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.concurrency)
+        consumers = self._count_consumers(graph)
+        kept = self._kept_endpoints(graph)
+        try:
+            for stage in graph.execution_stages():
+                stage_started = time.perf_counter()
+                self._start_resolvers(stage, consumers)
+                await asyncio.gather(*(
+                    self._execute_endpoint(endpoint, slots, stats, endpoint.name in kept)
+                    for endpoint in stage.endpoints if isinstance(endpoint, RelativeURLNode)
+                ))
+                stats.stages.append(time.perf_counter() - stage_started)
+        except BaseException:
+            if self._checkpoints is not None:
+                # Keeps the progress of an interrupted run
+                await loop.run_in_executor(None, self._checkpoints.save, self.sink.flush)
+            raise
+        await loop.run_in_executor(None, self.sink.flush)
+        # Watermarks only advance once the records up to them are persisted
+        stats.watermarks = await loop.run_in_executor(None, self._watermarks.commit)
+        # Likewise, a 304 answer must never skip records the sink did not persist
+        await loop.run_in_executor(None, self.response_cache.commit)
+        if self._checkpoints is not None:
+            # Runs with failed requests are resumed by their next invocation
+            finished = self._checkpoints.clear if stats.failed == 0 else functools.partial(self._checkpoints.save, self.sink.flush)
+            await loop.run_in_executor(None, finished)
+        stats.elapsed = time.perf_counter() - started
+        return stats
+
+    def resolve_endpoint(self, endpoint: RelativeURLNode) -> list:
+        """
+        Provides the records fetched from an endpoint to the resolvers reading it.
+        JSON arrays are flattened into their items.
+        """
+        try:
+            return self._results[endpoint.name]
+        except KeyError:
+            raise KeyError(f"Endpoint '{endpoint.name}' was not executed before being resolved")
+
+    # INTERNAL API_______________
+    def _start_resolvers(self, stage: ExecutionStage, consumers: Counter):
+        """Starts one shared resolution per resolver, read by all params of all endpoints using it"""
+        for resolver in stage.resolvers:
+            if consumers[resolver.name]:
+                # Endpoints of later stages read the output after earlier ones finished, spill instead of blocking
+                resolver.share(self, consumers=consumers[resolver.name], cache=self.cache, spill=True, spill_dir=self.spill_dir)
+
+    async def _execute_endpoint(self, endpoint: RelativeURLNode, slots: asyncio.Semaphore, stats: RunStats, keep: bool):
+        """
+        Expands the params of the endpoint in batches and fetches each url once a slot is free.
+        Each batch is a partition of the checkpoints of the run. Endpoints read by resolvers are
+        not checkpointed, as later stages need all of their records.
+        """
+        loop = asyncio.get_running_loop()
+        if keep:
+            self._results[endpoint.name] = []
+        # Sinks read what they keep of earlier runs off the event loop
+        await loop.run_in_executor(None, self.sink.prepare, endpoint.name)
+        checkpoints = None if keep else self._checkpoints
+        if checkpoints is not None:
+            await loop.run_in_executor(None, checkpoints.load, endpoint)
+        watermark = {}
+        if endpoint.watermark is not None:
+            watermark = await loop.run_in_executor(None, self._watermarks.params, endpoint)
+        combinations = endpoint.iter_params(self, cache=self.cache)
+        pending = set()
+        try:
+            for partition in itertools.count():
+                # Resolvers may block on IO, expand in a worker thread
+                batch = await loop.run_in_executor(None, _take, combinations, self.batch_size)
+                if not batch:
+                    break
+                if checkpoints is not None and not checkpoints.start(endpoint, partition, batch):
+                    stats.skipped += len(batch)
+                    self.sink.reuse(endpoint.name)
+                    continue
+                for params in batch:
+                    if watermark:
+                        params = {**params, **watermark}
+                    await slots.acquire()
+                    task = asyncio.ensure_future(self._fetch(endpoint, params, slots, stats, keep))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                    if checkpoints is not None:
+                        task.add_done_callback(functools.partial(_finish, checkpoints, endpoint, partition))
+                if checkpoints is not None and checkpoints.due():
+                    await loop.run_in_executor(None, checkpoints.save, self.sink.flush)
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            combinations.close()
+
+    async def _fetch(self, endpoint: RelativeURLNode, params: dict, slots: asyncio.Semaphore, stats: RunStats, keep: bool) -> bool:
+        """
+        Fetches the url of a param combination, or all of its pages for paginated endpoints
+        return: Whether all requests succeeded
+        """
+        url = None
+        try:
+            url = endpoint.build_url(params)
+            if endpoint.streaming is not None:
+                return await self._handle_stream(endpoint, await self._request(endpoint, url, params, slots, stats), stats, keep)
+            if endpoint.conditional:
+                return await self._fetch_conditional(endpoint, url, params, slots, stats, keep)
+            if endpoint.pagination is None:
+                response = await self._request(endpoint, url, params, slots, stats)
+                await self._drain()
+                return self._handle(endpoint, response, stats, keep)
+            ok = True
+            request = functools.partial(self._request_page, endpoint, params, slots, stats, asyncio.Lock())
+            async for response in paginate(request, url, endpoint.pagination):
+                await self._drain()
+                ok = self._handle(endpoint, response, stats, keep) and ok
+            return ok
+        except Exception as error:
+            stats.requests += 1
+            self._failed(endpoint, stats, url or endpoint.name, repr(error))
+            return False
+        finally:
+            slots.release()
+
+    async def _request_page(self, endpoint: RelativeURLNode, params: dict, slots: asyncio.Semaphore, stats: RunStats,
+        owned: asyncio.Lock, url: str) -> Response:
+        """
+        Requests a page within the global concurrency limit. The slot taken for the url is used
+        by one page at a time, pages requested concurrently with it take free slots of their own.
+        Pages never wait for further slots while the url holds one, without a free slot they wait
+        for the slot of the url instead, as other urls may wait for their pages to free it.
+        @owned: Held while a page uses the slot of the url
+        """
+        if owned.locked() and not slots.locked():
+            # A free slot is taken without waiting
+            await slots.acquire()
+        else:
+            async with owned:
+                return await self._request(endpoint, url, params, slots, stats)
+        try:
+            return await self._request(endpoint, url, params, slots, stats)
+        finally:
+            slots.release()
+
+    async def _fetch_conditional(self, endpoint: RelativeURLNode, url: str, params: dict, slots: asyncio.Semaphore, stats: RunStats, keep: bool) -> bool:
+        """
+        Requests the url with the validators of its previous response. On a 304 answer the
+        records are not written again, endpoints read by resolvers reuse the kept body.
+        return: Whether the request succeeded
+        """
+        loop = asyncio.get_running_loop()
+        cache = self.response_cache
+        entry = await loop.run_in_executor(None, cache.lookup, url)
+        if entry is not None and keep and not entry.has_body:
+            # Resolvers read the records, which were not kept with the previous response
+            entry = None
+        response = await self._request(endpoint, url, params, slots, stats, entry.headers if entry else None)
+        if entry is not None and response.status == NOT_MODIFIED:
+            try:
+                body = await loop.run_in_executor(None, cache.body, entry) if keep else b''
+            except KeyError:
+                # The kept body was removed, request the records again
+                response = await self._request(endpoint, url, params, slots, stats)
+            else:
+                stats.requests += 1
+                stats.succeeded += 1
+                stats.not_modified += 1
+                self.sink.reuse(endpoint.name)
+                if keep:
+                    self._keep(endpoint, replace(response, body=body))
+                return True
+        await self._drain()
+        ok = self._handle(endpoint, response, stats, keep)
+        if ok:
+            cache.stage(response, keep_body=keep)
+        return ok
+
+    async def _request(self, endpoint: RelativeURLNode, url: str, params: dict, slots: asyncio.Semaphore, stats: RunStats,
+        headers: Optional[Dict[str, str]] = None) -> Response:
+        """
+        Requests a url within the limits of its host, retrying throttled requests
+        @headers: The validators of a conditional request
+        """
+        limiter = self._limiter(endpoint)
+        attempt = 0
+        while True:
+            started = await limiter.acquire()
+            try:
+                if headers:
+                    response = await self.fetcher.fetch(endpoint, url, params, headers=headers)
+                elif endpoint.streaming is None:
+                    response = await self.fetcher.fetch(endpoint, url, params)
+                else:
+                    response = await self.fetcher.stream(endpoint, url, params, endpoint.streaming)
+            except BaseException:
+                await limiter.release(started)
+                raise
+            delay = await limiter.release(started, response.status, response.header('Retry-After'))
+            if response.status not in THROTTLED:
+                return response
+            stats.throttled += 1
+            if attempt >= limiter.config.retries:
+                return response
+            # Frees the global slot for the requests of other hosts while waiting
+            slots.release()
+            try:
+                await asyncio.sleep(limiter.backoff(attempt, delay))
+            finally:
+                await _reacquire(slots)
+            attempt += 1
+            stats.retries += 1
+
+    def _handle(self, endpoint: RelativeURLNode, response: Response, stats: RunStats, keep: bool) -> bool:
+        """
+        Hands a successful response to the sink
+        return: Whether the response was successful
+        """
+        stats.requests += 1
+        stats.bytes += len(response.body)
+        if not response.ok:
+            self._failed(endpoint, stats, response.url, f"HTTP {response.status}")
+            return False
+        stats.succeeded += 1
+        self.sink.write(response)
+        if keep:
+            self._keep(endpoint, response)
+        if endpoint.watermark is not None:
+            self._watermarks.observe(endpoint, jsonpath.iter_matches(response.json(), endpoint.watermark.records))
+        return True
+
+    async def _handle_stream(self, endpoint: RelativeURLNode, response: StreamedResponse, stats: RunStats, keep: bool) -> bool:
+        """
+        Hands the records of a successful streamed response to the sink, one batch at a time
+        return: Whether the response was successful
+        """
+        if not response.ok:
+            return self._handle(endpoint, response, stats, keep)
+        try:
+            async for records in response.batches:
+                await self._drain()
+                self.sink.write(Response(
+                    endpoint=response.endpoint, url=response.url, status=response.status, headers=response.headers,
+                    body=b'', params=response.params, page=response.page, records=records
+                ))
+                if keep:
+                    self._results[endpoint.name].extend(records)
+                if endpoint.watermark is not None:
+                    self._watermarks.observe(endpoint, records)
+        finally:
+            await response.aclose()
+            stats.bytes += response.received
+        # Failures while receiving the body are counted as failed requests by _fetch
+        stats.requests += 1
+        stats.succeeded += 1
+        return True
+
+    async def _drain(self):
+        """Waits off the event loop until the sink can buffer the next response"""
+        while self.sink.full():
+            await asyncio.get_running_loop().run_in_executor(None, self.sink.wait)
+
+    def _limiter(self, endpoint: RelativeURLNode) -> HostLimiter:
+        """Returns the limiter shared by all endpoints of the same base"""
+        base = endpoint.base
+        if base.name not in self._limiters:
+            self._limiters[base.name] = HostLimiter(base.rate_limit)
+        return self._limiters[base.name]
+
+    def _keep(self, endpoint: RelativeURLNode, response: Response):
+        records = response.json()
+        if isinstance(records, list):
+            self._results[endpoint.name].extend(records)
+        else:
+            self._results[endpoint.name].append(records)
+
+    def _failed(self, endpoint: RelativeURLNode, stats: RunStats, url: str, reason: str):
+        stats.failed += 1
+        self._watermarks.fail(endpoint)
+        if len(stats.errors) < self.max_errors:
+            stats.errors.append((url, reason))
+
+    @staticmethod
+    def _count_consumers(graph: ResolutionGraph) -> Counter:
+        """Counts the param subscriptions of each resolver, one per param of each executed endpoint"""
+        consumers = Counter()
+        for endpoint in graph._endpoints.values():
+            if isinstance(endpoint, RelativeURLNode):
+                consumers.update(param.resolver.name for param in endpoint.params)
+        return consumers
+
+    @staticmethod
+    def _kept_endpoints(graph: ResolutionGraph) -> set:
+        """Names of the endpoints whose records are read by resolvers"""
+        return {
+            name for name in graph._endpoints
+            if any(section == 'resolver' for section, _ in graph.get_dependents('endpoint', name))
+        }
+
+
+def _take(iterator: Iterator, count: int) -> list:
+    return list(itertools.islice(iterator, count))
+
+
+async def _reacquire(slots: asyncio.Semaphore):
+    """
+    Takes back a released global slot. The slot is held even when the request is cancelled
+    while waiting for it, as pages beyond the last one are, so callers release it exactly once.
+    """
+    acquiring = asyncio.ensure_future(slots.acquire())
+    try:
+        await asyncio.shield(acquiring)
+    except asyncio.CancelledError:
+        await acquiring
+        raise
+
+
+def _finish(checkpoints: Checkpoints, endpoint: RelativeURLNode, partition: int, task: asyncio.Future):
+    checkpoints.finish(endpoint, partition, not task.cancelled() and task.result() is True)
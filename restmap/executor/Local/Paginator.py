@@ -0,0 +1,149 @@
+"""
+Paginator
+
+Requests the pages of an endpoint as described by its Pagination.
+
+The next page is requested as soon as its url is known, while the
+current page is still handed to the sink (prefetching). Offset paging
+does not depend on the previous page, so up to `parallel` pages are
+requested concurrently, and yielded in page order. Each request takes
+its own slot of the global concurrency limit of the executor.
+"""
+import asyncio
+import math
+import re
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from utils import jsonpath
+from restmap.executor.Local.Fetcher import Response
+from restmap.resolver.nodes.Pagination import Pagination
+
+FetchPage = Callable[[str], Awaitable[Response]]
+
+_LINK = re.compile(r'<([^>]*)>\s*((?:;\s*[^;,]*)*)')
+_NEXT_REL = re.compile(r'rel\s*=\s*"?([^";]*)"?')
+
+
+def with_query(url: str, values: dict) -> str:
+    """Sets the given query parameters of the url, replacing existing values"""
+    parts = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if key not in values]
+    query.extend((key, str(value)) for key, value in values.items())
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def next_link(header: Optional[str]) -> Optional[str]:
+    """Reads the url of the rel="next" entry of a Link header"""
+    for match in _LINK.finditer(header or ''):
+        rel = _NEXT_REL.search(match.group(2))
+        if rel is not None and 'next' in rel.group(1).split():
+            return match.group(1)
+    return None
+
+
+async def paginate(fetch: FetchPage, url: str, pagination: Pagination) -> AsyncIterator[Response]:
+    """
+    Lazily yields the pages of an endpoint, numbered by their `page`.
+    Paging stops at the first response that is not successful.
+    @fetch: Requests a single page url
+    @url: Url of the endpoint, query parameters of the pagination are added to it
+    """
+    if pagination.type == 'offset':
+        pages = _offset_pages(fetch, url, pagination)
+    else:
+        pages = _linked_pages(fetch, url, pagination)
+    async for page in pages:
+        yield page
+
+
+async def _linked_pages(fetch: FetchPage, url: str, pagination: Pagination) -> AsyncIterator[Response]:
+    """Pages whose url is read from the previous page"""
+    pending = asyncio.ensure_future(fetch(url))
+    seen = {url}
+    page = 0
+    try:
+        while pending is not None:
+            response = await pending
+            response.page = page
+            pending = None
+            if response.ok and (pagination.max_pages is None or page + 1 < pagination.max_pages):
+                following = _next_url(response, url, pagination)
+                # Guards against apis linking back to a page already read
+                if following is not None and following not in seen:
+                    seen.add(following)
+                    pending = asyncio.ensure_future(fetch(following))
+            yield response
+            page += 1
+    finally:
+        if pending is not None:
+            await _cancel([pending])
+
+
+def _next_url(response: Response, url: str, pagination: Pagination) -> Optional[str]:
+    if pagination.type == 'link':
+        following = next_link(response.header('Link'))
+        return urljoin(response.url, following) if following else None
+    following = jsonpath.find(response.json(), pagination.next)
+    if following in (None, ''):
+        return None
+    if pagination.type == 'nextLink':
+        return urljoin(response.url, str(following))
+    return with_query(url, {pagination.param: following})
+
+
+async def _offset_pages(fetch: FetchPage, url: str, pagination: Pagination) -> AsyncIterator[Response]:
+    """Pages requested by their offset, independent of each other"""
+    def page_url(page: int) -> str:
+        offset = pagination.start + page * pagination.limit
+        return with_query(url, {pagination.param: offset, pagination.limit_param: pagination.limit})
+
+    first = await fetch(page_url(0))
+    first.page = 0
+    last = pagination.max_pages
+    if first.ok and pagination.total is not None:
+        total = jsonpath.find(first.json(), pagination.total)
+        if isinstance(total, int):
+            pages = math.ceil(max(0, total - pagination.start) / pagination.limit)
+            last = pages if last is None else min(last, pages)
+    pending = deque()
+    following = 1
+    done = not first.ok or _is_last(first, pagination)
+
+    def schedule():
+        nonlocal following
+        while not done and len(pending) < pagination.parallel and (last is None or following < last):
+            pending.append((following, asyncio.ensure_future(fetch(page_url(following)))))
+            following += 1
+
+    try:
+        schedule()
+        yield first
+        while pending:
+            page, task = pending.popleft()
+            response = await task
+            response.page = page
+            if not response.ok or _is_last(response, pagination):
+                # Pages requested beyond the last one are not needed
+                done = True
+                await _cancel([task for _, task in pending])
+                pending.clear()
+            else:
+                schedule()
+            yield response
+    finally:
+        await _cancel([task for _, task in pending])
+
+
+async def _cancel(tasks: list):
+    """Cancels the requests of pages not needed, waiting until they stopped to free their slots"""
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _is_last(response: Response, pagination: Pagination) -> bool:
+    """Pages holding less records than requested are the last ones"""
+    records = sum(1 for _ in jsonpath.iter_matches(response.json(), pagination.records))
+    return records < pagination.limit
@@ -0,0 +1,265 @@
+"""
+Session Fetcher
+
+Fetches through one pooled, keep-alive HTTP session per BaseURLNode.
+Relative endpoints sharing a base reuse the open connections of its
+session, so TCP and TLS setup happen once per connection of the pool
+instead of once per request.
+
+Streamed responses are read in chunks in a worker thread, handing the
+parsed batches to the event loop through a small bounded queue: the
+thread pauses reading while the consumer is behind.
+"""
+import asyncio
+import http.client
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+from restmap.executor.Local.Fetcher import BaseFetcher, Response, StreamedResponse, iter_batches
+
+# Errors of connections the server closed while idle in the pool
+_STALE = (http.client.RemoteDisconnected, http.client.CannotSendRequest, BrokenPipeError, ConnectionResetError)
+# Batches parsed ahead of the consumer of a streamed response
+_PREFETCHED_BATCHES = 2
+
+
+class _Done(NamedTuple):
+    """Ends the batches of a streamed response"""
+    received: int
+
+
+class HostSession:
+    """
+    A bounded pool of keep-alive connections. Connections are kept per
+    scheme and host, requests wait while `pool_size` connections are in use.
+    """
+
+    def __init__(self, pool_size: int = 10, timeout: float = 30.0, headers: Optional[Dict[str, str]] = None) -> None:
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.headers = headers or {}
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._lock = threading.Lock()
+        self._idle: Dict[Tuple[str, str], queue.LifoQueue] = {}
+        # Number of connections opened, to monitor the reuse of the pool
+        self.connections = 0
+
+    def request(self, url: str, method: str = 'GET', headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """
+        Executes a blocking request on a pooled connection.
+        Requests failing on a connection closed by the server while idle are retried once.
+        return: The status, headers and body of the response
+        """
+        with self.open(url, method, headers) as response:
+            return response.status, dict(response.getheaders()), response.read()
+
+    @contextmanager
+    def open(self, url: str, method: str = 'GET', headers: Optional[Dict[str, str]] = None) -> Iterator[http.client.HTTPResponse]:
+        """
+        Executes a blocking request on a pooled connection, yielding the response
+        to read its body in chunks. The connection returns to the pool once the
+        body was read completely, and is closed otherwise.
+        """
+        parts = urlsplit(url)
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+        key = (parts.scheme, parts.netloc)
+        headers = {**self.headers, **(headers or {})}
+        with self._slots:
+            connection, reused = self._acquire(key)
+            try:
+                try:
+                    response = self._send(connection, method, target, headers)
+                except _STALE:
+                    if not reused:
+                        raise
+                    connection.close()
+                    connection = self._connect(key)
+                    response = self._send(connection, method, target, headers)
+                yield response
+            except BaseException:
+                connection.close()
+                raise
+            if response.isclosed() and not response.will_close:
+                self._release(key, connection)
+            else:
+                connection.close()
+
+    def close(self):
+        """Closes all idle connections"""
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for pool in pools.values():
+            while not pool.empty():
+                pool.get_nowait().close()
+
+    def _send(self, connection: http.client.HTTPConnection, method: str, target: str, headers: dict) -> http.client.HTTPResponse:
+        connection.request(method, target, headers=headers)
+        return connection.getresponse()
+
+    def _acquire(self, key: Tuple[str, str]) -> Tuple[http.client.HTTPConnection, bool]:
+        """return: An idle or new connection, and whether it was reused"""
+        with self._lock:
+            idle = self._idle.setdefault(key, queue.LifoQueue())
+        try:
+            return idle.get_nowait(), True
+        except queue.Empty:
+            return self._connect(key), False
+
+    def _release(self, key: Tuple[str, str], connection: http.client.HTTPConnection):
+        with self._lock:
+            self._idle.setdefault(key, queue.LifoQueue()).put(connection)
+
+    def _connect(self, key: Tuple[str, str]) -> http.client.HTTPConnection:
+        scheme, netloc = key
+        if scheme not in ('http', 'https'):
+            raise ValueError(f"Unsupported url scheme '{scheme}'")
+        connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        with self._lock:
+            self.connections += 1
+        return connection_class(netloc, timeout=self.timeout)
+
+
+class SessionFetcher(BaseFetcher):
+    """
+    Fetches the urls of each endpoint through the HostSession of its
+    BaseURLNode, sized by the `pool_size` of the base.
+    """
+
+    def __init__(self, timeout: float = 30.0, headers: Optional[Dict[str, str]] = None) -> None:
+        self.timeout = timeout
+        self.headers = headers or {}
+        self._sessions: Dict[str, HostSession] = {}
+        self._lock = threading.Lock()
+
+    def session(self, endpoint) -> HostSession:
+        """Returns the session shared by all endpoints of the same base"""
+        base = getattr(endpoint, 'base', None) or endpoint
+        with self._lock:
+            if base.name not in self._sessions:
+                self._sessions[base.name] = HostSession(
+                    pool_size=getattr(base, 'pool_size', 10), timeout=self.timeout, headers=self.headers
+                )
+            return self._sessions[base.name]
+
+    async def fetch(self, endpoint, url: str, params: Optional[dict] = None, headers: Optional[Dict[str, str]] = None) -> Response:
+        session = self.session(endpoint)
+        loop = asyncio.get_running_loop()
+        status, headers, body = await loop.run_in_executor(None, session.request, url, 'GET', headers)
+        return Response(endpoint=endpoint.name, url=url, status=status, headers=headers, body=body, params=params or {})
+
+    async def stream(self, endpoint, url: str, params: Optional[dict], streaming) -> StreamedResponse:
+        """
+        Reads the body in chunks of `streaming.chunk_size` in a worker thread, parsing
+        the records while they arrive. At most a few batches are held in memory.
+        """
+        session = self.session(endpoint)
+        loop = asyncio.get_running_loop()
+        head = loop.create_future()
+        batches = asyncio.Queue(maxsize=_PREFETCHED_BATCHES)
+        stopped = threading.Event()
+
+        def put(item: Any):
+            asyncio.run_coroutine_threadsafe(batches.put(item), loop).result()
+
+        def receive():
+            answered = False
+            try:
+                with session.open(url) as response:
+                    ok = 200 <= response.status < 300
+                    loop.call_soon_threadsafe(_set_result, head, (
+                        response.status, dict(response.getheaders()), b'' if ok else response.read()
+                    ))
+                    answered = True
+                    if not ok:
+                        return
+                    received = 0
+                    def chunks() -> Iterator[bytes]:
+                        nonlocal received
+                        while not stopped.is_set():
+                            chunk = response.read(streaming.chunk_size)
+                            if not chunk:
+                                return
+                            received += len(chunk)
+                            yield chunk
+                    for batch in iter_batches(chunks(), streaming):
+                        if stopped.is_set():
+                            # Leaving the body unread closes the connection
+                            return
+                        put(batch)
+                if not stopped.is_set():
+                    put(_Done(received))
+            except BaseException as error:
+                if not answered:
+                    loop.call_soon_threadsafe(_set_exception, head, error)
+                elif not stopped.is_set():
+                    # Errors while parsing are raised to the consumer of the batches
+                    put(error)
+
+        loop.run_in_executor(None, receive)
+        try:
+            status, headers, body = await head
+        except BaseException:
+            stopped.set()
+            raise
+        streamed = StreamedResponse(endpoint=endpoint.name, url=url, status=status, headers=headers, body=body, params=params or {})
+        streamed.received = len(body)
+        if streamed.ok:
+            streamed.batches = _QueuedBatches(streamed, batches, stopped)
+        return streamed
+
+    async def close(self) -> None:
+        with self._lock:
+            sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            session.close()
+
+
+class _QueuedBatches:
+    """
+    Reads the batches a receiver thread puts into a queue. Closing them, even
+    before the first batch was read, stops the receiver.
+    """
+
+    def __init__(self, streamed: StreamedResponse, batches: asyncio.Queue, stopped: threading.Event) -> None:
+        self._streamed = streamed
+        self._batches = batches
+        self._stopped = stopped
+
+    def __aiter__(self) -> '_QueuedBatches':
+        return self
+
+    async def __anext__(self) -> list:
+        if self._stopped.is_set():
+            raise StopAsyncIteration
+        item = await self._batches.get()
+        if isinstance(item, _Done):
+            self._streamed.received = item.received
+            await self.aclose()
+            raise StopAsyncIteration
+        if isinstance(item, BaseException):
+            await self.aclose()
+            raise item
+        return item
+
+    async def aclose(self) -> None:
+        self._stopped.set()
+        # Unblocks a receiver waiting for a free place in the queue, it stops before its next batch
+        while not self._batches.empty():
+            self._batches.get_nowait()
+
+
+def _set_result(future: asyncio.Future, result: Any):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, error: BaseException):
+    if not future.done():
+        future.set_exception(error)
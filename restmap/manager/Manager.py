@@ -17,7 +17,7 @@ actual deployment details on a specific backend provider, by compiling all
 activities into the overall serverless abstraction syntax used across the
 ingestless framework.
 """
-from typing import Union
+from typing import Optional, Union
 from pathlib import Path
 
 from enums import StatusCode
@@ -25,6 +25,7 @@ from enums import Services
 from restmap.manager.State import State
 from restmap.templateParser.TemplateParser import TemplateParser, TemplateSchema
 from restmap.resolver.Resolver import Resolver
+from restmap.resolver.ResolutionGraph import ResolutionGraph
 from restmap.compiler.Compiler import Compiler
 from restmap.executor.AWS.AWSProvider import AWSInfraProvider
 from restmap.executor.BaseProvider import BaseBackendProvider
@@ -34,14 +35,19 @@ class Manager:
     
     """
 
-    def __init__(self, backend: str, name: str) -> None:
-        self._parser = TemplateParser()
+    def __init__(self, backend: str, name: str, template_cache_dir: Optional[Union[str, Path]] = None) -> None:
+        """
+        @template_cache_dir: Folder to cache parsed templates between plans, disabled if not set
+        """
+        self._parser = TemplateParser(cache_dir=template_cache_dir)
         self._resolver = Resolver()
         #TODO Extend to handle multiple compilation processes
         self._compiler= Compiler()
         self._state = State()
         self._provider = self._init_backend_provider(backend, name)
         self._compiled_deployables = []
+        # Last planned graph, allows re-planning to only resolve changed components
+        self._resolution_graph = ResolutionGraph()
     
     def _init_backend_provider(self, backend: str, name: str) -> BaseBackendProvider:
         """Initializes the Provider instance for the chosen backend service"""
@@ -50,16 +56,20 @@ class Manager:
         else:
             return f"No BackendProvider implemented for backend: {backend}"
 
-    def validate(self, path: Union[str, Path]):
+    def validate(self, path: Union[str, Path]) -> list:
         """
         Validate the configuration files in the local environment
+        return: List of schema violations, empty if the template is valid
         """
+        # Collect all schema violations at once
+        errors = self._parser.validate(path)
+        if errors:
+            return errors
         # Ensure they can be parsed correctly
         template_dict = self._parser.load(path)
         # Ensure the elements can be placed onto the graph
         execution_graph = self._resolver.resolve(template_dict)
-
-        raise NotImplementedError
+        return errors
 
     def plan(self, path: Union[str, Path]) -> StatusCode:
         """
@@ -67,8 +77,9 @@ class Manager:
         """
         # Load the template from the file path given
         template = self._parser.load(path)
-        # Resolve template
-        resolution_graph = self._resolver.resolve(template)
+        # Resolve template, reusing all unchanged nodes of the previous plan
+        resolution_graph = self._resolver.resolve_delta(self._resolution_graph, template)
+        self._resolution_graph = resolution_graph
         # Store updated version
         self._state.state = resolution_graph
         # Compile the deployable assets
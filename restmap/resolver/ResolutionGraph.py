@@ -1,11 +1,28 @@
 """
 
 """
-from typing import Dict
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Set, Tuple
 from enums import Constructs
+from restmap.resolver.dependencies import topological_stages
 from restmap.resolver.nodes import EndpointNode, ParamNode, BaseNode
 from restmap.resolver.nodes.resolvers import ResolverNode
 
+@dataclass
+class ExecutionStage:
+    """
+    A set of nodes without dependencies amongst each other.
+    All nodes of a stage can be executed in parallel once the
+    nodes of the previous stages have been executed.
+    """
+    resolvers: List[ResolverNode.ResolverNode] = field(default_factory=list)
+    params: List[ParamNode.ParamNode] = field(default_factory=list)
+    endpoints: List[EndpointNode.EndpointNode] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.resolvers) + len(self.params) + len(self.endpoints)
+
 class ResolutionGraph:
     """
     The parse graph represents the logical
@@ -17,12 +34,17 @@ class ResolutionGraph:
     #TODO: Ensure iterative execution is enabled on all Nodes
     
     def __init__(self) -> None:
-        #TODO: Implement scheduling on multiple 'threads' of depdendency resolution to enable parallel execution
         self._kind = None
         self._head = None
         self._resolvers: Dict[str, ResolverNode.ResolverNode] = {}
         self._params: Dict[str, ParamNode.ParamNode] = {}
         self._endpoints: Dict[str, EndpointNode.EndpointNode] = {}
+        # Reverse dependency index maintained by the add_/remove_ methods
+        # (section, name) -> {(section, name) of the nodes depending on it}
+        # with section being one of 'resolver', 'param' or 'endpoint'
+        self._dependents: Dict[Tuple[str, str], Set[Tuple[str, str]]] = defaultdict(set)
+        # Digest of the template definition each node was resolved from, keyed like _dependents
+        self._fingerprints: Dict[Tuple[str, str], str] = {}
 
     # PROPERTIES _________
     @property
@@ -40,13 +62,17 @@ class ResolutionGraph:
         """
         Adds an endpoint Node to the graph
         """
+        if endpoint.name in self._endpoints:
+            self._unindex('endpoint', self._endpoints[endpoint.name])
         self._endpoints[endpoint.name] = endpoint
+        self._index('endpoint', endpoint)
 
     def remove_endpoint(self, name: str):
         """
         Removes an endpoint from the graph
         """
-        self._endpoints.pop(name)
+        self._unindex('endpoint', self._endpoints.pop(name))
+        self._fingerprints.pop(('endpoint', name), None)
     
     def get_endpoint(self, name: str) -> EndpointNode.EndpointNode:
         """Retrieves an endpoint by name"""
@@ -58,11 +84,15 @@ class ResolutionGraph:
         """
         Add a resolver Node to the graph
         """
+        if resolver.name in self._resolvers:
+            self._unindex('resolver', self._resolvers[resolver.name])
         self._resolvers[resolver.name] = resolver
+        self._index('resolver', resolver)
     
     def remove_resolver(self, resolver_name: str):
         """Remove a resolver from the graph"""
-        self._resolvers.pop(resolver_name)
+        self._unindex('resolver', self._resolvers.pop(resolver_name))
+        self._fingerprints.pop(('resolver', resolver_name), None)
 
     def get_resolver(self, name:str) -> ResolverNode.ResolverNode:
         if name not in self._resolvers:
@@ -74,11 +104,15 @@ class ResolutionGraph:
         """
         Add a parameter nod to the graph
         """
+        if param.name in self._params:
+            self._unindex('param', self._params[param.name])
         self._params[param.name] = param
+        self._index('param', param)
 
     def remove_parameter(self, param_name: str):
         """Remove parameter from graph"""
-        self._params.pop(param_name)
+        self._unindex('param', self._params.pop(param_name))
+        self._fingerprints.pop(('param', param_name), None)
 
     def get_param(self, name:str) -> ParamNode.ParamNode:
         try:
@@ -86,6 +120,96 @@ class ResolutionGraph:
         except:
             raise KeyError(f"{name} not a registered parameter")
     
+    # DEPENDENCIES_________
+    def get_dependents(self, section: str, name: str) -> Set[Tuple[str, str]]:
+        """
+        Returns the nodes directly depending on the given node
+        @section: One of 'resolver', 'param' or 'endpoint'
+        return: Set of (section, name) keys
+        """
+        return set(self._dependents.get((section, name), ()))
+
+    def get_affected(self, section: str, name: str) -> Set[Tuple[str, str]]:
+        """
+        Returns all nodes transitively depending on the given node,
+        e.g. the params and endpoints to redeploy when a resolver changes.
+
+        Walks the reverse index, so the cost is bound by the number of dependents.
+        return: Set of (section, name) keys
+        """
+        affected = set()
+        queue = deque([(section, name)])
+        while queue:
+            for dependent in self._dependents.get(queue.popleft(), ()):
+                if dependent not in affected:
+                    affected.add(dependent)
+                    queue.append(dependent)
+        return affected
+
+    def get_affected_endpoints(self, section: str, name: str) -> List[str]:
+        """Returns the names of all endpoints affected by a change of the given node"""
+        return [dependent for kind, dependent in self.get_affected(section, name) if kind == 'endpoint']
+
+    def execution_stages(self) -> List[ExecutionStage]:
+        """
+        Groups the nodes of the graph into ordered stages of independent
+        nodes, enabling executors to run each stage at its full width.
+
+        Raises a CircularDependencyError if the nodes depend on each other in a cycle.
+        return: Stages in execution order
+        """
+        sections = {
+            'resolver': self._resolvers,
+            'param': self._params,
+            'endpoint': self._endpoints,
+        }
+        dependencies = {
+            (section, name): self._node_dependencies(section, node)
+            for section, nodes in sections.items() for name, node in nodes.items()
+        }
+        stages = []
+        for keys in topological_stages(dependencies):
+            stage = ExecutionStage()
+            for section, name in keys:
+                getattr(stage, f"{section}s").append(sections[section][name])
+            stages.append(stage)
+        return stages
+
+    def _index(self, section: str, node: BaseNode.BaseNode):
+        """Registers the node as a dependent of all nodes it depends on"""
+        for dependency in self._node_dependencies(section, node):
+            self._dependents[dependency].add((section, node.name))
+
+    def _unindex(self, section: str, node: BaseNode.BaseNode):
+        """
+        Removes the node from the dependents of all nodes it depends on.
+        Nodes depending on the removed node keep their entry, as they still reference it.
+        """
+        for dependency in self._node_dependencies(section, node):
+            dependents = self._dependents.get(dependency)
+            if dependents is not None:
+                dependents.discard((section, node.name))
+                if not dependents:
+                    del self._dependents[dependency]
+
+    @staticmethod
+    def _node_dependencies(section: str, node: BaseNode.BaseNode) -> Set[Tuple[str, str]]:
+        """Reads the (section, name) keys of the nodes a node references"""
+        def name(ref) -> str:
+            # References are nodes once resolved, but may still be plain names
+            return getattr(ref, 'name', ref)
+
+        dependencies = set()
+        if section == 'resolver' and getattr(node, 'endpoint', None) is not None:
+            dependencies.add(('endpoint', name(node.endpoint)))
+        elif section == 'param' and getattr(node, 'resolver', None) is not None:
+            dependencies.add(('resolver', name(node.resolver)))
+        elif section == 'endpoint':
+            dependencies.update(('param', name(param)) for param in node.params)
+            if getattr(node, 'base', None) is not None:
+                dependencies.add(('endpoint', name(node.base)))
+        return dependencies
+
     def __repr__(self) -> str:
         #TODO: Represent in tabular format
         return "Resolution Graph" 
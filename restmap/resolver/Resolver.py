@@ -2,11 +2,18 @@
 
 
 """
-from typing import Dict, List 
+import hashlib
+import json
+from collections import deque
+from typing import Dict, List, Set, Tuple
 from restmap.resolver.nodes.resolvers import ResolverNode
 from restmap.templateParser.TemplateParser import TemplateSchema
 from restmap.resolver.ResolutionGraph import ResolutionGraph
-from restmap.resolver.nodes import EndpointNode, ParamNode 
+from restmap.resolver.dependencies import topological_order
+from restmap.resolver.nodes import BaseNode, EndpointNode, ParamNode 
+from restmap.resolver.nodes.ParamExpansion import ParamExpansion
+from restmap.resolver.nodes.RateLimit import RateLimit
+from restmap.resolver.nodes.EndpointOptions import ATTRIBUTES as OPTION_ATTRIBUTES, EndpointOptions
 from restmap.resolver.nodes.resolvers import EndpointResolver, DBResolver
 class Resolver:
     """
@@ -32,63 +39,116 @@ class Resolver:
         the other to reach a full resolution of all dependencies
         defined in the template. 
 
+        The dependencies amongst the components are collected once and
+        resolved in a single topological pass. Raises a CircularDependencyError
+        naming the components of a cycle if no valid order exists.
         """
-        # TODO Find a way to identify circular dependencies that can't be resolved and fail 
+        return self.resolve_delta(ResolutionGraph(), template)
+
+    def resolve_delta(self, previous_graph: ResolutionGraph, template: TemplateSchema) -> ResolutionGraph:
+        """
+        Resolve an updated template against a previously resolved graph.
+
+        Only components that were added or whose definition changed are
+        resolved again, together with all components depending on them or
+        on removed components. All other nodes are reused from the previous
+        graph as-is. The previous graph is left untouched.
+
+        return: A new ResolutionGraph for the updated template
+        """
+        self.graph = ResolutionGraph()
         self.graph.kind = template.kind 
-        # Starts from the full list of unresolved elements and removes them until all have been resolved
-        # Each section ['endpoint', 'param', 'resolver'] checks that it still exists as it is removed on full resolution of all its items
-        unresolved: Dict[str, List[str]] = {
-            'endpoint': [name for endpoint in template.config.endpoints for name in endpoint.keys()] ,
-            'param': [param for param in template.config.params.keys()],
-            'resolver': [resolver for resolver in template.config.resolvers.keys()],
-        }
-        # Iterates until all dependencies where met
-        repetition = 0
-        max_repetition = 20 # TODO Remove this hardcoded max_iteration with a smart circular dependency check
-        while unresolved['endpoint'] and unresolved['param'] and unresolved['resolver']: 
-            repetition += 1        
-            if repetition == max_repetition:
-                raise ValueError("You have created a circular dependency the system can't resolve. Please check your dependencies.")
-            # Try to start with the elements least likely to have dependencies
-            if 'resolver' in unresolved:
-                for name, attributes in template.config.resolvers.items():
-                    try:
-                        if not 'resolver' in unresolved or name not in unresolved['resolver']:
-                            pass
-                        elif attributes['kind'] == 'EndpointResolver' and attributes['endpoint'] in unresolved['endpoint']:
-                            pass
-                        else:
-                            self.graph.add_resolver(self._resolve_resolver(name, attributes))
-                            unresolved['resolver'] = [r for r in unresolved['resolver'] if r != name]
-                    except KeyError:
-                        pass
-            if 'param' in unresolved:
-                for param in template.config.params:
-                    param_template = template.config.params[param]
-                    if 'param' in unresolved and param not in unresolved['param']:
-                        pass
-                    elif 'resolver' in param_template and 'resolver' in unresolved and  param_template['resolver'] in unresolved['resolver']:
-                        # Depends on unresolved resolver must try again
-                        pass
-                    else:
-                        self.graph.add_parameter(self._resolve_param(param_template)) 
-                        if 'param' in unresolved:
-                            unresolved['param'] = [p for p in unresolved['param'] if p != param]
-            if 'endpoint' in unresolved:
-                for endpoint in template.config.endpoints:
-                    for name, attributes in endpoint.items():
-                        if name not in unresolved['endpoint']:
-                            pass
-                        # Handle the case with a relative endpoint
-                        elif attributes['kind'] == "relativeurl" and attributes['base'] in unresolved['endpoint']:
-                            pass
-                        elif 'params' in attributes and any([name in unresolved['param'] for param in attributes['params'] for name in param.keys()]):
-                            # Not yet fully resolved
-                            pass
-                        else:
-                            self.graph.add_endpoint(self._resolve_endpoint(name, attributes))
-                            unresolved['endpoint'] = [e for e in unresolved['endpoint'] if e != name]
-        return self.graph 
+        definitions = self._definitions(template)
+        dependencies = self._dependencies(template)
+        fingerprints = {key: self._fingerprint(attributes) for key, attributes in definitions.items()}
+
+        if self.graph.kind != previous_graph.kind:
+            stale = set(fingerprints)
+        else:
+            stale = {key for key, fingerprint in fingerprints.items() if previous_graph._fingerprints.get(key) != fingerprint}
+            stale.update(key for key in previous_graph._fingerprints if key not in fingerprints)
+        dirty = self._with_dependents(stale, dependencies)
+
+        for key in topological_order(dependencies):
+            section, name = key
+            if key in dirty:
+                node = self._resolve(section, name, definitions[key])
+            else:
+                node = {
+                    'resolver': previous_graph._resolvers,
+                    'param': previous_graph._params,
+                    'endpoint': previous_graph._endpoints,
+                }[section][name]
+            {
+                'resolver': self.graph.add_resolver,
+                'param': self.graph.add_parameter,
+                'endpoint': self.graph.add_endpoint,
+            }[section](node)
+            self.graph._fingerprints[key] = fingerprints[key]
+        return self.graph
+
+    def _resolve(self, section: str, name: str, attributes: dict) -> BaseNode.BaseNode:
+        """Routes a template component to the resolution method of its section"""
+        if section == 'resolver':
+            return self._resolve_resolver(name, attributes)
+        if section == 'param':
+            return self._resolve_param(attributes)
+        return self._resolve_endpoint(name, attributes)
+
+    def _definitions(self, template: TemplateSchema) -> Dict[Tuple[str, str], dict]:
+        """Collects the template definition of each component by `(section, name)`"""
+        definitions = {('resolver', name): attributes for name, attributes in template.config.resolvers.items()}
+        definitions.update({('param', name): attributes for name, attributes in template.config.params.items()})
+        definitions.update({
+            ('endpoint', name): attributes
+            for endpoint in template.config.endpoints for name, attributes in endpoint.items()
+        })
+        return definitions
+
+    @staticmethod
+    def _fingerprint(attributes: dict) -> str:
+        """Digest of a component definition to detect changes across template versions"""
+        canonical = json.dumps(attributes, sort_keys=True, default=str)
+        return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _with_dependents(keys: Set[Tuple[str, str]], dependencies: Dict[Tuple[str, str], Set[Tuple[str, str]]]) -> Set[Tuple[str, str]]:
+        """Extends the given keys by all components transitively depending on them"""
+        dependents: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+        for key, deps in dependencies.items():
+            for dep in deps:
+                dependents.setdefault(dep, []).append(key)
+        closure = set(keys)
+        queue = deque(keys)
+        while queue:
+            for dependent in dependents.get(queue.popleft(), ()):
+                if dependent not in closure:
+                    closure.add(dependent)
+                    queue.append(dependent)
+        return closure
+
+    def _dependencies(self, template: TemplateSchema) -> Dict[Tuple[str, str], Set[Tuple[str, str]]]:
+        """
+        Collects the dependencies of each component declared in the template.
+
+        Components are keyed by `(section, name)` with section one of
+        'resolver', 'param' or 'endpoint', as names may repeat across sections.
+        """
+        dependencies: Dict[Tuple[str, str], Set[Tuple[str, str]]] = {}
+        for name, attributes in template.config.resolvers.items():
+            dependencies[('resolver', name)] = set()
+            if attributes['kind'] == 'EndpointResolver':
+                dependencies[('resolver', name)].add(('endpoint', attributes['endpoint']))
+        for name, attributes in template.config.params.items():
+            dependencies[('param', name)] = set()
+            if 'resolver' in attributes:
+                dependencies[('param', name)].add(('resolver', attributes['resolver']))
+        for endpoint in template.config.endpoints:
+            for name, attributes in endpoint.items():
+                dependencies[('endpoint', name)] = {('param', param) for params in attributes.get('params', []) for param in params.keys()}
+                if attributes['kind'] == 'relativeurl':
+                    dependencies[('endpoint', name)].add(('endpoint', attributes['base']))
+        return dependencies
 
     # TODO This must be rewritten to actually compile a full resolution of all attributes
     def _old_resolve(self, template: TemplateSchema) -> ResolutionGraph:
@@ -137,12 +197,20 @@ class Resolver:
         try:
             return self.graph._endpoints[name]
         except:
-            endpoint['name'] = name
-            # TODO: Ensure 'baseurl' are always resolved before 'relativeurl' endpoints. Parse SchemaTemplate into ordered_dict and sort accordingly before resolving
+            # Copy to keep the template reusable for later resolutions
+            endpoint = dict(endpoint, name=name)
             if endpoint["kind"] == "relativeurl":
                 endpoint['base'] = self.graph.get_endpoint(endpoint['base'])
             if "params" in endpoint:
                 endpoint['params'] = [self.graph.get_param(name) for param in endpoint['params'] for name in param.keys()]
+            if "expansion" in endpoint:
+                endpoint['expansion'] = ParamExpansion.from_template(endpoint['expansion'])
+            if "rate_limit" in endpoint:
+                endpoint['rate_limit'] = RateLimit.from_template(endpoint['rate_limit'])
+            if endpoint["kind"] == "relativeurl":
+                endpoint['options'] = EndpointOptions.from_template(endpoint)
+                for attribute in OPTION_ATTRIBUTES:
+                    endpoint.pop(attribute, None)
             return endpoint_switch[endpoint['kind']](**endpoint) 
         
     def _resolve_param(self, param: dict) -> ParamNode.ParamNode: 
@@ -154,6 +222,7 @@ class Resolver:
             # If already registered, return cached instance 
             return self.graph._params[param['name']]
         except:
+            param = dict(param)
             param['resolver'] = self.graph.get_resolver(param['resolver'])
             #TODO: Resolve authentication provider class (Enabling authentican configuration against provider backend)
             return ParamNode.ParamNode(**param)
@@ -168,5 +237,5 @@ class Resolver:
             'DatabaseResolver': DBResolver.DBResolver
         }
         if resolver['kind'] == 'EndpointResolver':
-            resolver['endpoint'] = self.graph._endpoints[resolver['endpoint']]
+            resolver = dict(resolver, endpoint=self.graph._endpoints[resolver['endpoint']])
         return resolver_switch[resolver['kind']](name=name, **resolver)
\ No newline at end of file
@@ -0,0 +1,98 @@
+"""
+Dependency ordering
+
+Orders the components of a template, or the nodes of a ResolutionGraph,
+such that every element is placed after all the elements it depends on.
+
+Dependencies are given as a mapping of a node key to the set of node keys
+it depends on. The Resolver uses `(section, name)` tuples as keys, where
+section is one of 'resolver', 'param' or 'endpoint'.
+
+The ordering is computed in a single O(V+E) pass (Kahn's algorithm). When
+no valid order exists, the nodes forming the cycle are reported.
+"""
+from typing import Dict, Hashable, List, Set
+
+
+class CircularDependencyError(ValueError):
+    """
+    Raised when the dependencies amongst the components form a cycle
+    that can't be resolved. The nodes forming the cycle are available
+    as `cycle`, in dependency order.
+    """
+    def __init__(self, cycle: List[Hashable]) -> None:
+        self.cycle = cycle
+        path = ' -> '.join(_describe(key) for key in cycle + cycle[:1])
+        super().__init__(f"You have created a circular dependency the system can't resolve: {path}")
+
+
+def topological_stages(dependencies: Dict[Hashable, Set[Hashable]]) -> List[List[Hashable]]:
+    """
+    Groups the nodes into stages. A stage only contains nodes whose
+    dependencies are all placed in earlier stages, so the members of
+    a stage are independent of each other.
+
+    Within a stage, nodes keep the order of the `dependencies` mapping.
+    @dependencies: Maps each node to the set of nodes it depends on
+    return: Ordered list of stages
+    """
+    missing = [(key, dep) for key, deps in dependencies.items() for dep in deps if dep not in dependencies]
+    if missing:
+        key, dep = missing[0]
+        raise KeyError(f"{_describe(key)} depends on {_describe(dep)} which is not defined")
+
+    pending = {key: len(deps) for key, deps in dependencies.items()}
+    dependents: Dict[Hashable, List[Hashable]] = {key: [] for key in dependencies}
+    for key, deps in dependencies.items():
+        for dep in deps:
+            dependents[dep].append(key)
+
+    stages = []
+    stage = [key for key, count in pending.items() if count == 0]
+    placed = 0
+    while stage:
+        stages.append(stage)
+        placed += len(stage)
+        next_stage = []
+        for key in stage:
+            for dependent in dependents[key]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    next_stage.append(dependent)
+        stage = next_stage
+
+    if placed != len(dependencies):
+        unresolved = {key for key, count in pending.items() if count > 0}
+        raise CircularDependencyError(find_cycle(dependencies, unresolved))
+    return stages
+
+
+def topological_order(dependencies: Dict[Hashable, Set[Hashable]]) -> List[Hashable]:
+    """
+    Flattens the stages into a single resolution order
+    """
+    return [key for stage in topological_stages(dependencies) for key in stage]
+
+
+def find_cycle(dependencies: Dict[Hashable, Set[Hashable]], unresolved: Set[Hashable]) -> List[Hashable]:
+    """
+    Returns the nodes of one cycle amongst the unresolved nodes.
+
+    Every unresolved node depends on at least one other unresolved
+    node, so following those dependencies must eventually revisit
+    a node. The path from the first visit onwards is the cycle.
+    """
+    key = next(iter(unresolved))
+    visited: Dict[Hashable, int] = {}
+    path = []
+    while key not in visited:
+        visited[key] = len(path)
+        path.append(key)
+        key = next(dep for dep in dependencies[key] if dep in unresolved)
+    return path[visited[key]:]
+
+
+def _describe(key: Hashable) -> str:
+    if isinstance(key, tuple) and len(key) == 2:
+        return f"{key[0]} '{key[1]}'"
+    return repr(key)
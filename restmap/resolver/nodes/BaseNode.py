@@ -1,12 +1,15 @@
+import sys
 from dataclasses import dataclass
 
 
 @dataclass
 class _BaseNodeBase:
+    __slots__ = ()
     name: str
 
 @dataclass
 class _BaseNodeDefaults:
+    __slots__ = ()
     descr: str = ''
 @dataclass
 class BaseNode(_BaseNodeDefaults, _BaseNodeBase):
@@ -19,7 +22,22 @@ class BaseNode(_BaseNodeDefaults, _BaseNodeBase):
     The Node acts as an intermediary representation that can be scheduled
     and eventually be compiled onto a specific backend implementation
     using backend providers.
+
+    Graphs can hold a large number of nodes. Nodes therefore store their
+    fields in __slots__ instead of an instance __dict__: the parameter
+    mixins declare empty slots, each node class the slots of its own fields.
+    Repeated strings, like names and kinds, are interned on creation.
     """
+    __slots__ = ('name', 'descr')
+    # String fields shared amongst many nodes, extended by subclasses
+    _interned = ('name', 'descr')
+
+    def __post_init__(self):
+        for attribute in self._interned:
+            value = getattr(self, attribute)
+            if type(value) is str:
+                setattr(self, attribute, sys.intern(value))
+
     def resolve(self, provider):
         """
         Called on each node when the graph gets executed
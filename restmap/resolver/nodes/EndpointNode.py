@@ -17,16 +17,27 @@ RelativeURLNode: Builds up on the BaseURLNode endpoint configuration to execute
                  function.
 
 """
-from dataclasses import dataclass, field
+import itertools
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, List, Mapping, Optional
 from .BaseNode import BaseNode
 from restmap.resolver.nodes.ParamNode import ParamNode
+from restmap.resolver.nodes.ParamExpansion import ParamExpansion
+from restmap.resolver.nodes.EndpointOptions import DEFAULT_OPTIONS, EndpointOptions
+from restmap.resolver.nodes.Pagination import Pagination
+from restmap.resolver.nodes.RateLimit import RateLimit
+from restmap.resolver.nodes.Streaming import Streaming
+from restmap.resolver.nodes.Watermark import Watermark
+from restmap.resolver.nodes.URLTemplate import URLTemplate
 
 @dataclass
 class _EndpointNodeBase:
+    __slots__ = ()
     kind: str
 @dataclass
 class _EndpointNodeDefaults:
-    params: list[ParamNode] = field(default_factory=list)
+    __slots__ = ()
+    params: tuple[ParamNode, ...] = ()
 @dataclass
 class EndpointNode(_EndpointNodeDefaults, BaseNode, _EndpointNodeBase):
     """
@@ -34,6 +45,13 @@ class EndpointNode(_EndpointNodeDefaults, BaseNode, _EndpointNodeBase):
     graph. Parametrization on this node can either be hardcoded, 
     or provided through a resolver instance.
     """
+    __slots__ = ('kind', 'params')
+    _interned = BaseNode._interned + ('kind',)
+
+    def __post_init__(self):
+        super().__post_init__()
+        # Tuples are smaller than lists, and all nodes without params share the empty tuple
+        self.params = tuple(self.params)
 
     def resolve(self, provider):
         raise NotImplementedError
@@ -50,32 +68,169 @@ class EndpointNode(_EndpointNodeDefaults, BaseNode, _EndpointNodeBase):
 
 @dataclass 
 class _BaseURLNodeBase:
+    __slots__ = ()
     url: str
 @dataclass 
 class _BaseURLNodeDefaults:
-    pass
+    __slots__ = ()
+    # Number of keep-alive connections shared by all endpoints of the base
+    pool_size: int = 10
+    # Throttling of the requests to the host, the RateLimit defaults if None
+    rate_limit: Optional[RateLimit] = None
 @dataclass
 class BaseURLNode(_BaseURLNodeDefaults, EndpointNode, _BaseURLNodeBase):
     """
     A configuration url base endpoint that is not executed by itself
-    but carries configuration that is reused across RelativeURLNodes.
+    but carries configuration that is reused across RelativeURLNodes,
+    like the connection pool and rate limit all of them share.
     """
+    __slots__ = ('url', 'pool_size', 'rate_limit')
+    _interned = EndpointNode._interned + ('url',)
+
     def get_url(self):
-        raise NotImplementedError
-        # return self.url.format(**self.params)
+        return self.url
 
 @dataclass 
 class _RelativeURLNodeBase:
+    __slots__ = ()
     base: BaseURLNode
     relative: str 
 @dataclass 
 class _RelativeURLNodeDefaults:
-    pass
+    __slots__ = ()
+    # Maps a format field of the relative url to the fixed values to expand it with
+    matrix: Optional[dict[str, list]] = None
+    # Combines the values of the params, the cross product if None
+    expansion: Optional[ParamExpansion] = None
+    # Pagination, streaming, watermark and conditional requests, see EndpointOptions
+    options: Optional[EndpointOptions] = None
 @dataclass
 class RelativeURLNode(_RelativeURLNodeDefaults, EndpointNode, _RelativeURLNodeBase):
     """
-    A configuration url base endpoint that is not executed by itself
-    but carries configuration that is reused across RelativeURLNodes.
+    An executed endpoint, the relative url of a BaseURLNode. Its urls are
+    built from the values of its params and matrix, see `iter_params`.
+
+    Options
+    ----------------
+    matrix:      Fixed values expanding a single node into one url per value combination
+    expansion:   Combines the values of the params lazily, see ParamExpansion
+    options:     Rarely set options, grouped to keep the node small, see EndpointOptions
+      pagination:  Requests list endpoints page by page, see Pagination
+      streaming:   Parses large responses while they are received, see Streaming
+      watermark:   Requests only records newer than the previous execution, see Watermark
+      conditional: Sends the validators of the previous response and reuses its
+                   records while the server answers 304 Not Modified, see ResponseCache
     """
+    # _url_template caches the compiled url and is not a dataclass field
+    __slots__ = ('base', 'relative', 'matrix', 'expansion', 'options', '_url_template')
+
+    def __post_init__(self):
+        super().__post_init__()
+        if self.options is None:
+            # All endpoints without options share one instance
+            self.options = DEFAULT_OPTIONS
+        self.options.validate(self.name)
+
+    @property
+    def pagination(self) -> Optional[Pagination]:
+        return self.options.pagination
+
+    @property
+    def streaming(self) -> Optional[Streaming]:
+        return self.options.streaming
+
+    @property
+    def watermark(self) -> Optional[Watermark]:
+        return self.options.watermark
+
+    @property
+    def conditional(self) -> bool:
+        return self.options.conditional
+
+    @property
+    def url_template(self) -> URLTemplate:
+        """
+        The url of the node compiled once on first use, with the
+        base url resolved into its prefix.
+        """
+        try:
+            return self._url_template
+        except AttributeError:
+            self._url_template = URLTemplate(self.relative, prefix=self.base.get_url())
+            return self._url_template
+
     def get_url(self):
-        return self.base.get_url() + self.relative.format(**self.format_params)
\ No newline at end of file
+        return self.url_template.format(self.format_params)
+
+    def resolve(self, provider):
+        """Returns the records fetched from the endpoint by the executing provider"""
+        return provider.resolve_endpoint(self)
+
+    def build_url(self, params: Mapping[str, Any]) -> str:
+        """Builds the url for a mapping of format field to value"""
+        return self.url_template.format(params)
+
+    def build_urls(self, column: Iterable[Any], field: Optional[str] = None) -> List[str]:
+        """
+        Builds the urls for a column of values in one call, e.g. all
+        values produced by the resolver of a param.
+        @column: Values of a single format field, or mappings of format field to value
+        @field: Format field of the column values, defaults to the only field of the url
+        """
+        column = iter(column)
+        first = next(column, None)
+        if first is None:
+            return []
+        column = itertools.chain([first], column)
+        if isinstance(first, Mapping):
+            return self.url_template.format_many(column)
+        return self.url_template.format_column(column, field)
+
+    @property
+    def matrix_size(self) -> int:
+        """Number of value combinations the matrix expands to"""
+        size = 1
+        for values in (self.matrix or {}).values():
+            size *= len(values)
+        return size
+
+    def iter_matrix(self) -> Iterator[dict]:
+        """
+        Lazily yields each combination of the matrix values as a mapping
+        of format field to value. Yields a single empty mapping without a matrix.
+        """
+        matrix = self.matrix or {}
+        fields = list(matrix)
+        for values in itertools.product(*(matrix[name] for name in fields)):
+            yield dict(zip(fields, values))
+
+    def expand(self, params: Optional[dict] = None) -> Iterator[str]:
+        """
+        Lazily generates the concrete URLs of the node, one for each
+        combination of the matrix values.
+        @params: Values for the remaining format fields of the relative url
+        """
+        params = params or {}
+        build = self.url_template.format
+        for combination in self.iter_matrix():
+            yield build({**params, **combination})
+
+    def iter_params(self, provider=None, cache=None) -> Iterator[dict]:
+        """
+        Lazily yields the format values of each execution: every combination
+        of the param values, as selected by the expansion, with every
+        combination of the matrix values.
+        @cache: ResolverCache memoizing the outputs of the param resolvers
+        """
+        expansion = self.expansion or ParamExpansion()
+        streams = {param.name: param.resolve(provider, cache=cache) for param in self.params}
+        matrix = list(self.iter_matrix())
+        for combination in expansion.expand(streams):
+            for values in matrix:
+                yield {**combination, **values}
+
+    def iter_urls(self, provider=None, cache=None) -> Iterator[str]:
+        """Lazily generates the URL of each execution, see iter_params"""
+        build = self.url_template.format
+        for values in self.iter_params(provider, cache=cache):
+            yield build(values)
@@ -0,0 +1,68 @@
+"""
+Endpoint Options
+
+Groups the rarely set execution options of a relative url, so that
+RelativeURLNodes share a single empty instance and only endpoints using
+an option carry their own. The options are set as attributes of the
+relative url in the template:
+
+    items:
+        kind: relativeurl
+        base: baseurl
+        relative: /items
+        pagination:
+            type: offset
+            limit: 100
+"""
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+from restmap.resolver.nodes.Pagination import Pagination
+from restmap.resolver.nodes.Streaming import Streaming
+from restmap.resolver.nodes.Watermark import Watermark
+
+# Template attributes of the options
+ATTRIBUTES = ('pagination', 'streaming', 'watermark', 'conditional')
+
+
+@dataclass(frozen=True)
+class EndpointOptions:
+    """
+    Execution options of an endpoint
+    """
+    # Requests all pages of the endpoint, a single request per url if None
+    pagination: Optional[Pagination] = None
+    # Hands the records of the body to the sink while it is received, the whole body if None
+    streaming: Optional[Streaming] = None
+    # Requests only records newer than the previous execution, all records if None
+    watermark: Optional[Watermark] = None
+    # Sends If-None-Match and If-Modified-Since with the validators of the previous response
+    conditional: bool = False
+
+    @classmethod
+    def from_template(cls, endpoint: Mapping) -> Optional['EndpointOptions']:
+        """
+        Creates the options from the attributes of an endpoint template
+        return: None if the template sets no option
+        """
+        if not any(attribute in endpoint for attribute in ATTRIBUTES):
+            return None
+        return cls(
+            pagination=Pagination.from_template(endpoint['pagination']) if 'pagination' in endpoint else None,
+            streaming=Streaming.from_template(endpoint['streaming']) if 'streaming' in endpoint else None,
+            watermark=Watermark.from_template(endpoint['watermark']) if 'watermark' in endpoint else None,
+            conditional=endpoint.get('conditional', False),
+        )
+
+    def validate(self, name: str):
+        """Raises a ValueError for options of the named endpoint that exclude each other"""
+        if self.streaming is not None and self.pagination is not None:
+            # The next page is read from the body, which streamed responses do not keep
+            raise ValueError(f"Endpoint '{name}' cannot both paginate and stream its responses")
+        if self.conditional and (self.streaming is not None or self.pagination is not None):
+            # A 304 answer reuses the previous body, which is neither kept for streams nor for pages
+            raise ValueError(f"Endpoint '{name}' cannot send conditional requests while paginating or streaming")
+
+
+# Shared by all endpoints without options
+DEFAULT_OPTIONS = EndpointOptions()
@@ -0,0 +1,74 @@
+"""
+Pagination
+
+Describes how the pages of a list endpoint are requested, set with the
+`pagination` attribute of a relative url in the template. Selectors are
+JSONPath-style paths into the response body, see utils.jsonpath.
+
+Types
+----------------
+cursor:   The body carries the cursor of the next page at `next`, which is
+          sent in the query parameter `param`
+offset:   Pages are requested by the query parameters `param` (the offset)
+          and `limit_param`. Paging ends with a page holding less than `limit`
+          records at `records`, or at the total number of records at `total`.
+          Pages are requested `parallel` at a time.
+nextLink: The body carries the url of the next page at `next`
+link:     The Link header carries the url of the next page as rel="next"
+
+    scope:
+        kind: relativeurl
+        base: baseurl
+        relative: /subscriptions
+        pagination:
+            type: nextLink
+            next: $.nextLink
+"""
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+TYPES = ('cursor', 'offset', 'nextLink', 'link')
+
+# Defaults of the settings depending on the pagination type
+_NEXT = {'cursor': '$.next', 'nextLink': '$.nextLink'}
+_PARAM = {'cursor': 'cursor', 'offset': 'offset'}
+
+
+@dataclass(frozen=True)
+class Pagination:
+    """
+    Pagination settings of an endpoint
+    """
+    type: str
+    # Selector of the next cursor or next page url
+    next: Optional[str] = None
+    # Query parameter of the cursor or offset
+    param: Optional[str] = None
+    limit: int = 100
+    limit_param: str = 'limit'
+    start: int = 0
+    # Selectors of the records of a page and of the total number of records
+    records: str = '$[*]'
+    total: Optional[str] = None
+    # Offset pages requested concurrently
+    parallel: int = 1
+    # Stops after the given number of pages, unbounded if None
+    max_pages: Optional[int] = None
+
+    def __post_init__(self):
+        if self.type not in TYPES:
+            raise ValueError(f"Unknown pagination type '{self.type}', use one of {list(TYPES)}")
+        if self.limit < 1 or self.parallel < 1:
+            raise ValueError("limit and parallel must be at least 1")
+        if self.max_pages is not None and self.max_pages < 1:
+            raise ValueError("max_pages must be at least 1")
+        # Frozen dataclasses set derived defaults through object.__setattr__
+        if self.next is None and self.type in _NEXT:
+            object.__setattr__(self, 'next', _NEXT[self.type])
+        if self.param is None and self.type in _PARAM:
+            object.__setattr__(self, 'param', _PARAM[self.type])
+
+    @classmethod
+    def from_template(cls, pagination: Mapping) -> 'Pagination':
+        """Creates the settings from the `pagination` attribute of an endpoint template"""
+        return cls(**pagination)
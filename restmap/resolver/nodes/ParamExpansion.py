@@ -0,0 +1,121 @@
+"""
+Param Expansion
+
+Combines the value streams of the params of an endpoint into the format
+values of each execution. Combinations are generated lazily, one at a time,
+so fan-outs like 100k user ids times 50 scopes are never materialized.
+
+Modes
+----------------
+product: Every combination of the param values. The first param is streamed,
+         the values of all further params are buffered to be repeated for
+         each value of the first one. List the largest param first.
+zip:     Combines the n-th values of all params, stops with the shortest param.
+
+Filters drop combinations, comparing a field to a fixed `value` or to
+the value of an `other` field:
+
+    expansion:
+        mode: product
+        filter:
+            - field: userId
+              op: '!='
+              value: 0
+"""
+import itertools
+import operator
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator, Mapping, Optional, Sequence, Tuple
+
+_operators: Dict[str, Callable[[Any, Any], bool]] = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    'in': lambda a, b: a in b,
+    'not in': lambda a, b: a not in b,
+}
+
+MODES = ('product', 'zip')
+
+
+@dataclass(frozen=True)
+class ParamFilter:
+    """
+    Keeps the combinations for which `field op value`,
+    or `field op other` if an other field is given, holds.
+    """
+    field: str
+    op: str = '=='
+    value: Any = None
+    other: Optional[str] = None
+
+    def __post_init__(self):
+        if self.op not in _operators:
+            raise ValueError(f"Unknown filter operator '{self.op}', use one of {list(_operators)}")
+
+    def __call__(self, values: Mapping[str, Any]) -> bool:
+        compared = values[self.other] if self.other is not None else self.value
+        return _operators[self.op](values[self.field], compared)
+
+
+@dataclass(frozen=True)
+class ParamExpansion:
+    """
+    Expands the value streams of params into the format values of each execution
+    """
+    mode: str = 'product'
+    filters: Tuple[ParamFilter, ...] = ()
+
+    def __post_init__(self):
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown expansion mode '{self.mode}', use one of {list(MODES)}")
+
+    @classmethod
+    def from_template(cls, expansion: Optional[Mapping]) -> 'ParamExpansion':
+        """Creates the expansion from the `expansion` attribute of an endpoint template"""
+        expansion = expansion or {}
+        return cls(
+            mode=expansion.get('mode', 'product'),
+            filters=tuple(ParamFilter(**condition) for condition in expansion.get('filter', ()))
+        )
+
+    def expand(self, streams: Mapping[str, Iterable]) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily yields one mapping of field to value per combination. Closes the
+        streams once done, including those not read to the end or not read at all.
+        @streams: Values of each field, in expansion order
+        """
+        fields = tuple(streams)
+        if self.mode == 'zip':
+            combinations = zip(*streams.values())
+        else:
+            combinations = self._product(list(streams.values()))
+        filters = self.filters
+        try:
+            for values in combinations:
+                combination = dict(zip(fields, values))
+                if all(condition(combination) for condition in filters):
+                    yield combination
+        finally:
+            # Shared resolutions wait for subscribers that neither read nor close
+            for stream in streams.values():
+                close = getattr(stream, 'close', None)
+                if close is not None:
+                    close()
+
+    @staticmethod
+    def _product(streams: Sequence[Iterable]) -> Iterator[tuple]:
+        """Cartesian product streaming the first iterable instead of materializing all like itertools.product"""
+        if not streams:
+            yield ()
+            return
+        # Sequences can be repeated as they are, other iterables are read once into a buffer
+        inner = [stream if isinstance(stream, Sequence) else tuple(stream) for stream in streams[1:]]
+        if not all(inner):
+            return
+        for value in streams[0]:
+            for rest in itertools.product(*inner):
+                yield (value,) + rest
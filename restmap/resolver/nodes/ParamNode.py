@@ -4,21 +4,27 @@ from restmap.resolver.nodes.resolvers import ResolverNode
 
 @dataclass
 class _ParamNodeBase:
+    __slots__ = ()
     type: str
     resolver: ResolverNode.ResolverNode
 
 @dataclass
 class _ParamNodeDefaultsBase:
-    pass
+    __slots__ = ()
 
 @dataclass
 class ParamNode(_ParamNodeDefaultsBase, BaseNode, _ParamNodeBase):
     """
     
     """
-    def resolve(self, provider):
+    __slots__ = ('type', 'resolver')
+    _interned = BaseNode._interned + ('type',)
+
+    def resolve(self, provider, cache=None):
         """
-        Returns the value of the parameter
+        Returns the values of the parameter, read from the output
+        of its resolver shared amongst all params using it
+        @cache: ResolverCache memoizing the output of the resolver
         """
-        return self.resolver.resolve()
+        return self.resolver.subscribe(provider, cache=cache)
         
\ No newline at end of file
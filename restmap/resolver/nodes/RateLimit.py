@@ -0,0 +1,70 @@
+"""
+Rate Limit
+
+Throttling configuration of the host behind a BaseURLNode, set with the
+`rate_limit` attribute of the base url in the template:
+
+    baseurl:
+        kind: baseurl
+        url: https://management.azure.com/
+        rate_limit:
+            rate: 20
+            concurrency: 4
+            max_concurrency: 32
+
+Requests are bounded by a token bucket of `rate` requests per second with
+`burst` tokens, and by a concurrency window adapted by additive increase,
+multiplicative decrease (AIMD): every successful response grows the window
+by `increase` per window, every 429 or 503 response shrinks it by the
+factor `decrease`, so executors settle at the throughput a host sustains.
+"""
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+# Status codes signalling the host is overloaded
+THROTTLED = (429, 503)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """
+    Token bucket and AIMD concurrency settings of a host
+    """
+    # Requests per second, unlimited if None
+    rate: Optional[float] = None
+    # Tokens the bucket holds, defaults to one second of requests
+    burst: Optional[int] = None
+    # Initial size and bounds of the concurrency window
+    concurrency: int = 4
+    min_concurrency: int = 1
+    max_concurrency: int = 10
+    increase: float = 1.0
+    decrease: float = 0.5
+    # Retries of throttled requests, waiting `backoff * 2 ** attempt` seconds without Retry-After
+    retries: int = 3
+    backoff: float = 1.0
+    # Upper bound of the Retry-After delays accepted from a host
+    max_retry_after: float = 300.0
+
+    def __post_init__(self):
+        if self.rate is not None and self.rate <= 0:
+            raise ValueError(f"rate must be positive, got {self.rate}")
+        if not 1 <= self.min_concurrency <= self.concurrency <= self.max_concurrency:
+            raise ValueError(
+                "concurrency must lie within 1 <= min_concurrency <= concurrency <= max_concurrency, "
+                f"got {self.min_concurrency}, {self.concurrency}, {self.max_concurrency}"
+            )
+        if not 0 < self.decrease < 1:
+            raise ValueError(f"decrease must be a factor between 0 and 1, got {self.decrease}")
+
+    @property
+    def capacity(self) -> float:
+        """Number of tokens the bucket holds"""
+        if self.burst is not None:
+            return float(self.burst)
+        return max(1.0, self.rate or 1.0)
+
+    @classmethod
+    def from_template(cls, rate_limit: Optional[Mapping]) -> 'RateLimit':
+        """Creates the configuration from the `rate_limit` attribute of a base url template"""
+        return cls(**(rate_limit or {}))
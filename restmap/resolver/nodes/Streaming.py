@@ -0,0 +1,46 @@
+"""
+Streaming
+
+Parses the response body of an endpoint incrementally while it is
+received, set with the `streaming` attribute of a relative url in the
+template. The records selected by `records`, a JSONPath-style path into
+the body (see utils.jsonpath), are handed to the sink in batches of
+`batch_size` as they arrive, so memory is bound by the batch size
+instead of the size of the response.
+
+    scope:
+        kind: relativeurl
+        base: baseurl
+        relative: /subscriptions/{subscriptionId}/resources
+        streaming:
+            records: $.value[*]
+            batch_size: 500
+"""
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+from utils import jsonpath
+
+
+@dataclass(frozen=True)
+class Streaming:
+    """
+    Streaming settings of an endpoint
+    """
+    # Selector of the records of the body
+    records: str = '$[*]'
+    # Records handed to the sink at a time
+    batch_size: int = 1000
+    # Bytes read from the connection at a time
+    chunk_size: int = 64 * 1024
+
+    def __post_init__(self):
+        # Validates the selector early, raising a ValueError when invalid
+        jsonpath.compile_path(self.records)
+        if self.batch_size < 1 or self.chunk_size < 1:
+            raise ValueError("batch_size and chunk_size must be at least 1")
+
+    @classmethod
+    def from_template(cls, streaming: Optional[Mapping]) -> 'Streaming':
+        """Creates the settings from the `streaming` attribute of an endpoint template"""
+        return cls(**(streaming or {}))
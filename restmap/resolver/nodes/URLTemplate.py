@@ -0,0 +1,78 @@
+"""
+URL Template
+
+A url format string compiled once into its literal and field parts.
+Building a url joins the precompiled parts with the given values instead
+of parsing the format string on every call, which is the inner loop when
+generating URLs for millions of parameter values.
+"""
+import string
+from typing import Any, Iterable, List, Mapping, Optional
+
+
+class URLTemplate:
+    """
+    Compiled `prefix + template.format(**values)` builder.
+
+    Templates using only plain named fields, e.g. `/scope/{userId}`, are
+    built by concatenation. Templates with positional fields, conversions,
+    format specs or attribute access fall back to `str.format_map`.
+    """
+    __slots__ = ('prefix', 'template', 'fields', '_literals', '_simple')
+
+    def __init__(self, template: str, prefix: str = '') -> None:
+        self.prefix = prefix
+        self.template = template
+        literals = [prefix]
+        fields = []
+        simple = True
+        for literal, field, spec, conversion in string.Formatter().parse(template):
+            literals[-1] += literal
+            if field is None:
+                continue
+            if spec or conversion or not field.isidentifier():
+                simple = False
+            fields.append(field)
+            literals.append('')
+        self.fields = tuple(fields)
+        self._literals = tuple(literals)
+        self._simple = simple
+
+    def format(self, values: Mapping[str, Any]) -> str:
+        """Builds the url for a mapping of field name to value"""
+        literals = self._literals
+        if not self._simple:
+            return self.prefix + self.template.format_map(values)
+        if len(literals) == 1:
+            return literals[0]
+        if len(literals) == 2:
+            return literals[0] + str(values[self.fields[0]]) + literals[1]
+        parts = [literals[0]]
+        for field, literal in zip(self.fields, literals[1:]):
+            parts.append(str(values[field]))
+            parts.append(literal)
+        return ''.join(parts)
+
+    def format_many(self, values: Iterable[Mapping[str, Any]]) -> List[str]:
+        """Builds the urls for a sequence of value mappings in one call"""
+        build = self.format
+        return [build(mapping) for mapping in values]
+
+    def format_column(self, column: Iterable[Any], field: Optional[str] = None) -> List[str]:
+        """
+        Builds the urls for a column of values of a single field in one call.
+        @field: Field the values are used for, defaults to the only field of the template
+        """
+        field = field or self._single_field()
+        if not self._simple or self.fields != (field,):
+            return self.format_many({field: value} for value in column)
+        head, tail = self._literals
+        return [head + str(value) + tail for value in column]
+
+    def _single_field(self) -> str:
+        if len(set(self.fields)) != 1:
+            raise ValueError(f"'{self.template}' has the fields {self.fields}, select the field the column is used for")
+        return self.fields[0]
+
+    def __repr__(self) -> str:
+        return f"URLTemplate({self.prefix!r} + {self.template!r})"
@@ -0,0 +1,79 @@
+"""
+Watermark
+
+Ingests an endpoint incrementally, set with the `watermark` attribute of
+a relative url in the template. After each successful execution the
+high-watermark of the records fetched, like the latest modification
+timestamp, the highest id or the last cursor, is stored. The next
+execution sets it to the format field `param` of the url, to request
+only newer records.
+
+Modes
+----------------
+max:  The highest value at `value` of all records, e.g. timestamps or ids
+last: The last value at `value` of the records, e.g. a delta cursor
+
+    scope:
+        kind: relativeurl
+        base: baseurl
+        relative: /resources?$filter=changedTime gt '{since}'
+        watermark:
+            param: since
+            value: $.changedTime
+            records: $.value[*]
+            initial: '1970-01-01T00:00:00Z'
+"""
+from dataclasses import dataclass
+from typing import Any, Iterable, Mapping
+
+from utils import jsonpath
+
+MODES = ('max', 'last')
+
+
+@dataclass(frozen=True)
+class Watermark:
+    """
+    Watermark settings of an endpoint
+    """
+    # Format field of the relative url the watermark is set to
+    param: str
+    # Selector of the watermark value within each record
+    value: str
+    # Selector of the records of a response body, streamed responses provide their records
+    records: str = '$[*]'
+    mode: str = 'max'
+    # Set to the url before any watermark was stored
+    initial: Any = ''
+
+    def __post_init__(self):
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown watermark mode '{self.mode}', use one of {list(MODES)}")
+        jsonpath.compile_path(self.value)
+        jsonpath.compile_path(self.records)
+
+    def advance(self, current: Any, records: Iterable[Any]) -> Any:
+        """
+        Advances the watermark over the values of the records
+        @current: The watermark before the records, None if there is none yet
+        """
+        for record in records:
+            for value in jsonpath.iter_matches(record, self.value):
+                if value is None:
+                    continue
+                if self.mode == 'last' or current is None or _greater(value, current):
+                    current = value
+        return current
+
+    @classmethod
+    def from_template(cls, watermark: Mapping) -> 'Watermark':
+        """Creates the settings from the `watermark` attribute of an endpoint template"""
+        return cls(**watermark)
+
+
+def _greater(value: Any, current: Any) -> bool:
+    try:
+        return value > current
+    except TypeError:
+        # Mixed types, e.g. ids sent as numbers and strings
+        return str(value) > str(current)
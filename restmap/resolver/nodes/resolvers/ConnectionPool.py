@@ -0,0 +1,134 @@
+"""
+Connection Pool
+
+Pools DB-API connections per connection string, so all resolvers reading
+from the same database share their connections instead of connecting on
+every resolution.
+
+Connection strings are urls whose scheme selects the driver:
+
+Scheme      | Example                               | Requires
+----------- | ------------------------------------- | ---------
+sqlite      | sqlite:///relative.db, sqlite:////abs | standard library
+postgresql  | postgresql://user:pw@host:5432/db     | psycopg2
+
+Drivers also define how to open a server-side cursor, which streams the
+result set in chunks instead of transferring it at once. Further drivers
+can be added with `register_driver`.
+"""
+import queue
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, NamedTuple
+
+
+class Driver(NamedTuple):
+    """Connects to a database and opens cursors on its connections"""
+    connect: Callable[[str], Any]
+    cursor: Callable[[Any, int], Any]
+
+
+def _connect_sqlite(connectionstring: str):
+    import sqlite3
+    # Follows the sqlite:///relative and sqlite:////absolute path convention
+    path = connectionstring.partition('://')[2][1:] or ':memory:'
+    return sqlite3.connect(path, check_same_thread=False)
+
+def _connect_postgresql(connectionstring: str):
+    try:
+        import psycopg2
+    except ImportError:
+        raise ImportError("Reading from postgresql requires the psycopg2 package to be installed")
+    return psycopg2.connect(connectionstring)
+
+def _default_cursor(connection, chunk_size: int):
+    cursor = connection.cursor()
+    cursor.arraysize = chunk_size
+    return cursor
+
+def _postgresql_cursor(connection, chunk_size: int):
+    # Named cursors are declared on the server and fetched in chunks
+    cursor = connection.cursor(name=f"restmap_{uuid.uuid4().hex}")
+    cursor.itersize = chunk_size
+    cursor.arraysize = chunk_size
+    return cursor
+
+_drivers: Dict[str, Driver] = {
+    'sqlite': Driver(_connect_sqlite, _default_cursor),
+    'postgresql': Driver(_connect_postgresql, _postgresql_cursor),
+    'postgres': Driver(_connect_postgresql, _postgresql_cursor),
+}
+
+def register_driver(scheme: str, connect: Callable[[str], Any], cursor: Callable[[Any, int], Any] = _default_cursor):
+    """Registers the driver used for connection strings of the given scheme"""
+    _drivers[scheme] = Driver(connect, cursor)
+
+
+class ConnectionPool:
+    """
+    A bounded pool of connections to a single database
+    """
+    _pools: Dict[str, 'ConnectionPool'] = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, connectionstring: str, size: int = 4) -> None:
+        scheme, separator, _ = connectionstring.partition('://')
+        if not separator or scheme not in _drivers:
+            raise ValueError(f"No database driver registered for the connection string scheme '{scheme}'")
+        self._connectionstring = connectionstring
+        self._driver = _drivers[scheme]
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @classmethod
+    def for_connectionstring(cls, connectionstring: str, size: int = 4) -> 'ConnectionPool':
+        """Returns the pool shared by all users of the connection string"""
+        with cls._pools_lock:
+            if connectionstring not in cls._pools:
+                cls._pools[connectionstring] = cls(connectionstring, size)
+            return cls._pools[connectionstring]
+
+    @classmethod
+    def close_all(cls):
+        """Closes all pooled connections"""
+        with cls._pools_lock:
+            pools, cls._pools = cls._pools, {}
+        for pool in pools.values():
+            pool.close()
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """
+        Borrows a connection, waiting while all connections of the pool are in use.
+        The transaction of the borrower is rolled back before the connection is returned,
+        connections raising an error are discarded instead of returned to the pool.
+        """
+        self._slots.acquire()
+        try:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = self._driver.connect(self._connectionstring)
+            try:
+                yield connection
+                # Reads open a transaction, e.g. the one of a named cursor, idle connections must not hold it
+                connection.rollback()
+            except BaseException:
+                connection.close()
+                raise
+            self._idle.put(connection)
+        finally:
+            self._slots.release()
+
+    def cursor(self, connection, chunk_size: int):
+        """Opens a cursor streaming results in chunks of `chunk_size` rows"""
+        return self._driver.cursor(connection, chunk_size)
+
+    def close(self):
+        """Closes all idle connections"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
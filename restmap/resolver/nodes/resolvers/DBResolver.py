@@ -1,28 +1,95 @@
 """
+Database Resolver
 
+Streams the values of the configured table columns from a database.
+Only the projected columns are read, through a server-side cursor where
+the driver supports one, in chunks of `chunk_size` rows. Connections are
+pooled per connection string and shared by all resolvers reading from
+the same database, see ConnectionPool.
 """
+import re
 from dataclasses import dataclass
+from typing import Iterator, List, Tuple
 from restmap.templateParser.TemplateParser import TemplateSchema
 from .ResolverNode import ResolverNode
+from .ConnectionPool import ConnectionPool
+
+# Plain, optionally schema qualified, SQL identifiers
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_$]*$')
 
 @dataclass
 class _DBResolverBase:
+    __slots__ = ()
     connectionstring: str
-    table: str
+    # Mapping of the table `name` to the list of columns `col` to read
+    table: dict
 
 @dataclass
 class _DBResolverDefaults:
-    pass
+    __slots__ = ()
+    chunk_size: int = 10000
+    pool_size: int = 4
 
 @dataclass
 class DBResolver(_DBResolverDefaults, ResolverNode, _DBResolverBase):
     """
     Resolves data from a connection to a database.
     """
-    #TODO: Ensure multiple consumers can read thee same data from the generator 
-     
-    def resolve(self, provider):
+    __slots__ = ('connectionstring', 'table', 'chunk_size', 'pool_size')
+    _interned = ResolverNode._interned + ('connectionstring',)
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """Columns projected from the table"""
+        return tuple(self.table['col'])
+
+    @property
+    def query(self) -> str:
+        """Select statement reading the projected columns of the table"""
+        if not self.columns:
+            raise ValueError(f"Resolver '{self.name}' must select at least one column of table '{self.table['name']}'")
+        columns = ', '.join(self._quote(column) for column in self.columns)
+        return f"SELECT {columns} FROM {self._quote(self.table['name'])}"
+
+    def resolve(self, provider=None) -> Iterator:
         """
+        Lazily yields the rows of the table. Rows of a single column
+        projection are yielded as plain values, others as tuples.
         """
-        yield 
-        
\ No newline at end of file
+        single = len(self.columns) == 1
+        for chunk in self.iter_chunks():
+            if single:
+                for row in chunk:
+                    yield row[0]
+            else:
+                yield from chunk
+
+    def iter_chunks(self) -> Iterator[List[tuple]]:
+        """
+        Lazily yields the rows of the table in lists of at most `chunk_size` tuples.
+        The pooled connection is held until the iterator is exhausted or closed.
+        """
+        if self.chunk_size < 1:
+            raise ValueError(f"Resolver '{self.name}' must read chunks of at least one row, got chunk_size {self.chunk_size}")
+        query = self.query
+        pool = ConnectionPool.for_connectionstring(self.connectionstring, self.pool_size)
+        with pool.connection() as connection:
+            cursor = pool.cursor(connection, self.chunk_size)
+            try:
+                cursor.execute(query)
+                while True:
+                    chunk = cursor.fetchmany(self.chunk_size)
+                    if not chunk:
+                        return
+                    yield chunk
+            finally:
+                cursor.close()
+
+    @staticmethod
+    def _quote(identifier: str) -> str:
+        """Quotes a, optionally schema qualified, identifier to be used in a query"""
+        parts = identifier.split('.')
+        for part in parts:
+            if not _IDENTIFIER.match(part):
+                raise ValueError(f"'{identifier}' is not a valid table or column name")
+        return '.'.join(f'"{part}"' for part in parts)
@@ -5,11 +5,12 @@ from ..EndpointNode import EndpointNode
 
 @dataclass
 class _EndpointResolverBase:
+    __slots__ = ()
     endpoint: EndpointNode
 
 @dataclass
 class _EndpointResolverDefault:
-    pass
+    __slots__ = ()
 
 @dataclass
 class EndpointResolver(_EndpointResolverDefault, ResolverNode, _EndpointResolverBase):
@@ -18,6 +19,9 @@ class EndpointResolver(_EndpointResolverDefault, ResolverNode, _EndpointResolver
     dynamically and provides the resolved 
     value to the attributed functions.
     """
+    __slots__ = ('endpoint',)
+    # Reads the records fetched from the endpoint by the running execution
+    cacheable = False
 
     def resolve(self, provider):
         """
@@ -0,0 +1,158 @@
+"""
+Resolver Cache
+
+Memoizes the output of resolvers, so lookup lists resolved by several
+params and endpoints in a run, or by consecutive scheduled runs, are
+only fetched once per time to live.
+
+Entries are keyed by the resolver name and a digest of its inputs, and
+expire after the `ttl` of the resolver, or the default ttl of the cache.
+The in-memory tier holds at most `maxsize` entries and evicts the least
+recently used one. An optional on-disk tier keeps entries across runs,
+it holds pickled values and must only point to a trusted location.
+
+Only resolvers reading external sources are cached. EndpointResolvers
+read the records their endpoint returned in the same run, which the
+cache has no way to invalidate, and are rejected.
+"""
+import hashlib
+import json
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple, Union
+
+from utils import io as ioutils
+
+
+class ResolverCache:
+    """
+    Time to live and size bounded cache of resolver outputs
+    """
+
+    def __init__(self,
+        maxsize: int = 128,
+        default_ttl: float = 300.0,
+        directory: Optional[Union[str, Path]] = None,
+        clock: Callable[[], float] = time.time,
+        ) -> None:
+        """
+        @maxsize: Maximum number of entries held in memory
+        @default_ttl: Seconds entries are valid for resolvers without a ttl
+        @directory: Folder of the on-disk tier, disabled if None
+        @clock: Returns the current time in seconds, wall clock time to be valid across runs
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._directory = ioutils.ensure_path(directory) if directory is not None else None
+        self._clock = clock
+        self._lock = threading.Lock()
+        # Maps key to (expires at, values), least recently used first
+        self._entries: 'OrderedDict[str, Tuple[float, tuple]]' = OrderedDict()
+
+    # PUBLIC API______________
+    def resolve(self, resolver, provider) -> Iterator:
+        """
+        Lazily yields the output of the resolver, from the cache if a valid
+        entry exists. Otherwise the resolver is executed and its output is
+        stored once it was read completely.
+        raises: ValueError for resolvers whose output must not be cached, see ResolverNode.cacheable
+        """
+        if not resolver.cacheable:
+            raise ValueError(f"Resolver '{resolver.name}' reads the records of its run and cannot be cached")
+        ttl = self.default_ttl if resolver.ttl is None else resolver.ttl
+        if ttl <= 0:
+            return iter(resolver.resolve(provider))
+        key = self.key(resolver.name, resolver.cache_inputs())
+        values = self.get(key)
+        if values is not None:
+            return iter(values)
+        return self._record(key, resolver.resolve(provider), ttl)
+
+    def key(self, name: str, inputs: Any = None) -> str:
+        """Computes the cache key for the name of a resolver and its inputs"""
+        canonical = json.dumps([name, inputs], sort_keys=True, default=str)
+        return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[tuple]:
+        """
+        Retrieves the cached values of a key
+        return: The tuple of values or None if not cached or expired
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                del self._entries[key]
+        entry = self._read(key)
+        if entry is None or entry[0] <= now:
+            return None
+        self._remember(key, entry)
+        return entry[1]
+
+    def put(self, key: str, values: Iterable, ttl: Optional[float] = None) -> None:
+        """Stores the values of a key for `ttl` seconds"""
+        ttl = self.default_ttl if ttl is None else ttl
+        entry = (self._clock() + ttl, tuple(values))
+        self._remember(key, entry)
+        self._write(key, entry)
+
+    def invalidate(self, key: str) -> None:
+        """Removes the entry of a key from all tiers"""
+        with self._lock:
+            self._entries.pop(key, None)
+        if self._directory is not None:
+            (self._directory / f"{key}.pickle").unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Removes all entries from all tiers"""
+        with self._lock:
+            self._entries.clear()
+        if self._directory is not None:
+            for path in self._directory.glob('*.pickle'):
+                path.unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # INTERNAL API_______________
+    def _record(self, key: str, source: Iterable, ttl: float) -> Iterator:
+        """Passes the values through and caches them when the source is exhausted"""
+        values = []
+        for value in source:
+            values.append(value)
+            yield value
+        self.put(key, values, ttl)
+
+    def _remember(self, key: str, entry: Tuple[float, tuple]) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _read(self, key: str) -> Optional[Tuple[float, tuple]]:
+        if self._directory is None:
+            return None
+        try:
+            with open(self._directory / f"{key}.pickle", 'rb') as file:
+                return pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Corrupted or incompatible entries are resolved again
+            return None
+
+    def _write(self, key: str, entry: Tuple[float, tuple]) -> None:
+        """Writes the entry to a temporary file first, so concurrent readers never see partial entries"""
+        if self._directory is None:
+            return
+        with ioutils.atomic_write(self._directory / f"{key}.pickle") as file:
+            pickle.dump(entry, file, protocol=pickle.HIGHEST_PROTOCOL)
@@ -1,30 +1,77 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+from typing import Iterator, Optional
 from restmap.templateParser.TemplateParser import TemplateSchema
 from restmap.resolver.nodes.BaseNode import BaseNode
+from restmap.resolver.nodes.resolvers.SharedStream import SharedStream
 
 @dataclass
 class _ResolverNodeBase:
+    __slots__ = ()
     kind: str
     authentication: dict
 
 @dataclass
 class _ResolverNodeDefaults:
-    pass
+    __slots__ = ()
+    # Seconds the output stays valid in a ResolverCache, the cache default if None
+    ttl: Optional[float] = None
 
 @dataclass
 class ResolverNode(_ResolverNodeDefaults, BaseNode, _ResolverNodeBase):
     """
     A resolver that provides an single or iterable
     value for a given parameter value in other services.
+
+    The output of a single resolution can be shared by all dependent
+    nodes through `share` and `subscribe`, and memoized across
+    resolutions and runs through a ResolverCache.
     """
+    # _stream holds the running shared resolution and is not a dataclass field
+    __slots__ = ('kind', 'authentication', 'ttl', '_stream')
+    # Fields that do not change the output of the resolver
+    _uncached = ('name', 'descr', 'ttl')
+    _interned = BaseNode._interned + ('kind',)
+    # Whether the output can be served from a ResolverCache across resolutions and runs
+    cacheable = True
+
     def authenticate(self):
         """
         Authenticates to the target service
         """
         raise NotImplementedError
     
-    def resolve(self):
+    def resolve(self, provider):
         """
         Resolves the parameter from the associated 
         """
+        raise NotImplementedError
+
+    def cache_inputs(self) -> dict:
+        """Inputs determining the output of the resolver, used to key cached outputs"""
+        return {
+            field.name: getattr(self, field.name)
+            for field in fields(self) if field.name not in self._uncached
+        }
+
+    def share(self, provider, consumers: int = 1, cache=None, **options) -> SharedStream:
+        """
+        Starts a single resolution whose output is broadcast to `consumers` 
+        subscribers, e.g. the number of params depending on the resolver.
+        @cache: ResolverCache to serve the output from, or store it in, unused if not cacheable
+        @options: Buffering options passed to the SharedStream
+        """
+        source = cache.resolve(self, provider) if cache is not None and self.cacheable else self.resolve(provider)
+        self._stream = SharedStream(source, consumers=consumers, **options)
+        return self._stream
+
+    def subscribe(self, provider, cache=None) -> Iterator:
+        """
+        Reads the output of the shared resolution. Starts a new resolution
+        for a single consumer if none is running.
+        @cache: ResolverCache used when starting a new resolution
+        """
+        stream = getattr(self, '_stream', None)
+        if stream is None or stream.finished:
+            stream = self.share(provider, cache=cache)
+        return stream.subscribe()
          
\ No newline at end of file
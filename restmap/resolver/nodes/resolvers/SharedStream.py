@@ -0,0 +1,256 @@
+"""
+Shared Stream
+
+Broadcasts the output of a single resolver execution to any number of
+consumers, e.g. all ParamNodes referencing the same resolver, instead of
+executing the resolver once per consumer.
+
+Items are kept in a bounded buffer until every consumer has read them.
+When the fastest consumer runs a full buffer ahead of the slowest one it
+either waits for the slow consumer to catch up (backpressure), or, with
+spilling enabled, moves the oldest buffered items to a temporary file the
+slow consumers read them back from.
+"""
+import pickle
+import tempfile
+import threading
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+
+# Marks the end of the stream for a consumer
+_END = object()
+
+
+class SharedStream:
+    """
+    A tee with a shared, bounded buffer. Consumers may read from different threads.
+    """
+
+    def __init__(self,
+        source: Iterable,
+        consumers: int = 1,
+        buffer_size: int = 1024,
+        spill: bool = False,
+        spill_dir: Optional[Union[str, Path]] = None,
+        ) -> None:
+        """
+        @source: Iterable to read exactly once
+        @consumers: Number of consumers expected to subscribe. Items are retained
+                    until all of them subscribed and read them.
+        @buffer_size: Maximum number of items held in memory
+        @spill: Move items to disk instead of blocking fast consumers when the buffer is full
+        @spill_dir: Folder for the spill file, defaults to the system temp folder
+        """
+        if buffer_size < 1:
+            raise ValueError("buffer_size must be at least 1")
+        self._source = iter(source)
+        self._expected = consumers
+        self._buffer_size = buffer_size
+        self._spill = spill
+        self._spill_dir = spill_dir
+        self._cond = threading.Condition()
+        self._buffer = deque()
+        # Index of the first item held in the buffer
+        self._head = 0
+        # Items [_disk_start, _head) are spilled to disk at the recorded offsets
+        self._disk_start = 0
+        self._offsets = array('q')
+        self._spill_file = None
+        self._positions: Dict[int, int] = {}
+        self._threads: Dict[int, int] = {}
+        self._subscribed = 0
+        self._discarded = False
+        self._pulling = False
+        self._exhausted = False
+        self._error: Optional[BaseException] = None
+
+    # PUBLIC API______________
+    def subscribe(self) -> Iterator:
+        """
+        Registers a consumer reading the stream from its first item.
+        Raises if items were already released after all expected consumers read them.
+        """
+        with self._cond:
+            if self._discarded:
+                raise RuntimeError("Items of the stream were already released. Subscribe all consumers before reading.")
+            consumer = self._subscribed
+            self._subscribed += 1
+            self._positions[consumer] = 0
+            self._threads[consumer] = threading.get_ident()
+        return _Subscription(self, consumer)
+
+    @property
+    def finished(self) -> bool:
+        """True once all expected consumers subscribed and stopped reading"""
+        with self._cond:
+            return self._subscribed >= self._expected and not self._positions
+
+    @property
+    def spilled(self) -> int:
+        """Number of items currently held on disk"""
+        return len(self._offsets)
+
+    def close(self):
+        """Releases the spill file and closes the source"""
+        with self._cond:
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
+            close = getattr(self._source, 'close', None)
+            if close is not None and not self._pulling:
+                close()
+
+    # INTERNAL API_______________
+    def _leave(self, consumer: int):
+        """Unregisters a consumer, releasing the items only it had left to read"""
+        with self._cond:
+            self._positions.pop(consumer, None)
+            self._threads.pop(consumer, None)
+            self._trim()
+            self._cond.notify_all()
+        if self.finished:
+            self.close()
+
+    def _next(self, consumer: int) -> Any:
+        with self._cond:
+            self._threads[consumer] = threading.get_ident()
+            while True:
+                position = self._positions[consumer]
+                if position < self._head:
+                    item = self._read_spilled(position)
+                elif position < self._head + len(self._buffer):
+                    item = self._buffer[position - self._head]
+                elif self._error is not None:
+                    raise self._error
+                elif self._exhausted:
+                    return _END
+                elif self._pulling:
+                    self._cond.wait()
+                    continue
+                elif len(self._buffer) >= self._buffer_size and not self._make_room(consumer):
+                    self._cond.wait()
+                    continue
+                else:
+                    self._pull()
+                    continue
+                self._positions[consumer] = position + 1
+                self._trim()
+                self._cond.notify_all()
+                return item
+
+    def _pull(self):
+        """Reads the next item from the source without holding the lock"""
+        self._pulling = True
+        self._cond.release()
+        try:
+            item = next(self._source, _END)
+            error = None
+        except BaseException as e:
+            item, error = _END, e
+        finally:
+            self._cond.acquire()
+            self._pulling = False
+        if error is not None:
+            self._error = error
+        elif item is _END:
+            self._exhausted = True
+        else:
+            self._buffer.append(item)
+        self._cond.notify_all()
+
+    def _min_position(self) -> int:
+        # Consumers that did not subscribe yet will start from the first item
+        if self._subscribed < self._expected:
+            return 0
+        return min(self._positions.values(), default=self._head + len(self._buffer))
+
+    def _trim(self):
+        """Releases the items all consumers have read"""
+        position = self._min_position()
+        if self._offsets and position >= self._head:
+            # All consumers left the spilled region
+            self._offsets = array('q')
+            self._spill_file.seek(0)
+            self._spill_file.truncate()
+        while self._head < position and self._buffer:
+            self._buffer.popleft()
+            self._head += 1
+            self._discarded = True
+        if not self._offsets:
+            self._disk_start = self._head
+
+    def _make_room(self, consumer: int) -> bool:
+        """
+        Frees a buffer slot for the given consumer to read ahead.
+        return: False if the consumer has to wait for slower consumers
+        """
+        self._trim()
+        if len(self._buffer) < self._buffer_size:
+            return True
+        if self._spill:
+            self._spill_oldest()
+            return True
+        slowest = min(self._positions, key=self._positions.get, default=None)
+        if (slowest is not None and self._positions[slowest] < self._positions[consumer]
+            and self._threads.get(slowest) == threading.get_ident()):
+            raise RuntimeError(
+                "The buffer is full and the slowest consumer is read from the same thread. "
+                "Read consumers from separate threads, increase buffer_size or enable spilling."
+            )
+        return False
+
+    def _spill_oldest(self):
+        """Moves the oldest half of the buffer to disk"""
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(dir=self._spill_dir)
+        file = self._spill_file
+        file.seek(0, 2)
+        for _ in range(max(1, len(self._buffer) // 2)):
+            self._offsets.append(file.tell())
+            pickle.dump(self._buffer.popleft(), file, protocol=pickle.HIGHEST_PROTOCOL)
+            self._head += 1
+
+    def _read_spilled(self, position: int) -> Any:
+        file = self._spill_file
+        file.seek(self._offsets[position - self._disk_start])
+        return pickle.load(file)
+
+
+class _Subscription:
+    """
+    Reads the stream for a single consumer. The consumer leaves the stream once it
+    is exhausted or closed, also when closed before reading, unlike a generator.
+    """
+    __slots__ = ('_stream', '_consumer', '_closed')
+
+    def __init__(self, stream: SharedStream, consumer: int) -> None:
+        self._stream = stream
+        self._consumer = consumer
+        self._closed = False
+
+    def __iter__(self) -> '_Subscription':
+        return self
+
+    def __next__(self) -> Any:
+        if self._closed:
+            raise StopIteration
+        try:
+            item = self._stream._next(self._consumer)
+        except BaseException:
+            self.close()
+            raise
+        if item is _END:
+            self.close()
+            raise StopIteration
+        return item
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._stream._leave(self._consumer)
+
+    def __del__(self):
+        # Abandoned consumers must not hold back the others
+        self.close()
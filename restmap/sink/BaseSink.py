@@ -0,0 +1,45 @@
+"""
+The BaseSink defines the interface executors hand the
+responses of the executed endpoints to. Sinks implement
+where and in which format the ingested data is stored.
+"""
+from abc import ABC, abstractmethod
+
+
+class BaseSink(ABC):
+    """
+    Receives the responses of an execution
+    """
+
+    def prepare(self, endpoint: str) -> None:
+        """
+        Receives the name of an endpoint before its responses are written, called off
+        the event loop so sinks can read what they need for it without blocking writes
+        """
+
+    @abstractmethod
+    def write(self, response) -> None:
+        """
+        Receives a single successful response. Called from the event loop
+        of the executor, sinks must buffer instead of blocking on IO.
+        """
+
+    def full(self) -> bool:
+        """Whether the sink buffers as much as it may, executors call `wait` before further writes"""
+        return False
+
+    def wait(self) -> None:
+        """Blocks until the sink can buffer further responses, called off the event loop"""
+
+    def reuse(self, endpoint: str) -> None:
+        """
+        Receives the name of an endpoint whose records persisted by an earlier run are still
+        current but are not written again, like skipped partitions or unmodified responses
+        """
+
+    def flush(self) -> None:
+        """Persists all buffered responses, called at the end of an execution"""
+
+    def close(self) -> None:
+        """Flushes and releases the resources held by the sink"""
+        self.flush()
@@ -0,0 +1,32 @@
+"""
+The BaseStore defines the object storage interface sinks and
+executors persist files through. Keys are '/' separated paths,
+stores map them onto a bucket or a local folder.
+"""
+from abc import ABC, abstractmethod
+from typing import Iterator
+
+
+class BaseStore(ABC):
+    """
+    Stores objects of bytes by key
+    """
+
+    @abstractmethod
+    def put(self, key: str, data: bytes) -> None:
+        """Writes the object, replacing an existing object of the same key"""
+
+    @abstractmethod
+    def get(self, key: str) -> bytes:
+        """
+        Reads an object
+        raises: KeyError if no object of the key exists
+        """
+
+    @abstractmethod
+    def list(self, prefix: str = '') -> Iterator[str]:
+        """Yields the keys of all objects starting with the prefix"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Removes an object, ignoring missing keys"""
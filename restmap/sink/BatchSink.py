@@ -0,0 +1,206 @@
+"""
+Batch Sink
+
+Buffers the records of the responses and writes them to a store in
+batches, instead of one object per response. A batch is written once it
+holds `max_records` records or `max_bytes` bytes, or once its first
+record is older than `max_age` seconds.
+
+Objects are partitioned by endpoint and ingestion date (UTC), in the
+key=value folder layout query engines read partitions from:
+
+    {prefix}endpoint=users/date=2022-11-20/part-{run}-00001.ndjson.gz
+
+Formats
+----------------
+ndjson:  One JSON record per line, gzip compressed unless compression is None
+parquet: Columnar, requires pyarrow, compressed with the given parquet codec
+"""
+import gzip
+import io
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from restmap.sink.BaseSink import BaseSink
+from restmap.sink.BaseStore import BaseStore
+
+FORMATS = ('ndjson', 'parquet')
+
+
+class _Batch:
+    """Encoded records of a partition waiting to be written"""
+    __slots__ = ('lines', 'records', 'size', 'opened')
+
+    def __init__(self, opened: float) -> None:
+        self.lines: List[bytes] = []
+        self.records = 0
+        self.size = 0
+        self.opened = opened
+
+
+class BatchSink(BaseSink):
+    """
+    Writes the records of the responses in batches, partitioned by endpoint and date
+    """
+
+    def __init__(self,
+        store: BaseStore,
+        format: str = 'ndjson',
+        compression: Optional[str] = 'gzip',
+        max_records: int = 100000,
+        max_bytes: int = 64 * 2**20,
+        max_age: float = 300.0,
+        prefix: str = '',
+        max_pending: int = 4,
+        clock: Callable[[], float] = time.time,
+        ) -> None:
+        """
+        @store: Receives the written objects, a LocalStore or S3Store
+        @compression: gzip or None for ndjson, a parquet codec like snappy or zstd for parquet
+        @max_records, max_bytes: Bounds of a batch, bytes of the uncompressed records
+        @max_age: Seconds after which the batch of a partition is written, checked on write
+        @prefix: Prepended to all object keys
+        @max_pending: Batches compressed and written in the background. Writes never wait,
+                      the sink is full while as many are pending and executors wait for it.
+        """
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format '{format}', use one of {list(FORMATS)}")
+        if format == 'ndjson' and compression not in (None, 'gzip'):
+            raise ValueError(f"Unsupported ndjson compression '{compression}', use gzip or None")
+        if format == 'parquet':
+            _import_pyarrow()
+        if max_records < 1 or max_bytes < 1 or max_pending < 1:
+            raise ValueError("max_records, max_bytes and max_pending must be at least 1")
+        self.store = store
+        self.format = format
+        self.compression = compression
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.prefix = prefix
+        self.max_pending = max_pending
+        self.clock = clock
+        # Distinguishes the objects of different runs writing to the same partition
+        self.run = uuid.uuid4().hex[:12]
+        # Number of objects, records and stored bytes written
+        self.objects = 0
+        self.records = 0
+        self.bytes = 0
+        self._batches: Dict[Tuple[str, str], _Batch] = {}
+        self._pending: List[Future] = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=max_pending, thread_name_prefix='BatchSink')
+
+    def write(self, response) -> None:
+        """
+        Buffers the records of a response: the batch of a streamed response,
+        or the items of a JSON array body, any other body is a single record.
+        """
+        records = response.records if response.records is not None else response.json()
+        if not isinstance(records, list):
+            records = [records]
+        now = self.clock()
+        partition = (response.endpoint, datetime.fromtimestamp(now, timezone.utc).date().isoformat())
+        with self._lock:
+            for record in records:
+                batch = self._batches.get(partition)
+                if batch is None:
+                    batch = self._batches[partition] = _Batch(now)
+                line = json.dumps(record, separators=(',', ':'), ensure_ascii=False, default=str).encode() + b'\n'
+                batch.lines.append(line)
+                batch.records += 1
+                batch.size += len(line)
+                if batch.records >= self.max_records or batch.size >= self.max_bytes:
+                    self._seal(partition)
+            for partition, batch in list(self._batches.items()):
+                if now - batch.opened >= self.max_age:
+                    self._seal(partition)
+        # Raises the errors of written batches without waiting for the others
+        self._collect()
+
+    def full(self) -> bool:
+        return sum(not future.done() for future in self._pending) >= self.max_pending
+
+    def wait(self) -> None:
+        self._wait(self.max_pending - 1)
+
+    def flush(self) -> None:
+        """Writes all buffered batches and waits until they are stored"""
+        with self._lock:
+            for partition in list(self._batches):
+                self._seal(partition)
+        self._wait(0)
+
+    def close(self) -> None:
+        try:
+            self.flush()
+        finally:
+            self._writer.shutdown()
+
+    # INTERNAL API_______________
+    def _seal(self, partition: Tuple[str, str]):
+        """Hands the batch of a partition to the writer threads, the lock must be held"""
+        batch = self._batches.pop(partition)
+        self._sequence += 1
+        endpoint, date = partition
+        key = f"{self.prefix}endpoint={endpoint}/date={date}/part-{self.run}-{self._sequence:05d}{self._extension()}"
+        self._pending.append(self._writer.submit(self._store, key, batch.lines, batch.records))
+
+    def _store(self, key: str, lines: List[bytes], records: int):
+        data = self._encode(b''.join(lines))
+        self.store.put(key, data)
+        with self._lock:
+            self.objects += 1
+            self.records += records
+            self.bytes += len(data)
+
+    def _encode(self, data: bytes) -> bytes:
+        if self.format == 'parquet':
+            pyarrow = _import_pyarrow()
+            table = pyarrow.json.read_json(io.BytesIO(data))
+            buffer = io.BytesIO()
+            pyarrow.parquet.write_table(table, buffer, compression=self.compression or 'none')
+            return buffer.getvalue()
+        if self.compression == 'gzip':
+            # A fixed mtime keeps objects of the same records identical
+            return gzip.compress(data, compresslevel=6, mtime=0)
+        return data
+
+    def _extension(self) -> str:
+        if self.format == 'parquet':
+            return '.parquet'
+        return '.ndjson.gz' if self.compression == 'gzip' else '.ndjson'
+
+    def _collect(self):
+        """Drops the written batches, raising their errors"""
+        with self._lock:
+            done = [future for future in self._pending if future.done()]
+            self._pending = [future for future in self._pending if not future.done()]
+        for future in done:
+            future.result()
+
+    def _wait(self, pending: int):
+        """Waits until at most `pending` batches are being written, raising the errors of written ones"""
+        self._collect()
+        while len(self._pending) > pending:
+            with self._lock:
+                writing = list(self._pending)
+            # Batches stay pending until written, so waiting threads never undercount them
+            wait(writing, return_when=FIRST_COMPLETED)
+            self._collect()
+
+
+def _import_pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.json
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Writing parquet requires the pyarrow package to be installed")
+    return pyarrow
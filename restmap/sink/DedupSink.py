@@ -0,0 +1,181 @@
+"""
+Dedup Sink
+
+Drops the records an endpoint returned unchanged since the previous run,
+before they reach the wrapped sink. Full refresh endpoints return mostly
+the same records on every run; only new or changed records are written,
+so storage and downstream processing scale with the volume of changes.
+
+Each record is hashed, by its content or by the given fields of each
+endpoint, and looked up in the hashes of the previous run. The hashes of
+all records received are stored per endpoint for the next run on `close`,
+once the wrapped sink flushed, so a failed write never suppresses records
+that were not persisted. Records are the items of JSON array bodies or
+the whole body, as written by the BatchSink.
+
+The stored hashes of an endpoint are replaced, unless records of the
+endpoint were reused instead of received, by skipped partitions of a
+resumed run or unmodified responses. Their hashes are then added to the
+stored ones, which are replaced again by the next complete run. Members
+of a bloom filter cannot be listed, the added hashes are kept in a
+further filter sized for them, see BloomFilters.
+
+The stored hashes of each endpoint are read by `prepare`, which executors
+call in a worker thread, or otherwise by its first write.
+
+Methods
+----------------
+sorted: Exact, a sorted hash file of 8 bytes per record, see SortedHashes
+bloom:  BloomFilters of about 2 bytes per record, which drops new or changed
+        records as unchanged at its false positive rate
+"""
+import hashlib
+import json
+import threading
+from array import array
+from dataclasses import replace
+from typing import Dict, List, Optional, Set
+
+from restmap.sink.BaseSink import BaseSink
+from restmap.sink.BaseStore import BaseStore
+from restmap.sink.HashSet import BloomFilter, BloomFilters, HashSet, SortedHashes
+from utils import jsonpath
+
+METHODS = {'sorted': SortedHashes, 'bloom': BloomFilters}
+
+
+class DedupSink(BaseSink):
+    """
+    Writes only the records that are new or changed since the previous run to the wrapped sink
+    """
+
+    def __init__(self,
+        sink: BaseSink,
+        store: BaseStore,
+        method: str = 'sorted',
+        fields: Optional[Dict[str, List[str]]] = None,
+        error_rate: float = 0.001,
+        prefix: str = 'dedup/',
+        ) -> None:
+        """
+        @sink: Receives the new and changed records
+        @store: Keeps the hashes of each endpoint between runs, a LocalStore or S3Store
+        @fields: Maps endpoint names to the JSONPath selectors of the fields their records
+                 are compared by, e.g. leaving out timestamps of the request. Records of
+                 other endpoints are compared by their whole content.
+        @error_rate: False positive rate the bloom filters are sized for
+        @prefix: Prepended to the keys of the stored hashes
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown dedup method '{method}', use one of {list(METHODS)}")
+        if method == 'bloom' and not 0 < error_rate < 1:
+            raise ValueError(f"The error rate must be between 0 and 1, got {error_rate}")
+        self.sink = sink
+        self.store = store
+        self.method = method
+        self.fields = fields or {}
+        self.error_rate = error_rate
+        self.prefix = prefix
+        # Number of records written and dropped as unchanged
+        self.records = 0
+        self.duplicates = 0
+        self._previous: Dict[str, HashSet] = {}
+        self._received: Dict[str, array] = {}
+        self._reused: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def write(self, response) -> None:
+        records = response.records if response.records is not None else response.json()
+        if not isinstance(records, list):
+            records = [records]
+        endpoint = response.endpoint
+        changed = []
+        previous = self._load(endpoint)
+        with self._lock:
+            received = self._received.setdefault(endpoint, array('Q'))
+            for record in records:
+                value = self.hash(endpoint, record)
+                received.append(value)
+                if value not in previous:
+                    changed.append(record)
+            self.records += len(changed)
+            self.duplicates += len(records) - len(changed)
+        if changed:
+            self.sink.write(replace(response, body=b'', records=changed))
+
+    def prepare(self, endpoint: str) -> None:
+        self._load(endpoint)
+        self.sink.prepare(endpoint)
+
+    def full(self) -> bool:
+        return self.sink.full()
+
+    def wait(self) -> None:
+        self.sink.wait()
+
+    def reuse(self, endpoint: str) -> None:
+        with self._lock:
+            self._reused.add(endpoint)
+        self.sink.reuse(endpoint)
+
+    def flush(self) -> None:
+        self.sink.flush()
+
+    def close(self) -> None:
+        try:
+            self.sink.flush()
+            self.commit()
+        finally:
+            self.sink.close()
+
+    def commit(self) -> List[str]:
+        """
+        Stores the hashes of the records received by each endpoint for the next run,
+        replacing those of the previous run, or adding to them for endpoints with
+        reused records. Endpoints without records keep theirs.
+        return: Names of the endpoints whose hashes were stored
+        """
+        with self._lock:
+            received, self._received = self._received, {}
+            reused, self._reused = self._reused, set()
+        previous = {endpoint: self._load(endpoint) for endpoint in received if endpoint in reused}
+        with self._lock:
+            # Later runs of the same sink compare with the stored hashes
+            self._previous = {}
+        for endpoint, hashes in received.items():
+            kept = previous.get(endpoint)
+            if self.method == 'bloom':
+                # Members of the stored filters cannot be listed, the received hashes get a filter sized for them
+                filters = kept.filters if isinstance(kept, BloomFilters) else []
+                hash_set = BloomFilters(filters + [BloomFilter.of(hashes, self.error_rate)])
+            else:
+                if kept is not None:
+                    hashes.extend(kept.hashes)
+                hash_set = SortedHashes(hashes)
+            self.store.put(self.key(endpoint), hash_set.encode())
+        return list(received)
+
+    def key(self, endpoint: str) -> str:
+        """Key of the stored hashes of an endpoint"""
+        return f"{self.prefix}{endpoint}.{self.method}"
+
+    def hash(self, endpoint: str, record) -> int:
+        """The 64 bit hash of a record, by its content or by the fields of its endpoint"""
+        if endpoint in self.fields:
+            record = [jsonpath.find(record, field) for field in self.fields[endpoint]]
+        encoded = json.dumps(record, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str).encode()
+        return int.from_bytes(hashlib.blake2b(encoded, digest_size=8).digest(), 'little')
+
+    # INTERNAL API_______________
+    def _load(self, endpoint: str) -> HashSet:
+        """Reads the hashes of the previous run once per endpoint, without holding the lock while reading"""
+        with self._lock:
+            if endpoint in self._previous:
+                return self._previous[endpoint]
+        try:
+            hash_set = METHODS[self.method].decode(self.store.get(self.key(endpoint)))
+        except KeyError:
+            # The first run writes all records
+            hash_set = SortedHashes()
+        with self._lock:
+            return self._previous.setdefault(endpoint, hash_set)
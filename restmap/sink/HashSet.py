@@ -0,0 +1,149 @@
+"""
+Hash Sets
+
+Compact sets of the 64 bit record hashes the DedupSink keeps between
+runs, encoded to bytes to be stored as a single object.
+
+HashSet
+----------------
+SortedHashes: Exact, a sorted array of the hashes searched by bisection, 8 bytes per record
+BloomFilter:  Probabilistic, about 1.8 bytes per record at a 0.1% false positive rate.
+              A false positive drops a new or changed record as unchanged.
+BloomFilters: The union of bloom filters, each sized for the hashes added at once
+"""
+import math
+import struct
+import sys
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left
+from typing import Collection, Iterable, Iterator, List, Optional
+
+_HEADER = struct.Struct('<QQ')
+
+
+class HashSet(ABC):
+    """
+    A set of 64 bit hashes
+    """
+
+    @abstractmethod
+    def __contains__(self, value: int) -> bool:
+        """Whether the hash is a member of the set"""
+
+    @abstractmethod
+    def encode(self) -> bytes:
+        """Encodes the set to be stored"""
+
+
+class SortedHashes(HashSet):
+    """
+    Exact set of hashes, kept as a sorted array of unsigned 64 bit integers
+    """
+
+    def __init__(self, hashes: Iterable[int] = ()) -> None:
+        ordered = sorted(hashes)
+        # Drops repeated hashes, which are adjacent once sorted
+        self.hashes = array('Q', (value for index, value in enumerate(ordered) if index == 0 or value != ordered[index - 1]))
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'SortedHashes':
+        hashes = array('Q')
+        hashes.frombytes(data)
+        if sys.byteorder == 'big':
+            hashes.byteswap()
+        decoded = cls()
+        decoded.hashes = hashes
+        return decoded
+
+    def __contains__(self, value: int) -> bool:
+        index = bisect_left(self.hashes, value)
+        return index < len(self.hashes) and self.hashes[index] == value
+
+    def __len__(self) -> int:
+        return len(self.hashes)
+
+    def encode(self) -> bytes:
+        hashes = array('Q', self.hashes)
+        # Stored little endian on all platforms
+        if sys.byteorder == 'big':
+            hashes.byteswap()
+        return hashes.tobytes()
+
+
+class BloomFilter(HashSet):
+    """
+    Probabilistic set of hashes, members are never missed but other
+    hashes are reported as members with the false positive rate it was sized for
+    """
+
+    def __init__(self, bits: int, hashes: int, data: Optional[bytearray] = None) -> None:
+        """
+        @bits: Size of the filter
+        @hashes: Number of bits set per member
+        """
+        if bits < 1 or hashes < 1:
+            raise ValueError("A bloom filter needs at least one bit and one hash")
+        self.bits = bits
+        self.hashes = hashes
+        self.data = data if data is not None else bytearray((bits + 7) // 8)
+
+    @classmethod
+    def of(cls, values: Collection[int], error_rate: float = 0.001) -> 'BloomFilter':
+        """Creates a filter sized for the values at the given false positive rate"""
+        if not 0 < error_rate < 1:
+            raise ValueError(f"The error rate must be between 0 and 1, got {error_rate}")
+        count = max(len(values), 1)
+        bits = math.ceil(-count * math.log(error_rate) / math.log(2) ** 2)
+        bloom = cls(bits, max(1, round(bits / count * math.log(2))))
+        for value in values:
+            bloom.add(value)
+        return bloom
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'BloomFilter':
+        bits, hashes = _HEADER.unpack_from(data)
+        return cls(bits, hashes, bytearray(data[_HEADER.size:_HEADER.size + (bits + 7) // 8]))
+
+    def add(self, value: int):
+        for position in self._positions(value):
+            self.data[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: int) -> bool:
+        return all(self.data[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    def encode(self) -> bytes:
+        return _HEADER.pack(self.bits, self.hashes) + bytes(self.data)
+
+    def _positions(self, value: int) -> Iterator[int]:
+        # Double hashing derives all positions from the two halves of the hash
+        first, second = value & 0xFFFFFFFF, (value >> 32) | 1
+        for index in range(self.hashes):
+            yield (first + index * second) % self.bits
+
+
+class BloomFilters(HashSet):
+    """
+    Union of bloom filters. A filter cannot take more hashes than it was sized for
+    without raising its false positive rate, nor can its members be listed to size
+    a larger one, so hashes added later are kept in a further filter sized for them.
+    """
+
+    def __init__(self, filters: Iterable[BloomFilter] = ()) -> None:
+        self.filters: List[BloomFilter] = list(filters)
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'BloomFilters':
+        filters, offset = [], 0
+        # Filters are stored one after the other, a single filter is encoded as by BloomFilter
+        while offset < len(data):
+            bloom = BloomFilter.decode(data[offset:])
+            filters.append(bloom)
+            offset += _HEADER.size + len(bloom.data)
+        return cls(filters)
+
+    def __contains__(self, value: int) -> bool:
+        return any(value in bloom for bloom in self.filters)
+
+    def encode(self) -> bytes:
+        return b''.join(bloom.encode() for bloom in self.filters)
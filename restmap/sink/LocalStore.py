@@ -0,0 +1,52 @@
+"""
+Local Store
+
+Stores objects as files below a local folder, standing in for the
+bucket when running and testing pipelines locally. Key separators
+map onto sub folders.
+"""
+from pathlib import Path
+from typing import Iterator, Union
+
+from restmap.sink.BaseStore import BaseStore
+from utils import io as ioutils
+
+
+class LocalStore(BaseStore):
+    """
+    Stores objects in a local folder
+    """
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def put(self, key: str, data: bytes) -> None:
+        with ioutils.atomic_write(self.path(key)) as file:
+            file.write(data)
+
+    def get(self, key: str) -> bytes:
+        try:
+            return self.path(key).read_bytes()
+        except FileNotFoundError:
+            raise KeyError(f"Object '{key}' does not exist in {self.directory}")
+
+    def list(self, prefix: str = '') -> Iterator[str]:
+        for path in sorted(self.directory.rglob('*')):
+            if path.is_file() and not path.name.startswith('.'):
+                key = path.relative_to(self.directory).as_posix()
+                if key.startswith(prefix):
+                    yield key
+
+    def delete(self, key: str) -> None:
+        try:
+            self.path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def path(self, key: str) -> Path:
+        """The file of an object"""
+        parts = key.split('/')
+        if not key or any(part in ('', '.', '..') for part in parts):
+            raise ValueError(f"Invalid object key '{key}'")
+        return self.directory.joinpath(*parts)
@@ -0,0 +1,31 @@
+"""
+Memory Sink
+
+Keeps all responses in memory, to inspect executions in tests
+and when profiling pipelines locally.
+"""
+from collections import defaultdict
+from typing import Dict, List
+from restmap.sink.BaseSink import BaseSink
+
+
+class MemorySink(BaseSink):
+    """
+    Collects the responses of an execution in a list
+    """
+
+    def __init__(self) -> None:
+        self.responses = []
+
+    def write(self, response) -> None:
+        self.responses.append(response)
+
+    def by_endpoint(self) -> Dict[str, List]:
+        """Groups the collected responses by the name of their endpoint"""
+        grouped = defaultdict(list)
+        for response in self.responses:
+            grouped[response.endpoint].append(response)
+        return dict(grouped)
+
+    def __len__(self) -> int:
+        return len(self.responses)
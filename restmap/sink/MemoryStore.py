@@ -0,0 +1,39 @@
+"""
+Memory Store
+
+Keeps objects in memory, for tests and executions that do not need to
+persist their objects.
+"""
+import threading
+from typing import Dict, Iterator
+
+from restmap.sink.BaseStore import BaseStore
+
+
+class MemoryStore(BaseStore):
+    """
+    Stores objects in a dictionary
+    """
+
+    def __init__(self) -> None:
+        self.objects: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def put(self, key: str, data: bytes) -> None:
+        with self._lock:
+            self.objects[key] = bytes(data)
+
+    def get(self, key: str) -> bytes:
+        try:
+            return self.objects[key]
+        except KeyError:
+            raise KeyError(f"Object '{key}' does not exist")
+
+    def list(self, prefix: str = '') -> Iterator[str]:
+        with self._lock:
+            keys = sorted(key for key in self.objects if key.startswith(prefix))
+        yield from keys
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self.objects.pop(key, None)
@@ -0,0 +1,44 @@
+"""
+S3 Store
+
+Stores objects in an S3 bucket, e.g. the bucket deployed by the
+BucketProvider, through boto3.
+"""
+from typing import Iterator
+
+import boto3
+
+from restmap.sink.BaseStore import BaseStore
+
+
+class S3Store(BaseStore):
+    """
+    Stores objects in an S3 bucket below an optional key prefix
+    """
+
+    def __init__(self, bucket: str, prefix: str = '', client=None) -> None:
+        """
+        @prefix: Prepended to all keys, e.g. 'raw/'
+        @client: boto3 S3 client, created from the default session if None
+        """
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = client or boto3.client('s3')
+
+    def put(self, key: str, data: bytes) -> None:
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data)
+
+    def get(self, key: str) -> bytes:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)['Body'].read()
+        except self.client.exceptions.NoSuchKey:
+            raise KeyError(f"Object '{key}' does not exist in bucket {self.bucket}")
+
+    def list(self, prefix: str = '') -> Iterator[str]:
+        pages = self.client.get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=self.prefix + prefix)
+        for page in pages:
+            for item in page.get('Contents', ()):
+                yield item['Key'][len(self.prefix):]
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
@@ -0,0 +1,32 @@
+"""
+The BaseStateStore defines where the ingestion state is kept across
+executions, like the watermarks of incrementally ingested endpoints.
+Values are JSON serializable, keys are '/' separated names listed by folder.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Iterator
+
+
+class BaseStateStore(ABC):
+    """
+    Stores JSON serializable values by key
+    """
+
+    @abstractmethod
+    def get(self, key: str, default: Any = None) -> Any:
+        """Reads the value of a key, the default if it was never written"""
+
+    @abstractmethod
+    def put(self, key: str, value: Any) -> None:
+        """Writes the value of a key, replacing its previous value"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Removes a key, ignoring missing keys"""
+
+    @abstractmethod
+    def keys(self, prefix: str = '') -> Iterator[str]:
+        """
+        Yields the keys starting with the prefix within its folder, the part up to its last '/'.
+        Keys of folders below are not listed, so stores may partition the keys by folder.
+        """
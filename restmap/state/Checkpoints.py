@@ -0,0 +1,141 @@
+"""
+Checkpoints
+
+Tracks the completed param partitions of a run, to resume it after an
+interruption without requesting completed work again. The params of an
+endpoint are expanded in batches of `batch_size` combinations, each
+batch is a partition numbered by its position. A partition is completed
+once all of its requests succeeded.
+
+Completed partitions are saved to the state store at most every
+`interval` seconds, after the sink persisted their records. A resumed
+run with the same run id skips the partitions of the last saved
+checkpoint, provided they hold the same combinations: each partition is
+saved with a fingerprint of its params, guarding against resolvers
+producing their values in a different order.
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+from restmap.state.BaseStateStore import BaseStateStore
+
+
+class Checkpoints:
+    """
+    Completed param partitions of the endpoints of a run
+    """
+
+    def __init__(self,
+        store: BaseStateStore,
+        run_id: str,
+        batch_size: int,
+        interval: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+        ) -> None:
+        """
+        @run_id: Identifies the run across its invocations
+        @batch_size: Number of param combinations of a partition
+        @interval: Minimum seconds between two saves
+        """
+        self.store = store
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self.interval = interval
+        self.clock = clock
+        # Partitions saved by earlier invocations, and completed by this one
+        self._saved: Dict[str, Dict[str, str]] = {}
+        self._completed: Dict[str, Dict[str, str]] = {}
+        # Partitions in progress: fingerprint, requests remaining and whether one failed
+        self._running: Dict[Tuple[str, int], list] = {}
+        self._changed = False
+        self._saving = False
+        self._last_save = clock()
+        self._lock = threading.Lock()
+
+    def key(self, name: str) -> str:
+        """Key of the checkpoint of an endpoint in the state store"""
+        return f"checkpoint/{self.run_id}/{name}"
+
+    def load(self, endpoint) -> int:
+        """
+        Reads the saved checkpoint of an endpoint
+        return: Number of completed partitions
+        """
+        saved = self.store.get(self.key(endpoint.name))
+        # Partitions are only comparable for the same batch size
+        partitions = saved['partitions'] if saved and saved.get('batch_size') == self.batch_size else {}
+        with self._lock:
+            self._saved[endpoint.name] = partitions
+            self._completed[endpoint.name] = dict(partitions)
+        return len(partitions)
+
+    def start(self, endpoint, partition: int, params: List[dict]) -> bool:
+        """
+        Starts a partition of the endpoint
+        return: False if the partition was completed by an earlier invocation and is skipped
+        """
+        fingerprint = _fingerprint(params)
+        with self._lock:
+            if self._saved.get(endpoint.name, {}).get(str(partition)) == fingerprint:
+                return False
+            self._running[(endpoint.name, partition)] = [fingerprint, len(params), False]
+        return True
+
+    def finish(self, endpoint, partition: int, ok: bool):
+        """Finishes a single request of a partition"""
+        with self._lock:
+            running = self._running[(endpoint.name, partition)]
+            running[1] -= 1
+            running[2] = running[2] or not ok
+            if running[1] > 0:
+                return
+            del self._running[(endpoint.name, partition)]
+            if not running[2]:
+                self._completed.setdefault(endpoint.name, {})[str(partition)] = running[0]
+                self._changed = True
+
+    def due(self) -> bool:
+        """Whether completed partitions are waiting to be saved for longer than the interval"""
+        with self._lock:
+            if not self._changed or self._saving or self.clock() - self._last_save < self.interval:
+                return False
+            self._saving = True
+            return True
+
+    def save(self, flush: Callable[[], None]):
+        """
+        Saves the completed partitions
+        @flush: Persists the records of the completed partitions before they are saved
+        """
+        with self._lock:
+            completed = {name: dict(partitions) for name, partitions in self._completed.items()}
+            self._changed = False
+            self._saving = True
+        try:
+            flush()
+            for name, partitions in completed.items():
+                if partitions != self._saved.get(name):
+                    self.store.put(self.key(name), {'batch_size': self.batch_size, 'partitions': partitions})
+                    with self._lock:
+                        self._saved[name] = partitions
+        except BaseException:
+            with self._lock:
+                self._changed = True
+            raise
+        finally:
+            with self._lock:
+                self._saving = False
+                self._last_save = self.clock()
+
+    def clear(self):
+        """Removes the checkpoints of the run once it completed"""
+        for key in list(self.store.keys(f"checkpoint/{self.run_id}/")):
+            self.store.delete(key)
+
+
+def _fingerprint(params: List[dict]) -> str:
+    encoded = json.dumps(params, sort_keys=True, default=str, separators=(',', ':')).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
@@ -0,0 +1,45 @@
+"""
+DynamoDB State Store
+
+Keeps the ingestion state in the State table of the manager, through
+its DatabaseHandler. Keys are partitioned by their folder, `keys` lists
+the keys directly within the folder of its prefix by a query, without
+scanning the table.
+"""
+from typing import TYPE_CHECKING, Any, Iterator
+
+from enums import StatusCode
+from restmap.state.BaseStateStore import BaseStateStore
+
+if TYPE_CHECKING:
+    from manager.database import DatabaseHandler
+
+
+class DynamoStateStore(BaseStateStore):
+    """
+    Stores the ingestion state in DynamoDB
+    """
+
+    def __init__(self, handler: 'DatabaseHandler', prefix: str = '') -> None:
+        """
+        @handler: DatabaseHandler of the manager
+        @prefix: Prepended to all keys, to separate the state of different pipelines
+        """
+        self.handler = handler
+        self.prefix = prefix
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self.handler.read_state(self.prefix + key)
+        return default if value is None else value
+
+    def put(self, key: str, value: Any) -> None:
+        status = self.handler.write_state(self.prefix + key, value)
+        if status != StatusCode.SUCCESS:
+            raise IOError(f"Writing the state of '{key}' failed with {status.name}")
+
+    def delete(self, key: str) -> None:
+        self.handler.delete_state(self.prefix + key)
+
+    def keys(self, prefix: str = '') -> Iterator[str]:
+        for key in self.handler.read_state_keys(self.prefix + prefix):
+            yield key[len(self.prefix):]
@@ -0,0 +1,55 @@
+"""
+Local State Store
+
+Keeps the ingestion state in a local JSON file, standing in for the
+DynamoDB state table when running and testing pipelines locally. The
+state is kept in memory only if no file is given.
+"""
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+from restmap.state.BaseStateStore import BaseStateStore
+from utils import io as ioutils
+
+
+class LocalStateStore(BaseStateStore):
+    """
+    Stores the ingestion state in a JSON file
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None) -> None:
+        self.path = Path(path) if path is not None else None
+        self._lock = threading.Lock()
+        self._values: Dict[str, Any] = {}
+        if self.path is not None and self.path.exists():
+            self._values = json.loads(self.path.read_text())
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            return self._values.get(key, default)
+
+    def put(self, key: str, value: Any) -> None:
+        # Fails on values the DynamoDB store could not keep either
+        value = json.loads(json.dumps(value))
+        with self._lock:
+            self._values[key] = value
+            self._save()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if self._values.pop(key, None) is not None:
+                self._save()
+
+    def keys(self, prefix: str = '') -> Iterator[str]:
+        with self._lock:
+            keys = sorted(key for key in self._values if key.startswith(prefix) and '/' not in key[len(prefix):])
+        yield from keys
+
+    def _save(self):
+        """Rewrites the file atomically, the lock must be held"""
+        if self.path is None:
+            return
+        with ioutils.atomic_write(self.path, 'w') as file:
+            json.dump(self._values, file, indent=2, sort_keys=True)
@@ -0,0 +1,109 @@
+"""
+Response Cache
+
+Keeps the validators of responses, their ETag and Last-Modified headers,
+to send conditional requests with If-None-Match and If-Modified-Since.
+A 304 Not Modified answer means the records of the previous response
+are still current: they are neither parsed nor written to the sink again.
+Endpoints read by resolvers also keep the previous body, which is reused
+as their records.
+
+Entries are objects of a store, keyed by the hash of the url: a LocalStore
+in development, the bucket through an S3Store in production. Validators
+of new responses are only stored by `commit`, once the sink persisted
+their records, so an interrupted execution never skips unwritten records.
+"""
+import hashlib
+import json
+import threading
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Tuple
+
+from restmap.sink.BaseStore import BaseStore
+from restmap.sink.MemoryStore import MemoryStore
+
+NOT_MODIFIED = 304
+
+
+@dataclass
+class CachedResponse:
+    """
+    The validators of the previous response of a url
+    """
+    url: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # Whether the body of the response was kept
+    has_body: bool = False
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """The headers of a conditional request"""
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """
+    Validators and bodies of previous responses, by url
+    """
+
+    def __init__(self, store: Optional[BaseStore] = None, prefix: str = 'responses/') -> None:
+        """
+        @store: Keeps the entries, in memory if None
+        @prefix: Prepended to the keys of the entries
+        """
+        self.store = store if store is not None else MemoryStore()
+        self.prefix = prefix
+        self._staged: Dict[str, Tuple[CachedResponse, Optional[bytes]]] = {}
+        self._lock = threading.Lock()
+
+    def key(self, url: str) -> str:
+        """Key of the entry of a url, without extension"""
+        return self.prefix + hashlib.sha256(url.encode()).hexdigest()
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        """Reads the validators of the previous response of the url, None if there is none"""
+        try:
+            entry = json.loads(self.store.get(self.key(url) + '.json'))
+        except KeyError:
+            return None
+        # Guards against hash collisions
+        return CachedResponse(**entry) if entry['url'] == url else None
+
+    def body(self, entry: CachedResponse) -> bytes:
+        """Reads the kept body of the previous response"""
+        return self.store.get(self.key(entry.url) + '.body')
+
+    def stage(self, response, keep_body: bool = False) -> bool:
+        """
+        Stages the validators of a successful response to be stored by the next commit
+        @keep_body: Stores the body to reuse it on a 304 answer
+        return: Whether the response carried validators
+        """
+        etag, last_modified = response.header('ETag'), response.header('Last-Modified')
+        if etag is None and last_modified is None:
+            return False
+        entry = CachedResponse(url=response.url, etag=etag, last_modified=last_modified, has_body=keep_body)
+        with self._lock:
+            self._staged[response.url] = (entry, response.body if keep_body else None)
+        return True
+
+    def commit(self) -> int:
+        """
+        Stores the staged entries, after the records of their responses were persisted
+        return: Number of entries stored
+        """
+        with self._lock:
+            staged, self._staged = self._staged, {}
+        for url, (entry, body) in staged.items():
+            key = self.key(url)
+            # The body is written first, entries never refer to a missing body
+            if body is not None:
+                self.store.put(key + '.body', body)
+            self.store.put(key + '.json', json.dumps(asdict(entry)).encode())
+        return len(staged)
@@ -0,0 +1,69 @@
+"""
+Watermarks
+
+Tracks the watermarks of the endpoints of an execution. The stored
+watermark of each endpoint is read once at its start, advanced over the
+records of its successful responses, and written back by `commit` at
+the end of the execution, once the records were persisted by the sink.
+Endpoints with failed requests keep their previous watermark, as records
+newer than it might be missing.
+"""
+import threading
+from typing import Any, Dict, Iterable
+from urllib.parse import quote
+
+from restmap.state.BaseStateStore import BaseStateStore
+
+
+class Watermarks:
+    """
+    Watermarks of the endpoints of an execution, kept in a state store
+    """
+
+    def __init__(self, store: BaseStateStore) -> None:
+        self.store = store
+        self._stored: Dict[str, Any] = {}
+        self._advanced: Dict[str, Any] = {}
+        self._failed = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(name: str) -> str:
+        """Key of the watermark of an endpoint in the state store"""
+        return f"watermark/{name}"
+
+    def read(self, endpoint) -> Any:
+        """Reads the stored watermark of the endpoint, its initial value if none was stored"""
+        stored = self.store.get(self.key(endpoint.name))
+        with self._lock:
+            self._stored[endpoint.name] = stored
+        return endpoint.watermark.initial if stored is None else stored
+
+    def params(self, endpoint) -> dict:
+        """The format values setting the watermark to the url, quoted for use in a query"""
+        return {endpoint.watermark.param: quote(str(self.read(endpoint)), safe='')}
+
+    def observe(self, endpoint, records: Iterable[Any]):
+        """Advances the watermark of the endpoint over the records of a successful response"""
+        with self._lock:
+            current = self._advanced.get(endpoint.name, self._stored.get(endpoint.name))
+            self._advanced[endpoint.name] = endpoint.watermark.advance(current, records)
+
+    def fail(self, endpoint):
+        """Keeps the previous watermark of an endpoint with failed requests"""
+        with self._lock:
+            self._failed.add(endpoint.name)
+
+    def commit(self) -> Dict[str, Any]:
+        """
+        Stores the advanced watermarks of all endpoints without failures
+        return: Mapping of endpoint name to its new watermark
+        """
+        with self._lock:
+            advanced = {
+                name: value for name, value in self._advanced.items()
+                if name not in self._failed and value is not None and value != self._stored.get(name)
+            }
+        for name, value in advanced.items():
+            self.store.put(self.key(name), value)
+        return advanced
@@ -0,0 +1,83 @@
+"""
+Template Cache
+
+Stores parsed TemplateSchema instances on disk, so template files that did
+not change between runs skip YAML parsing, schema validation and parsing.
+
+Entries are keyed by the content hash of the template file. They are stored
+per schema version, a digest of the schemata and the parser version, so any
+change of the expected schema invalidates all entries on its own.
+
+The cache holds pickled objects and must only point to a trusted location.
+"""
+import hashlib
+import json
+import pickle
+import shutil
+from pathlib import Path
+from typing import Optional, Union
+
+from utils import io as ioutils
+from restmap.templateParser.schemata import schema_mapping
+
+# Increase when the parsed TemplateSchema structure changes
+PARSER_VERSION = 1
+
+
+def schema_version() -> str:
+    """Digest identifying the schemata and parser the cached entries were built with"""
+    canonical = json.dumps({'parser': PARSER_VERSION, 'schemata': schema_mapping}, sort_keys=True)
+    return hashlib.blake2b(canonical.encode(), digest_size=8).hexdigest()
+
+
+class TemplateCache:
+    """
+    Content addressed on-disk cache of parsed templates
+    """
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        self._root = ioutils.ensure_path(directory)
+        self._version = schema_version()
+
+    @property
+    def location(self) -> Path:
+        """Folder holding the entries of the current schema version"""
+        return self._root / self._version
+
+    def key(self, content: bytes) -> str:
+        """Computes the cache key for the raw content of a template file"""
+        return hashlib.blake2b(content, digest_size=16).hexdigest()
+
+    def get(self, key: str):
+        """
+        Retrieves a cached template
+        return: The TemplateSchema instance or None if not cached
+        """
+        try:
+            with open(self.location / f"{key}.pickle", 'rb') as file:
+                return pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Corrupted or incompatible entries are rebuilt
+            return None
+
+    def put(self, key: str, template) -> None:
+        """
+        Stores a parsed template. Entries are written to a temporary
+        file first, so concurrent readers never see partial entries.
+        """
+        with ioutils.atomic_write(self.location / f"{key}.pickle") as file:
+            pickle.dump(template, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def prune(self) -> None:
+        """Removes the entries built with outdated schema versions"""
+        if not self._root.is_dir():
+            return
+        for folder in self._root.iterdir():
+            if folder.is_dir() and folder.name != self._version:
+                shutil.rmtree(folder, ignore_errors=True)
+
+    def clear(self) -> None:
+        """Removes all cached entries"""
+        shutil.rmtree(self._root, ignore_errors=True)
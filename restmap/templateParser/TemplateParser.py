@@ -12,13 +12,21 @@ and class conversion of the read attributes into schema elements to be exported
 further for scheduling.
 """
 
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
 from pathlib import Path
-from typing import Union, List, Dict
+from typing import Union, List, Dict, Iterable, Iterator, Optional, Tuple
 
 from dataclasses import dataclass, field
 import jsonschema
+import yaml
 from utils import io as ioutils
 from enums import StatusCode
+from restmap.templateParser.schemata import schema_mapping
+from restmap.templateParser.TemplateCache import TemplateCache
+
+# Use the libyaml based loader when PyYAML was built with it
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
 
 @dataclass
 class MetadataDict:
@@ -40,40 +48,152 @@ class TemplateSchema:
     metadata: MetadataDict
     config: ConfigurationDict
 
+@lru_cache(maxsize=None)
+def _validator(key: str):
+    """
+    Builds the validator instance for a schema in `schema_mapping` once
+    per process. The schema is checked against its meta-schema on first
+    use only, instead of on every validation.
+    """
+    schema = schema_mapping[key]
+    validator_class = jsonschema.validators.validator_for(schema)
+    validator_class.check_schema(schema)
+    return validator_class(schema)
+
+def _load_in_worker(parser: 'TemplateParser', path: Path) -> 'TemplateSchema':
+    """
+    Loads a template in a worker process. Validation errors reference their
+    validator which can't be sent back across processes, so they are
+    re-raised as a plain copy naming the file.
+    """
+    try:
+        return parser.load(path)
+    except jsonschema.ValidationError as e:
+        raise jsonschema.ValidationError(
+            f"{path}: {e.message}",
+            path=e.path,
+            schema_path=e.schema_path,
+            instance=e.instance,
+        ) from None
+
 class TemplateParser:
     """
     Implements the parser interface
     """
 
-    def __init__(self) -> None:
-        pass       
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None) -> None:
+        """
+        @cache_dir: Folder to cache parsed templates in, keyed by their file content.
+                    Caching is disabled if not set.
+        """
+        self._cache = TemplateCache(cache_dir) if cache_dir is not None else None
     
     # PUBLIC API______________
     def load(self, path: Union[str, Path]) -> TemplateSchema:
         """
         Attempts to verify and load a Template from a given file location.
+        Unchanged files are served from the cache if configured.
         """
         path = ioutils.ensure_path(path)
-        # TODO: 
         try:
-            template_dict = self._read_template_file(path)
-            # Validate required components are defined. Raises if it fails
-            self._validate(template_dict)
-            # Load all components and lint component schemata
-            template: TemplateSchema = self._parse(template_dict)
-            return template
+            content = path.read_bytes()
         except FileNotFoundError:
             raise FileNotFoundError("The file provided does not exist")
+        if self._cache is not None:
+            key = self._cache.key(content)
+            template = self._cache.get(key)
+            if template is not None:
+                return template
+        template_dict = self._load_yaml(content)
+        # Validate required components are defined. Raises if it fails
+        self._validate(template_dict)
+        # Load all components and lint component schemata
+        template: TemplateSchema = self._parse(template_dict)
+        if self._cache is not None:
+            self._cache.put(key, template)
+        return template
+
+    def load_all(self, path: Union[str, Path]) -> Iterator[TemplateSchema]:
+        """
+        Lazily loads a bundle of `---` separated templates from a single file.
+
+        The file is read incrementally and each document is validated and
+        parsed on its own, so memory is bound by the largest document rather
+        than the size of the bundle. Empty documents are skipped.
+        """
+        path = ioutils.ensure_path(path)
+        try:
+            file = open(path, 'rb')
+        except FileNotFoundError:
+            raise FileNotFoundError("The file provided does not exist")
+        with file:
+            for template_dict in yaml.load_all(file, Loader=_YamlLoader):
+                if template_dict is None:
+                    continue
+                self._validate(template_dict)
+                yield self._parse(template_dict)
+
+    def validate(self, path: Union[str, Path]) -> List[jsonschema.ValidationError]:
+        """
+        Validates a template file and collects all schema violations in one pass.
+        return: List of validation errors, empty if the template is valid
+        """
+        path = ioutils.ensure_path(path)
+        try:
+            template_dict = self._read_template_file(path)
+        except FileNotFoundError:
+            # Reported like the violations, so callers receive the errors of a template as a list
+            return [jsonschema.ValidationError("The file provided does not exist")]
+        return list(self._iter_errors(template_dict))
+
+    def load_many(self, paths: Iterable[Union[str, Path]], max_workers: Optional[int] = None) -> Iterator[TemplateSchema]:
+        """
+        Loads a set of templates, parsing and validating the files in parallel
+        across processes.
+
+        Templates are yielded as soon as their file finished loading, so the
+        order of the results does not follow the order of the paths.
+        @max_workers: Number of processes, defaults to the number of cores. 
+                      A value of 1 loads the files sequentially in process.
+        """
+        paths = [ioutils.ensure_path(path) for path in paths]
+        if max_workers == 1 or len(paths) <= 1:
+            for path in paths:
+                yield self.load(path)
+            return
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+        try:
+            futures = [pool.submit(_load_in_worker, self, path) for path in paths]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Drop pending files when the consumer stops early or a file fails
+            pool.shutdown(cancel_futures=True)
+
+    def load_dir(self, path: Union[str, Path], patterns: Tuple[str, ...] = ('*.yml', '*.yaml'), 
+        recursive: bool = False, max_workers: Optional[int] = None) -> Iterator[TemplateSchema]:
+        """
+        Loads all templates stored in a folder, see `load_many`.
+        @patterns: Glob patterns selecting the template files
+        @recursive: Include templates in nested folders
+        """
+        path = ioutils.ensure_path(path)
+        if not path.is_dir():
+            raise NotADirectoryError(f"{path} is not a directory")
+        glob = path.rglob if recursive else path.glob
+        paths = sorted({file for pattern in patterns for file in glob(pattern) if file.is_file()})
+        return self.load_many(paths, max_workers=max_workers)
 
     # INTERNAL API_______________-
     def _read_template_file(self, path: Path):
         """
         Reads the given file, ensures it is valid yaml and loads it
         """
-        import yaml
-        file = path.read_text()
-        template_dict = yaml.safe_load(file)
-        return template_dict
+        return self._load_yaml(path.read_bytes())
+
+    def _load_yaml(self, content: bytes) -> dict:
+        """Ensures the raw file content is valid yaml and loads it"""
+        return yaml.load(content, Loader=_YamlLoader)
         
     def _validate(self, template_dict: dict) -> bool:
         """
@@ -81,16 +201,30 @@ class TemplateParser:
         file schema
         @template_string: Parsed dict from yaml input
         """
-        from restmap.templateParser.schemata import schema_mapping
         # Validate overall schema first
-        try:
-            jsonschema.validate(template_dict, schema_mapping['template'])
+        self._raise_first(_validator('template').iter_errors(template_dict))
+        for key, values in template_dict.items():
+            if key in schema_mapping:
+                self._raise_first(_validator(key).iter_errors(values))
+        return True
+
+    @staticmethod
+    def _raise_first(errors: Iterator[jsonschema.ValidationError]):
+        """Raises the most relevant error, like `jsonschema.validate`"""
+        error = jsonschema.exceptions.best_match(errors)
+        if error is not None:
+            raise error
+
+    def _iter_errors(self, template_dict: dict) -> Iterator[jsonschema.ValidationError]:
+        """
+        Yields every schema violation of the template and all of its
+        sections instead of stopping at the first one.
+        """
+        yield from _validator('template').iter_errors(template_dict)
+        if isinstance(template_dict, dict):
             for key, values in template_dict.items():
                 if key in schema_mapping:
-                    jsonschema.validate(values, schema_mapping[key])
-        except jsonschema.ValidationError as e:
-            raise e
-        return True
+                    yield from _validator(key).iter_errors(values)
 
     def _parse(self, template_dict: dict ) -> TemplateSchema:
         """
@@ -21,6 +21,104 @@ MetadataSchema = {
     },
 }
 
+# Attributes of a single endpoint definition
+EndpointAttributesSchema = {
+    "type": "object",
+    "properties":{
+        "kind" : {"type": "string"},
+        "url" : {"type": "string"},
+        "base" : {"type": "string"},
+        "relative" : {"type": "string"},
+        "pool_size" : {"type": "integer", "minimum": 1},
+        "rate_limit" : {
+            "type": "object",
+            "properties": {
+                "rate": {"type": "number", "exclusiveMinimum": 0},
+                "burst": {"type": "integer", "minimum": 1},
+                "concurrency": {"type": "integer", "minimum": 1},
+                "min_concurrency": {"type": "integer", "minimum": 1},
+                "max_concurrency": {"type": "integer", "minimum": 1},
+                "increase": {"type": "number", "exclusiveMinimum": 0},
+                "decrease": {"type": "number", "exclusiveMinimum": 0, "exclusiveMaximum": 1},
+                "retries": {"type": "integer", "minimum": 0},
+                "backoff": {"type": "number", "minimum": 0},
+                "max_retry_after": {"type": "number", "minimum": 0},
+            },
+            "additionalProperties": False
+        },
+        "matrix" : {
+            "type": "object",
+            "additionalProperties": {"type": "array", "minItems": 1}
+        },
+        "expansion": {
+            "type": "object",
+            "properties": {
+                "mode": {"enum": ["product", "zip"]},
+                "filter": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "field": {"type": "string"},
+                            "op": {"enum": ["==", "!=", "<", "<=", ">", ">=", "in", "not in"]},
+                            "other": {"type": "string"},
+                        },
+                        "required": ["field"]
+                    }
+                }
+            }
+        },
+        "pagination": {
+            "type": "object",
+            "properties": {
+                "type": {"enum": ["cursor", "offset", "nextLink", "link"]},
+                "next": {"type": "string"},
+                "param": {"type": "string"},
+                "limit": {"type": "integer", "minimum": 1},
+                "limit_param": {"type": "string"},
+                "start": {"type": "integer", "minimum": 0},
+                "records": {"type": "string"},
+                "total": {"type": "string"},
+                "parallel": {"type": "integer", "minimum": 1},
+                "max_pages": {"type": "integer", "minimum": 1},
+            },
+            "required": ["type"],
+            "additionalProperties": False
+        },
+        "streaming": {
+            "type": "object",
+            "properties": {
+                "records": {"type": "string"},
+                "batch_size": {"type": "integer", "minimum": 1},
+                "chunk_size": {"type": "integer", "minimum": 1},
+            },
+            "additionalProperties": False
+        },
+        "watermark": {
+            "type": "object",
+            "properties": {
+                "param": {"type": "string"},
+                "value": {"type": "string"},
+                "records": {"type": "string"},
+                "mode": {"enum": ["max", "last"]},
+                "initial": {},
+            },
+            "required": ["param", "value"],
+            "additionalProperties": False
+        },
+        "conditional": {"type": "boolean"},
+        "params": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "name" : {"type": "string"}
+                }
+            }
+        }
+    }
+}
+
 ConfigSchema = {
     "type" : "object",
     "properties": {
@@ -28,21 +126,8 @@ ConfigSchema = {
             "type": "array",
             "items": {
                 "type": "object",
-                "properties":{
-                    "kind" : {"type": "string"},
-                    "url" : {"type": "string"},
-                    "base" : {"type": "string"},
-                    "relative" : {"type": "string"},
-                    "params": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "name" : {"type": "string"}
-                            }
-                        }
-                    }
-                }
+                # Each item maps the endpoint name to its attributes
+                "additionalProperties": EndpointAttributesSchema
             }
             },
         "params": {"type": "object"},
@@ -1,11 +1,18 @@
 
 import pytest
+import sys
+import time
+import types
 from pathlib import Path
 from restmap.manager.Manager import Manager
 from restmap.templateParser.schemata import TemplateSchema
 from restmap.compiler.Compiler import Compiler, CompilerNode
 from restmap.compiler.function.FunctionCompiler import FunctionCompiler, DeployableFunction, DeploymentParams 
 from restmap.compiler.function import HeaderNode, HandlerNode, AuthenticatorNode, BodyParserNode, RequestNode, ResponseHandlerNode
+from restmap.resolver.nodes import EndpointNode
+from restmap.resolver.nodes.EndpointOptions import EndpointOptions
+from restmap.resolver.nodes.RateLimit import RateLimit
+from restmap.resolver.nodes.Streaming import Streaming
 
 @pytest.fixture
 def compiler():
@@ -190,3 +197,82 @@ class TestCompilerNode:
         assert isinstance(response, str), "Must return a code string rendered by the template"
         #TODO Extend the assertions on the template rendering process applied here
     
+
+class TestSessionNode:
+
+    def test_compiles_base_pool(self, compiler: Compiler, func_compiler: FunctionCompiler):
+        base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com/', pool_size=25)
+        endpoint = EndpointNode.RelativeURLNode(name='scope', kind='relativeurl', base=base, relative='/scope/{userId}')
+        code = func_compiler.compile(compiler._spawn_head(), endpoint).code
+        assert 'session.mount("https://management.azure.com/", HTTPAdapter(pool_connections=1, pool_maxsize=25))' in code, \
+            "the session must pool connections to the base url of the endpoint"
+        assert 'response = session.' in code, "requests must be sent through the pooled session"
+
+    def test_concurrency_from_rate_limit(self, compiler: Compiler, func_compiler: FunctionCompiler):
+        base = EndpointNode.BaseURLNode(
+            name='baseurl', kind='baseurl', url='https://management.azure.com/', rate_limit=RateLimit(rate=5, max_concurrency=40)
+        )
+        endpoint = EndpointNode.RelativeURLNode(name='scope', kind='relativeurl', base=base, relative='/scope/{userId}')
+        params = func_compiler.compile(compiler._spawn_head(), endpoint).params
+        assert params.concurrency == 40, "the function concurrency must be bound by the rate limit of the host"
+        assert '"rate": 5' in params.env_variables['RATE_LIMIT']
+
+    def test_retries_throttled_requests(self, compiler: Compiler, func_compiler: FunctionCompiler, monkeypatch):
+        base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com/')
+        endpoint = EndpointNode.RelativeURLNode(name='scope', kind='relativeurl', base=base, relative='/scope/{userId}')
+        code = func_compiler.compile(compiler._spawn_head(), endpoint).code
+        assert "rate_limit = json.loads(os.environ.get('RATE_LIMIT')" in code, "the retries must be configured by the deployment"
+        assert 'session = ThrottledSession()' in code
+        # Runs the session against answers of a fake requests module
+        answers = [
+            types.SimpleNamespace(status_code=429, headers={'Retry-After': '60'}, close=lambda: None),
+            types.SimpleNamespace(status_code=503, headers={}, close=lambda: None),
+            types.SimpleNamespace(status_code=200, headers={}, close=lambda: None),
+        ]
+        class Session:
+            def request(self, method, url, **kwargs):
+                return answers.pop(0)
+            def get(self, url, **kwargs):
+                return self.request('GET', url, **kwargs)
+            def mount(self, prefix, adapter):
+                pass
+        monkeypatch.setitem(sys.modules, 'requests', types.SimpleNamespace(Session=Session))
+        monkeypatch.setitem(sys.modules, 'requests.adapters', types.SimpleNamespace(HTTPAdapter=lambda **kwargs: None))
+        monkeypatch.setenv('RATE_LIMIT', '{"retries": 2, "backoff": 0.5, "max_retry_after": 10}')
+        sleeps = []
+        monkeypatch.setattr(time, 'sleep', sleeps.append)
+        module = {}
+        exec(compile(code, 'handler.py', 'exec'), module)
+        assert module['session'].get('https://management.azure.com/scope/1').status_code == 200
+        assert sleeps == [10, 1.0], "throttled requests must wait for Retry-After, bound by max_retry_after, else back off"
+
+    def test_streams_records(self, compiler: Compiler, func_compiler: FunctionCompiler):
+        base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com/')
+        endpoint = EndpointNode.RelativeURLNode(
+            name='scope', kind='relativeurl', base=base, relative='/scope', options=EndpointOptions(streaming=Streaming(records='$.value[*]'))
+        )
+        function = func_compiler.compile(compiler._spawn_head(), endpoint)
+        assert 'stream=True)' in function.code, "streamed endpoints must not load the body on request"
+        assert 'ijson.items(response.raw, "value.item")' in function.code
+        assert [requirement.library for requirement in function.requirements] == ['ijson']
+
+    def test_conditional_requests(self, compiler: Compiler, func_compiler: FunctionCompiler):
+        base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com/')
+        endpoint = EndpointNode.RelativeURLNode(name='users', kind='relativeurl', base=base, relative='/users', options=EndpointOptions(conditional=True))
+        function = func_compiler.compile(compiler._spawn_head(), endpoint)
+        assert 'headers={**headers, **conditional_headers(url)})' in function.code
+        assert 'if response.status_code == 304:' in function.code, "unmodified responses must not be parsed again"
+        assert function.code.rindex('remember(url, response)') > function.code.index('output = '), \
+            "validators must only be kept once the records are part of the output"
+        assert 'DynamoDBWriter' in function.params.permissions
+
+    @pytest.mark.parametrize('options', [
+        None, EndpointOptions(conditional=True), EndpointOptions(streaming=Streaming(records='$.value[*]'))
+    ])
+    def test_compiles_handler(self, compiler: Compiler, func_compiler: FunctionCompiler, options: EndpointOptions):
+        base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com/')
+        endpoint = EndpointNode.RelativeURLNode(name='scope', kind='relativeurl', base=base, relative='/scope/{userId}', options=options)
+        code = func_compiler.compile(compiler._spawn_head(), endpoint).code
+        compile(code, 'handler.py', 'exec')
+        assert 'url = "https://management.azure.com/scope/{userId}".format(**event)' in code, \
+            "the url must be defined within the handler"
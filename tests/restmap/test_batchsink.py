@@ -0,0 +1,194 @@
+"""
+Tests the batched, partitioned output of records to a store
+"""
+import gzip
+import json
+import threading
+import time
+from pathlib import Path
+import pytest
+from restmap.executor.Local.Fetcher import BaseFetcher, Response
+from restmap.executor.Local.LocalExecutor import LocalExecutor
+from restmap.resolver.ResolutionGraph import ResolutionGraph
+from restmap.resolver.nodes import EndpointNode
+from restmap.sink.BatchSink import BatchSink
+from restmap.sink.LocalStore import LocalStore
+
+# 2022-11-20T23:59:00Z
+MIDNIGHT = 1668988740.0
+
+class Clock:
+    def __init__(self, now: float = MIDNIGHT):
+        self.now = now
+    def __call__(self) -> float:
+        return self.now
+
+def response(endpoint: str, records: list, streamed: bool = False) -> Response:
+    if streamed:
+        return Response(endpoint, 'https://a.b', 200, {}, b'', records=records)
+    return Response(endpoint, 'https://a.b', 200, {}, json.dumps(records).encode())
+
+def read(store: LocalStore, key: str) -> list:
+    data = store.get(key)
+    if key.endswith('.gz'):
+        data = gzip.decompress(data)
+    return [json.loads(line) for line in data.splitlines()]
+
+@pytest.fixture
+def store(tmp_path: Path) -> LocalStore:
+    return LocalStore(tmp_path / 'bucket')
+
+
+class TestLocalStore:
+
+    def test_put_get_list_delete(self, store: LocalStore):
+        store.put('a/b.txt', b'1')
+        store.put('a/c.txt', b'2')
+        store.put('d.txt', b'3')
+        assert store.get('a/b.txt') == b'1'
+        assert list(store.list('a/')) == ['a/b.txt', 'a/c.txt']
+        store.delete('a/b.txt')
+        store.delete('a/b.txt')
+        with pytest.raises(KeyError):
+            store.get('a/b.txt')
+
+    @pytest.mark.parametrize('key', ['', '../escape', 'a//b', '/absolute'])
+    def test_rejects_invalid_keys(self, store: LocalStore, key: str):
+        with pytest.raises(ValueError):
+            store.put(key, b'')
+
+
+class TestBatchSink:
+
+    def test_batches_by_max_records(self, store: LocalStore):
+        sink = BatchSink(store, max_records=4, clock=Clock())
+        for start in range(0, 10, 3):
+            sink.write(response('users', list(range(start, min(start + 3, 10)))))
+        sink.close()
+        keys = list(store.list())
+        assert [len(read(store, key)) for key in keys] == [4, 4, 2], "batches must hold at most max_records"
+        assert [record for key in keys for record in read(store, key)] == list(range(10))
+        assert sink.objects == 3 and sink.records == 10
+
+    def test_partitions_by_endpoint_and_date(self, store: LocalStore):
+        clock = Clock()
+        sink = BatchSink(store, prefix='raw/', clock=clock)
+        sink.write(response('users', [1]))
+        sink.write(response('groups', [{'id': 1}], streamed=True))
+        clock.now += 120
+        sink.write(response('users', [2]))
+        sink.close()
+        partitions = sorted(key.rsplit('/', 1)[0] for key in store.list())
+        assert partitions == [
+            'raw/endpoint=groups/date=2022-11-20',
+            'raw/endpoint=users/date=2022-11-20',
+            'raw/endpoint=users/date=2022-11-21',
+        ]
+        assert all(key.endswith('.ndjson.gz') for key in store.list())
+
+    def test_max_bytes(self, store: LocalStore):
+        sink = BatchSink(store, max_bytes=100, compression=None, clock=Clock())
+        sink.write(response('users', ['x' * 40] * 5))
+        sink.close()
+        assert [len(read(store, key)) for key in store.list()] == [3, 2], "batches must be written once they exceed max_bytes"
+        assert all(key.endswith('.ndjson') for key in store.list())
+
+    def test_max_age(self, store: LocalStore):
+        clock = Clock()
+        sink = BatchSink(store, max_age=60, clock=clock)
+        sink.write(response('users', [1]))
+        sink.write(response('users', [2]))
+        clock.now += 60
+        # Writes of any endpoint write the expired batches
+        sink.write(response('groups', [3]))
+        sink._wait(0)
+        assert [read(store, key) for key in store.list()] == [[1, 2]]
+        sink.close()
+
+    def test_raises_store_errors(self, store: LocalStore):
+        class FailingStore(LocalStore):
+            def put(self, key, data):
+                raise OSError("bucket unavailable")
+        sink = BatchSink(FailingStore(store.directory), clock=Clock())
+        sink.write(response('users', [1]))
+        with pytest.raises(OSError):
+            sink.close()
+
+    def test_writes_without_waiting(self, store: LocalStore):
+        uploading = threading.Event()
+        class SlowStore(LocalStore):
+            def put(self, key, data):
+                uploading.wait()
+                super().put(key, data)
+        sink = BatchSink(SlowStore(store.directory), max_records=1, max_pending=1, clock=Clock())
+        writing = threading.Thread(target=lambda: [sink.write(response('users', [index])) for index in range(5)])
+        writing.start()
+        writing.join(timeout=5)
+        assert not writing.is_alive(), "writes must not wait for pending batches, they block the event loop"
+        uploading.set()
+        sink.close()
+        assert sorted(record for key in store.list() for record in read(store, key)) == list(range(5))
+
+    @pytest.mark.parametrize('options', [{'format': 'csv'}, {'compression': 'zstd'}, {'max_records': 0}])
+    def test_rejects_invalid(self, store: LocalStore, options: dict):
+        with pytest.raises(ValueError):
+            BatchSink(store, **options)
+
+    def test_parquet(self, store: LocalStore):
+        parquet = pytest.importorskip('pyarrow.parquet')
+        sink = BatchSink(store, format='parquet', compression='snappy', clock=Clock())
+        sink.write(response('users', [{'id': 1}, {'id': 2}]))
+        sink.close()
+        key, = store.list()
+        assert key.endswith('.parquet')
+        assert parquet.read_table(store.path(key)).column('id').to_pylist() == [1, 2]
+
+
+class TestExecutorBatchSink:
+
+    def test_writes_responses(self, store: LocalStore):
+        class Fetcher(BaseFetcher):
+            async def fetch(self, endpoint, url, params=None):
+                return Response(endpoint.name, url, 200, {}, json.dumps([params['page']] * 10).encode(), params)
+        graph = ResolutionGraph()
+        base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com')
+        graph.add_endpoint(base)
+        graph.add_endpoint(EndpointNode.RelativeURLNode(
+            name='pages', kind='relativeurl', base=base, relative='/pages/{page}', matrix={'page': list(range(20))}
+        ))
+        sink = BatchSink(store, max_records=50)
+        LocalExecutor(sink, fetcher=Fetcher()).run(graph)
+        keys = list(store.list())
+        assert len(keys) == 4, "200 records must be written as 4 objects instead of one per response"
+        assert sorted(record for key in keys for record in read(store, key)) == sorted(list(range(20)) * 10)
+
+    def test_bounds_pending_batches(self, store: LocalStore):
+        class SlowStore(LocalStore):
+            def put(self, key, data):
+                time.sleep(0.01)
+                super().put(key, data)
+        class BoundedSink(BatchSink):
+            pending = held = max_pending = max_held = 0
+            def _seal(self, partition):
+                self.held += self._batches[partition].size
+                super()._seal(partition)
+                self.max_pending = max(self.max_pending, sum(not future.done() for future in self._pending))
+                self.max_held = max(self.max_held, self.held)
+            def _store(self, key, lines, records):
+                super()._store(key, lines, records)
+                with self._lock:
+                    self.held -= sum(map(len, lines))
+        class Fetcher(BaseFetcher):
+            async def fetch(self, endpoint, url, params=None):
+                return Response(endpoint.name, url, 200, {}, json.dumps([params['page']] * 10).encode(), params)
+        graph = ResolutionGraph()
+        base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com')
+        graph.add_endpoint(base)
+        graph.add_endpoint(EndpointNode.RelativeURLNode(
+            name='pages', kind='relativeurl', base=base, relative='/pages/{page}', matrix={'page': list(range(40))}
+        ))
+        sink = BoundedSink(SlowStore(store.directory), max_records=10, max_pending=2)
+        LocalExecutor(sink, fetcher=Fetcher()).run(graph)
+        assert len(list(store.list())) == 40
+        assert sink.max_pending <= 3, "executors must wait for the sink instead of queueing batches without bound"
+        assert sink.max_held <= 3 * 10 * len(b'39\n'), "the bytes of pending batches must stay bounded"
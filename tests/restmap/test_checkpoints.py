@@ -0,0 +1,133 @@
+"""
+Tests checkpointing and resuming runs over many param partitions
+"""
+import asyncio
+import json
+import pytest
+from restmap.executor.Local.Fetcher import BaseFetcher, Response
+from restmap.executor.Local.LocalExecutor import LocalExecutor
+from restmap.resolver.ResolutionGraph import ResolutionGraph
+from restmap.resolver.nodes import EndpointNode
+from restmap.sink.MemorySink import MemorySink
+from restmap.state.Checkpoints import Checkpoints
+from restmap.state.LocalStateStore import LocalStateStore
+
+ENDPOINT = EndpointNode.RelativeURLNode(
+    name='pages', kind='relativeurl', relative='/pages/{page}', matrix={'page': list(range(50))},
+    base=EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com'),
+)
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self) -> float:
+        return self.now
+
+def params(start: int, size: int = 10) -> list:
+    return [{'page': page} for page in range(start, start + size)]
+
+def complete(checkpoints: Checkpoints, partition: int, ok: bool = True):
+    batch = params(partition * 10)
+    assert checkpoints.start(ENDPOINT, partition, batch)
+    for _ in batch:
+        checkpoints.finish(ENDPOINT, partition, ok)
+
+
+class TestCheckpoints:
+
+    def test_saves_completed_partitions(self):
+        store = LocalStateStore()
+        checkpoints = Checkpoints(store, 'run', batch_size=10)
+        checkpoints.load(ENDPOINT)
+        complete(checkpoints, 0)
+        complete(checkpoints, 1, ok=False)
+        flushed = []
+        checkpoints.save(lambda: flushed.append(store.get(checkpoints.key('pages'))))
+        assert flushed == [None], "the sink must be flushed before the checkpoint is saved"
+        resumed = Checkpoints(store, 'run', batch_size=10)
+        assert resumed.load(ENDPOINT) == 1
+        assert not resumed.start(ENDPOINT, 0, params(0)), "completed partitions must be skipped"
+        assert resumed.start(ENDPOINT, 1, params(10)), "partitions with failed requests must be requested again"
+
+    def test_changed_partitions_are_not_skipped(self):
+        store = LocalStateStore()
+        checkpoints = Checkpoints(store, 'run', batch_size=10)
+        complete(checkpoints, 0)
+        checkpoints.save(lambda: None)
+        resumed = Checkpoints(store, 'run', batch_size=10)
+        resumed.load(ENDPOINT)
+        assert resumed.start(ENDPOINT, 0, params(5)), "partitions holding other params must not be skipped"
+        other_size = Checkpoints(store, 'run', batch_size=20)
+        assert other_size.load(ENDPOINT) == 0
+
+    def test_due_after_interval(self):
+        clock = Clock()
+        checkpoints = Checkpoints(LocalStateStore(), 'run', batch_size=10, interval=30, clock=clock)
+        complete(checkpoints, 0)
+        assert not checkpoints.due()
+        clock.now = 30
+        assert checkpoints.due()
+        assert not checkpoints.due(), "a save must not be started while one is running"
+        checkpoints.save(lambda: None)
+        clock.now = 60
+        assert not checkpoints.due(), "no save is due without newly completed partitions"
+
+    def test_clear(self):
+        store = LocalStateStore()
+        store.put('checkpoint/other/pages', {})
+        checkpoints = Checkpoints(store, 'run', batch_size=10)
+        complete(checkpoints, 0)
+        checkpoints.save(lambda: None)
+        checkpoints.clear()
+        assert list(store.keys('checkpoint/run/')) == []
+        assert list(store.keys('checkpoint/other/')) == ['checkpoint/other/pages']
+
+
+class PageFetcher(BaseFetcher):
+    """Serves the pages, failing or hanging on the pages of the fourth partition"""
+    def __init__(self, broken: str = ''):
+        self.broken = broken
+        self.requested = []
+
+    async def fetch(self, endpoint, url, params=None) -> Response:
+        self.requested.append(params['page'])
+        if 30 <= params['page'] < 40:
+            if self.broken == 'fail':
+                return Response(endpoint.name, url, 500, {}, b'', params)
+            if self.broken == 'hang':
+                await asyncio.sleep(60)
+        return Response(endpoint.name, url, 200, {}, json.dumps([params['page']]).encode(), params)
+
+@pytest.fixture
+def graph() -> ResolutionGraph:
+    graph = ResolutionGraph()
+    graph.add_endpoint(ENDPOINT.base)
+    graph.add_endpoint(ENDPOINT)
+    return graph
+
+class TestExecutorCheckpoints:
+
+    def test_resumes_failed_partitions(self, graph: ResolutionGraph):
+        state = LocalStateStore()
+        stats = LocalExecutor(MemorySink(), fetcher=PageFetcher('fail'), batch_size=10, state=state).run(graph, run_id='run')
+        assert stats.failed == 10
+        fetcher = PageFetcher()
+        stats = LocalExecutor(MemorySink(), fetcher=fetcher, batch_size=10, state=state).run(graph, run_id='run')
+        assert sorted(fetcher.requested) == list(range(30, 40)), "only the failed partition must be requested again"
+        assert stats.skipped == 40 and stats.failed == 0
+        assert list(state.keys('checkpoint/')) == [], "checkpoints of completed runs must be removed"
+
+    def test_resumes_interrupted_run(self, graph: ResolutionGraph):
+        state = LocalStateStore()
+        executor = LocalExecutor(MemorySink(), fetcher=PageFetcher('hang'), batch_size=10, state=state)
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(executor.execute(graph, run_id='run'), 0.5))
+        fetcher = PageFetcher()
+        stats = LocalExecutor(MemorySink(), fetcher=fetcher, batch_size=10, state=state).run(graph, run_id='run')
+        assert stats.skipped == 30, "partitions completed before the interruption must be skipped"
+        assert sorted(fetcher.requested) == list(range(30, 50))
+
+    def test_without_run_id(self, graph: ResolutionGraph):
+        state = LocalStateStore()
+        LocalExecutor(MemorySink(), fetcher=PageFetcher('fail'), batch_size=10, state=state).run(graph)
+        assert list(state.keys()) == []
@@ -0,0 +1,110 @@
+"""
+Tests the chunked database reads of the DBResolver against a sqlite database
+"""
+import sqlite3
+import pytest
+from restmap.resolver.nodes.resolvers.DBResolver import DBResolver
+from restmap.resolver.nodes.resolvers import ConnectionPool as ConnectionPoolModule
+from restmap.resolver.nodes.resolvers.ConnectionPool import ConnectionPool, register_driver
+
+ROWS = 25
+
+@pytest.fixture
+def connectionstring(tmp_path):
+    path = tmp_path / 'resolver.db'
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE Configuration (Id INTEGER, Name TEXT, Payload TEXT)')
+    connection.executemany(
+        'INSERT INTO Configuration VALUES (?, ?, ?)',
+        [(i, f"name-{i}", 'x' * 100) for i in range(ROWS)]
+    )
+    connection.commit()
+    connection.close()
+    yield f"sqlite:///{path}"
+    ConnectionPool.close_all()
+
+def make_resolver(connectionstring, columns, **options) -> DBResolver:
+    return DBResolver(
+        name='DBReservationLoader', kind='DatabaseResolver', authentication={},
+        connectionstring=connectionstring, table={'name': 'Configuration', 'col': columns}, **options
+    )
+
+class FakeConnection:
+    """Tracks the transaction of a connection the way psycopg2 opens one for each read"""
+    def __init__(self):
+        self.in_transaction = False
+    def cursor(self):
+        connection = self
+        class Cursor:
+            arraysize = 1
+            rows = [(1,), (2,)]
+            def execute(self, query):
+                connection.in_transaction = True
+            def fetchmany(self, size):
+                rows, self.rows = self.rows[:size], self.rows[size:]
+                return rows
+            def close(self):
+                pass
+        return Cursor()
+    def rollback(self):
+        self.in_transaction = False
+    def close(self):
+        pass
+
+class TestDBResolver:
+
+    def test_single_column_yields_values(self, connectionstring):
+        resolver = make_resolver(connectionstring, ['Id'])
+        assert list(resolver.resolve(None)) == list(range(ROWS))
+
+    def test_projection_yields_tuples(self, connectionstring):
+        resolver = make_resolver(connectionstring, ['Id', 'Name'])
+        rows = list(resolver.resolve(None))
+        assert rows[3] == (3, 'name-3'), "rows must only hold the projected columns"
+
+    def test_reads_in_chunks(self, connectionstring):
+        resolver = make_resolver(connectionstring, ['Id'], chunk_size=10)
+        assert [len(chunk) for chunk in resolver.iter_chunks()] == [10, 10, 5]
+
+    def test_resolves_lazily(self, connectionstring):
+        resolver = make_resolver(connectionstring, ['Id'], chunk_size=10)
+        rows = resolver.resolve(None)
+        assert next(rows) == 0
+        rows.close()
+
+    def test_shares_connections(self, connectionstring):
+        first = make_resolver(connectionstring, ['Id'])
+        second = make_resolver(connectionstring, ['Name'])
+        list(first.resolve(None))
+        list(second.resolve(None))
+        pool = ConnectionPool.for_connectionstring(connectionstring)
+        assert pool._idle.qsize() == 1, "resolvers sharing a connection string must reuse the pooled connection"
+
+    def test_concurrent_reads_use_separate_connections(self, connectionstring):
+        resolver = make_resolver(connectionstring, ['Id'], chunk_size=5)
+        first, second = resolver.resolve(None), resolver.resolve(None)
+        assert next(first) == next(second) == 0
+        assert list(first) == list(second) == list(range(1, ROWS))
+        assert ConnectionPool.for_connectionstring(connectionstring)._idle.qsize() == 2
+
+    def test_returns_connections_without_transaction(self, monkeypatch):
+        # The registry is restored after the test, other tests must not find the fake driver
+        monkeypatch.setattr(ConnectionPoolModule, '_drivers', dict(ConnectionPoolModule._drivers))
+        register_driver('fake', lambda connectionstring: FakeConnection())
+        try:
+            assert list(make_resolver('fake://db', ['Id']).resolve(None)) == [1, 2]
+            connection = ConnectionPool.for_connectionstring('fake://db')._idle.get_nowait()
+            assert not connection.in_transaction, "pooled connections must not sit idle in a transaction"
+        finally:
+            ConnectionPool.close_all()
+
+    @pytest.mark.parametrize('columns', [['Id; DROP TABLE Configuration'], ['"Id"'], []])
+    def test_rejects_invalid_columns(self, connectionstring, columns):
+        resolver = make_resolver(connectionstring, columns)
+        with pytest.raises(ValueError):
+            list(resolver.resolve(None))
+
+    def test_unknown_scheme(self):
+        resolver = make_resolver('Some string that should be put into a secret', ['Id'])
+        with pytest.raises(ValueError, match='No database driver'):
+            list(resolver.resolve(None))
@@ -0,0 +1,183 @@
+"""
+Tests the deduplication of unchanged records before they are written
+"""
+import json
+import threading
+from pathlib import Path
+import pytest
+from restmap.executor.Local.Fetcher import BaseFetcher, Response
+from restmap.executor.Local.LocalExecutor import LocalExecutor
+from restmap.resolver.ResolutionGraph import ResolutionGraph
+from restmap.resolver.nodes import EndpointNode
+from restmap.resolver.nodes.EndpointOptions import EndpointOptions
+from restmap.sink.DedupSink import DedupSink
+from restmap.sink.HashSet import BloomFilter, BloomFilters, SortedHashes
+from restmap.sink.LocalStore import LocalStore
+from restmap.sink.MemorySink import MemorySink
+from restmap.sink.MemoryStore import MemoryStore
+from restmap.state.ResponseCache import ResponseCache
+
+USERS = [{'id': index, 'name': f'user{index}', 'fetched': '2022-11-20'} for index in range(100)]
+
+
+def response(records, endpoint: str = 'users', streamed: bool = False) -> Response:
+    if streamed:
+        return Response(endpoint, 'https://a.b', 200, {}, b'', records=records)
+    return Response(endpoint, 'https://a.b', 200, {}, json.dumps(records).encode())
+
+def written(sink: MemorySink) -> list:
+    return [record for response in sink.responses for record in response.json()]
+
+def run(store, responses, **options) -> MemorySink:
+    sink = MemorySink()
+    dedup = DedupSink(sink, store, **options)
+    for item in responses:
+        dedup.write(item)
+    dedup.close()
+    return sink
+
+
+class TestHashSet:
+
+    def test_sorted(self):
+        hashes = SortedHashes([5, 2**64 - 1, 5, 0])
+        decoded = SortedHashes.decode(hashes.encode())
+        assert len(decoded) == 3, "repeated hashes must be stored once"
+        assert all(value in decoded for value in (0, 5, 2**64 - 1)) and 6 not in decoded
+
+    def test_bloom(self):
+        values = range(0, 2**64 - 1, 2**50)
+        bloom = BloomFilter.decode(BloomFilter.of(values, error_rate=0.01).encode())
+        assert all(value in bloom for value in values), "a bloom filter must never miss a member"
+        others = [value + 12345 for value in values]
+        assert sum(value in bloom for value in others) < len(others) * 0.05
+
+    def test_bloom_rejects_error_rate(self):
+        with pytest.raises(ValueError):
+            BloomFilter.of([1], error_rate=1)
+
+
+class TestDedupSink:
+
+    @pytest.mark.parametrize('method', ['sorted', 'bloom'])
+    def test_writes_changes(self, method: str):
+        store = MemoryStore()
+        assert len(written(run(store, [response(USERS)], method=method))) == 100, "the first run must write all records"
+        changed = [dict(user, name='renamed') if user['id'] < 3 else user for user in USERS] + [{'id': 100, 'name': 'new'}]
+        sink = run(store, [response(changed[:50], streamed=True), response(changed[50:], streamed=True)], method=method)
+        assert sorted(record['id'] for record in written(sink)) == [0, 1, 2, 100]
+
+    def test_compares_fields(self):
+        store = MemoryStore()
+        fields = {'users': ['$.id', '$.name']}
+        run(store, [response(USERS)], fields=fields)
+        refetched = [dict(user, fetched='2022-11-21') for user in USERS]
+        assert written(run(store, [response(refetched)], fields=fields)) == [], \
+            "fields left out of the comparison must not mark records as changed"
+        assert len(written(run(store, [response(refetched)]))) == 100
+
+    def test_single_record_body(self):
+        store = MemoryStore()
+        run(store, [response({'id': 1}, endpoint='scope')])
+        assert written(run(store, [response({'id': 1}, endpoint='scope')])) == []
+
+    def test_replaces_previous_hashes(self, tmp_path: Path):
+        store = LocalStore(tmp_path)
+        run(store, [response(USERS[:10])])
+        run(store, [response(USERS[5:10])])
+        assert len(written(run(store, [response(USERS[:10])]))) == 5, \
+            "records missing from the previous run must be written again"
+        assert list(store.list()) == ['dedup/users.sorted']
+
+    def test_bloom_filters(self):
+        first, second = BloomFilter.of(range(1000), error_rate=0.01), BloomFilter.of(range(1000, 1100), error_rate=0.01)
+        filters = BloomFilters.decode(BloomFilters([first, second]).encode())
+        assert [bloom.bits for bloom in filters.filters] == [first.bits, second.bits]
+        assert all(value in filters for value in range(1100))
+        assert BloomFilters.decode(first.encode()).filters[0].data == first.data, "a single filter must decode as one"
+
+    def test_sizes_bloom_filters_of_reused_records(self):
+        store = MemoryStore()
+        records = [{'id': index} for index in range(2000)]
+        run(store, [response(records[:1000])], method='bloom', error_rate=0.001)
+        dedup = DedupSink(MemorySink(), store, method='bloom', error_rate=0.001)
+        dedup.reuse('users')
+        dedup.write(response(records[1000:]))
+        dedup.close()
+        others = [{'id': index} for index in range(2000, 12000)]
+        dropped = len(others) - len(written(run(store, [response(others)], method='bloom')))
+        assert dropped < len(others) * 0.005, "filters must stay at their error rate as reused endpoints add hashes"
+
+    @pytest.mark.parametrize('method', ['sorted', 'bloom'])
+    def test_adds_to_hashes_of_reused_records(self, method: str):
+        store = MemoryStore()
+        run(store, [response(USERS)], method=method)
+        sink = MemorySink()
+        dedup = DedupSink(sink, store, method=method)
+        # The first half of the records was reused from the previous run, e.g. by a skipped partition
+        dedup.reuse('users')
+        dedup.write(response(USERS[50:]))
+        dedup.close()
+        assert written(run(store, [response(USERS)], method=method)) == [], \
+            "the hashes of reused records must be kept for the next run"
+
+    def test_keeps_hashes_on_failed_flush(self):
+        class FailingSink(MemorySink):
+            def flush(self):
+                raise IOError("bucket unavailable")
+        store = MemoryStore()
+        dedup = DedupSink(FailingSink(), store)
+        dedup.write(response(USERS))
+        with pytest.raises(IOError):
+            dedup.close()
+        assert list(store.list()) == [], "hashes must not be stored for records the sink did not persist"
+
+    def test_rejects_unknown_method(self):
+        with pytest.raises(ValueError):
+            DedupSink(MemorySink(), MemoryStore(), method='cuckoo')
+
+
+class RegionFetcher(BaseFetcher):
+    """Serves the users of each region with an ETag, answering 304 to the regions in `unmodified`"""
+    def __init__(self, unmodified=()):
+        self.unmodified = unmodified
+
+    async def fetch(self, endpoint, url, params=None, headers=None) -> Response:
+        region = params['region']
+        if headers and region in self.unmodified:
+            return Response(endpoint.name, url, 304, {'ETag': '"v1"'}, b'', params)
+        records = [dict(user, region=region) for user in USERS[:10]]
+        return Response(endpoint.name, url, 200, {'ETag': '"v1"'}, json.dumps(records).encode(), params)
+
+def make_graph() -> ResolutionGraph:
+    graph = ResolutionGraph()
+    base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com')
+    graph.add_endpoint(base)
+    graph.add_endpoint(EndpointNode.RelativeURLNode(
+        name='users', kind='relativeurl', base=base, relative='/users?region={region}',
+        matrix={'region': ['eu', 'us']}, options=EndpointOptions(conditional=True)
+    ))
+    return graph
+
+
+class TestExecutorDedup:
+
+    def test_keeps_hashes_of_unmodified_responses(self):
+        store, cache = MemoryStore(), ResponseCache()
+        LocalExecutor(DedupSink(MemorySink(), store), fetcher=RegionFetcher(), response_cache=cache).run(make_graph())
+        LocalExecutor(DedupSink(MemorySink(), store), fetcher=RegionFetcher(['eu']), response_cache=cache).run(make_graph())
+        sink = MemorySink()
+        LocalExecutor(DedupSink(sink, store), fetcher=RegionFetcher()).run(make_graph())
+        assert written(sink) == [], "records of unmodified responses must not be written again by a later run"
+
+    def test_reads_hashes_off_the_event_loop(self):
+        class ThreadStore(MemoryStore):
+            readers = []
+            def get(self, key):
+                self.readers.append(threading.current_thread())
+                return super().get(key)
+        store = ThreadStore()
+        LocalExecutor(DedupSink(MemorySink(), store), fetcher=RegionFetcher()).run(make_graph())
+        LocalExecutor(DedupSink(MemorySink(), store), fetcher=RegionFetcher()).run(make_graph())
+        assert store.readers and threading.main_thread() not in store.readers, \
+            "the stored hashes must not be read on the event loop"
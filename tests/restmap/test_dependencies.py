@@ -0,0 +1,44 @@
+import pytest
+
+from restmap.resolver.dependencies import CircularDependencyError, topological_order, topological_stages
+
+@pytest.fixture
+def dependencies():
+    return {
+        ('param', 'userId'): {('resolver', 'UserIdResolver')},
+        ('endpoint', 'scope'): {('endpoint', 'baseurl'), ('param', 'userId')},
+        ('resolver', 'UserIdResolver'): {('endpoint', 'userIdEndpoint')},
+        ('endpoint', 'userIdEndpoint'): {('endpoint', 'baseurl')},
+        ('endpoint', 'baseurl'): set(),
+    }
+
+class TestTopologicalOrder:
+
+    def test_orders_dependencies_first(self, dependencies):
+        order = topological_order(dependencies)
+        assert len(order) == len(dependencies)
+        for key, deps in dependencies.items():
+            assert all(order.index(dep) < order.index(key) for dep in deps), "dependencies must be placed before their dependents"
+
+    def test_stages_are_independent(self, dependencies):
+        stages = topological_stages(dependencies)
+        assert stages[0] == [('endpoint', 'baseurl')]
+        for stage in stages:
+            assert not any(dep in stage for key in stage for dep in dependencies[key]), "members of a stage must not depend on each other"
+
+    def test_deep_chain_is_not_circular(self):
+        depth = 500
+        dependencies = {('endpoint', str(i)): {('endpoint', str(i - 1))} if i else set() for i in range(depth)}
+        assert len(topological_stages(dependencies)) == depth
+
+    def test_cycle_names_nodes(self, dependencies):
+        dependencies[('endpoint', 'userIdEndpoint')].add(('param', 'userId'))
+        with pytest.raises(CircularDependencyError) as error:
+            topological_order(dependencies)
+        assert set(error.value.cycle) == {('endpoint', 'userIdEndpoint'), ('param', 'userId'), ('resolver', 'UserIdResolver')}
+        assert "resolver 'UserIdResolver'" in str(error.value)
+
+    def test_missing_dependency(self, dependencies):
+        dependencies[('param', 'other')] = {('resolver', 'Missing')}
+        with pytest.raises(KeyError):
+            topological_order(dependencies)
@@ -0,0 +1,132 @@
+"""
+Tests the adaptive rate limiting of requests per host
+"""
+import asyncio
+import email.utils
+import json
+import time
+import pytest
+from restmap.executor.Local.Fetcher import BaseFetcher, Response
+from restmap.executor.Local.HostLimiter import HostLimiter, parse_retry_after
+from restmap.executor.Local.LocalExecutor import LocalExecutor
+from restmap.resolver.ResolutionGraph import ResolutionGraph
+from restmap.resolver.nodes import EndpointNode
+from restmap.resolver.nodes.RateLimit import RateLimit
+from restmap.sink.MemorySink import MemorySink
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+class TestRetryAfter:
+
+    def test_seconds(self):
+        assert parse_retry_after(' 12 ') == 12.0
+
+    def test_http_date(self):
+        date = email.utils.formatdate(time.time() + 30, usegmt=True)
+        assert 28 <= parse_retry_after(date) <= 30
+
+    @pytest.mark.parametrize('value', [None, '', 'soon'])
+    def test_invalid(self, value):
+        assert parse_retry_after(value) is None
+
+
+class TestRateLimit:
+
+    def test_from_template(self):
+        assert RateLimit.from_template({'rate': 5, 'max_concurrency': 20}) == RateLimit(rate=5, max_concurrency=20)
+        assert RateLimit.from_template(None) == RateLimit()
+
+    @pytest.mark.parametrize('options', [{'rate': 0}, {'concurrency': 20}, {'min_concurrency': 0}, {'decrease': 1}])
+    def test_rejects_invalid(self, options):
+        with pytest.raises(ValueError):
+            RateLimit(**options)
+
+
+class TestHostLimiter:
+
+    def test_token_bucket(self):
+        async def acquire_all():
+            limiter = HostLimiter(RateLimit(rate=50, burst=1, max_concurrency=10))
+            started = time.perf_counter()
+            for _ in range(6):
+                await limiter.release(await limiter.acquire(), 200)
+            return time.perf_counter() - started
+        assert run(acquire_all()) >= 0.09, "requests must not exceed the rate of the bucket"
+
+    def test_additive_increase(self):
+        async def succeed():
+            limiter = HostLimiter(RateLimit(concurrency=2, max_concurrency=3))
+            for _ in range(20):
+                await limiter.release(await limiter.acquire(), 200)
+            return limiter.limit
+        assert run(succeed()) == 3, "successes must grow the window up to max_concurrency"
+
+    def test_multiplicative_decrease_once_per_overload(self):
+        async def throttle():
+            limiter = HostLimiter(RateLimit(concurrency=8, max_concurrency=8))
+            started = [await limiter.acquire() for _ in range(4)]
+            for start in started:
+                await limiter.release(start, 429)
+            return limiter
+        limiter = run(throttle())
+        assert limiter.limit == 4, "concurrent throttles must shrink the window once"
+        assert limiter.throttled == 4
+
+    def test_window_bounds_in_flight(self):
+        async def acquire():
+            limiter = HostLimiter(RateLimit(concurrency=2, max_concurrency=2))
+            await limiter.acquire()
+            await limiter.acquire()
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(limiter.acquire(), 0.05)
+        run(acquire())
+
+    def test_retry_after_pauses_host(self):
+        async def pause():
+            limiter = HostLimiter()
+            delay = await limiter.release(await limiter.acquire(), 503, '0.1')
+            started = time.perf_counter()
+            await limiter.acquire()
+            return delay, time.perf_counter() - started
+        delay, waited = run(pause())
+        assert delay == 0.1 and waited >= 0.09
+
+
+class ThrottlingFetcher(BaseFetcher):
+    """Throttles the first requests with a Retry-After header"""
+    def __init__(self, throttled: int):
+        self.remaining = throttled
+
+    async def fetch(self, endpoint, url, params=None) -> Response:
+        if self.remaining:
+            self.remaining -= 1
+            return Response(endpoint.name, url, 429, {'retry-after': '0'}, b'', params)
+        return Response(endpoint.name, url, 200, {}, json.dumps({'page': params['page']}).encode(), params)
+
+@pytest.fixture
+def graph() -> ResolutionGraph:
+    graph = ResolutionGraph()
+    base = EndpointNode.BaseURLNode(
+        name='baseurl', kind='baseurl', url='https://management.azure.com',
+        rate_limit=RateLimit(concurrency=2, retries=2)
+    )
+    pages = EndpointNode.RelativeURLNode(
+        name='pages', kind='relativeurl', base=base, relative='/pages/{page}', matrix={'page': list(range(5))}
+    )
+    graph.add_endpoint(base)
+    graph.add_endpoint(pages)
+    return graph
+
+class TestExecutorThrottling:
+
+    def test_retries_throttled_requests(self, graph: ResolutionGraph):
+        sink = MemorySink()
+        stats = LocalExecutor(sink, fetcher=ThrottlingFetcher(3)).run(graph)
+        assert stats.succeeded == 5 and stats.failed == 0
+        assert stats.throttled == 3 and stats.retries == 3
+
+    def test_gives_up_after_retries(self, graph: ResolutionGraph):
+        stats = LocalExecutor(MemorySink(), fetcher=ThrottlingFetcher(100)).run(graph)
+        assert stats.failed == 5 and stats.errors[0][1] == 'HTTP 429'
+        assert stats.retries == 5 * 2
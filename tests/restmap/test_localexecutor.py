@@ -0,0 +1,165 @@
+"""
+Tests the in-process execution of resolution graphs
+"""
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from restmap.executor.Local.Fetcher import BaseFetcher, Response, URLLibFetcher
+from restmap.executor.Local.LocalExecutor import LocalExecutor
+from restmap.executor.Local.SessionFetcher import SessionFetcher
+from restmap.resolver.ResolutionGraph import ResolutionGraph
+from restmap.resolver.nodes import EndpointNode
+from restmap.resolver.nodes.ParamNode import ParamNode
+from restmap.resolver.nodes.resolvers.EndpointResolver import EndpointResolver
+from restmap.resolver.nodes.resolvers.ResolverCache import ResolverCache
+from restmap.sink.MemorySink import MemorySink
+
+USERS = list(range(20))
+
+class FakeFetcher(BaseFetcher):
+    """Serves the user list and one record per user scope, recording the requests in flight"""
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def fetch(self, endpoint, url, params=None) -> Response:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.001)
+        self.in_flight -= 1
+        if url.endswith('/users/'):
+            body = USERS
+        elif params.get('userId') == 13:
+            return Response(endpoint.name, url, 404, {}, b'', params)
+        else:
+            body = {'user': params['userId'], 'region': params.get('region')}
+        return Response(endpoint.name, url, 200, {}, json.dumps(body).encode(), params)
+
+@pytest.fixture
+def graph() -> ResolutionGraph:
+    graph = ResolutionGraph()
+    base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com')
+    users = EndpointNode.RelativeURLNode(name='userIdEndpoint', kind='relativeurl', base=base, relative='/users/')
+    resolver = EndpointResolver(name='UserIdResolver', kind='EndpointResolver', authentication={}, endpoint=users)
+    param = ParamNode(name='userId', type='Int', resolver=resolver)
+    scope = EndpointNode.RelativeURLNode(
+        name='scope', kind='relativeurl', base=base, relative='/{region}/scope/{userId}',
+        params=[param], matrix={'region': ['eu', 'us']}
+    )
+    for endpoint in (base, users):
+        graph.add_endpoint(endpoint)
+    graph.add_resolver(resolver)
+    graph.add_parameter(param)
+    graph.add_endpoint(scope)
+    return graph
+
+class TestLocalExecutor:
+
+    def test_executes_all_stages(self, graph: ResolutionGraph):
+        sink = MemorySink()
+        stats = LocalExecutor(sink, fetcher=FakeFetcher()).run(graph)
+        responses = sink.by_endpoint()
+        assert len(responses['userIdEndpoint']) == 1
+        assert len(responses['scope']) == 2 * (len(USERS) - 1), "each resolved user must be fetched for each region"
+        assert stats.requests == 1 + 2 * len(USERS)
+        assert stats.failed == 2 and stats.errors[0][1] == 'HTTP 404'
+        assert len(stats.stages) == len(graph.execution_stages())
+
+    def test_concurrency_limit(self, graph: ResolutionGraph):
+        fetcher = FakeFetcher()
+        LocalExecutor(MemorySink(), fetcher=fetcher, concurrency=3, batch_size=7).run(graph)
+        assert 1 < fetcher.max_in_flight <= 3, "requests must run concurrently within the global limit"
+
+    def test_failing_fetcher(self, graph: ResolutionGraph):
+        class BrokenFetcher(FakeFetcher):
+            async def fetch(self, endpoint, url, params=None):
+                if 'scope' in url:
+                    raise ConnectionError("unreachable")
+                return await super().fetch(endpoint, url, params)
+        sink = MemorySink()
+        stats = LocalExecutor(sink, fetcher=BrokenFetcher(), max_errors=5).run(graph)
+        assert stats.failed == 2 * len(USERS) and len(stats.errors) == 5
+        assert len(sink) == 1
+
+    def test_resolves_fresh_records_with_cache(self, graph: ResolutionGraph):
+        class ChangingFetcher(FakeFetcher):
+            users = [1, 2, 3]
+            async def fetch(self, endpoint, url, params=None):
+                if url.endswith('/users/'):
+                    return Response(endpoint.name, url, 200, {}, json.dumps(self.users).encode(), params)
+                return await super().fetch(endpoint, url, params)
+        cache = ResolverCache()
+        fetcher = ChangingFetcher()
+        LocalExecutor(MemorySink(), fetcher=fetcher, cache=cache).run(graph)
+        fetcher.users = [7, 8]
+        sink = MemorySink()
+        LocalExecutor(sink, fetcher=fetcher, cache=cache).run(graph)
+        assert sorted({response.params['userId'] for response in sink.by_endpoint()['scope']}) == [7, 8], \
+            "endpoints must be expanded with the records fetched in the same run"
+
+    def test_invalid_concurrency(self):
+        with pytest.raises(ValueError):
+            LocalExecutor(MemorySink(), concurrency=0)
+
+
+@pytest.fixture
+def server():
+    class Handler(BaseHTTPRequestHandler):
+        # Keeps connections open between requests
+        protocol_version = 'HTTP/1.1'
+        def do_GET(self):
+            status = 200 if self.path.startswith('/users/') else 404
+            body = json.dumps(USERS[:3]).encode()
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, *args):
+            pass
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+class TestURLLibFetcher:
+
+    def test_fetch(self, server: str):
+        endpoint = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url=server)
+        async def fetch(path):
+            return await URLLibFetcher(timeout=5).fetch(endpoint, server + path)
+        response = asyncio.run(fetch('/users/'))
+        assert response.ok and response.json() == USERS[:3]
+        assert asyncio.run(fetch('/other')).status == 404, "error status codes must be returned as responses"
+
+
+class TestSessionFetcher:
+
+    def test_reuses_connections(self, server: str):
+        base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url=server, pool_size=2)
+        endpoints = [
+            EndpointNode.RelativeURLNode(name=f"users{i}", kind='relativeurl', base=base, relative='/users/{page}')
+            for i in range(3)
+        ]
+        fetcher = SessionFetcher(timeout=5)
+        session = fetcher.session(base)
+        async def fetch_all():
+            responses = await asyncio.gather(*(
+                fetcher.fetch(endpoint, endpoint.build_url({'page': page}))
+                for endpoint in endpoints for page in range(10)
+            ))
+            await fetcher.close()
+            return responses
+        responses = asyncio.run(fetch_all())
+        assert all(response.ok for response in responses)
+        assert 1 <= session.connections <= 2, "endpoints of a base must share its pool of keep-alive connections"
+
+    def test_executor_default(self, graph: ResolutionGraph, server: str):
+        graph.get_endpoint('baseurl').url = server
+        sink = MemorySink()
+        stats = LocalExecutor(sink).run(graph)
+        assert stats.succeeded == 1, "the user list must be fetched through the default session fetcher"
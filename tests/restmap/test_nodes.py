@@ -0,0 +1,140 @@
+"""
+Tests the node types placed on the ResolutionGraph
+"""
+import os
+import subprocess
+import sys
+import pytest
+from restmap.resolver.nodes import EndpointNode
+from restmap.resolver.nodes.ParamNode import ParamNode
+from restmap.resolver.nodes.URLTemplate import URLTemplate
+from restmap.resolver.nodes.resolvers.DBResolver import DBResolver
+
+@pytest.fixture
+def base():
+    return EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com')
+
+@pytest.fixture
+def matrix_endpoint(base: EndpointNode.BaseURLNode):
+    return EndpointNode.RelativeURLNode(
+        name='usage',
+        kind='relativeurl',
+        base=base,
+        relative='/regions/{region}/tenants/{tenant}/usage',
+        matrix={'region': ['westeurope', 'eastus'], 'tenant': ['a', 'b', 'c']},
+    )
+
+# Prints the bytes allocated per RelativeURLNode of a large resolution graph
+FOOTPRINT_SCRIPT = """
+import tracemalloc
+from restmap.resolver.nodes import EndpointNode
+from restmap.resolver.nodes.ParamNode import ParamNode
+from restmap.resolver.nodes.resolvers.DBResolver import DBResolver
+
+base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com')
+resolver = DBResolver(
+    name='DBReservationLoader', kind='DatabaseResolver', authentication='NameAndKey',
+    connectionstring='connection', table={{'name': 'Configuration', 'col': ['Id']}}
+)
+param = ParamNode(name='reservationOrderId', type='String', resolver=resolver)
+tracemalloc.start()
+start, _ = tracemalloc.get_traced_memory()
+nodes = [
+    EndpointNode.RelativeURLNode(
+        name=f'endpoint{{i}}', kind='relativeurl', base=base,
+        relative=f'/providers/{{i}}/reservation/{{{{reservationOrderId}}}}', params=[param]
+    )
+    for i in range({count})
+]
+end, _ = tracemalloc.get_traced_memory()
+print((end - start) / len(nodes))
+"""
+
+class TestMatrix:
+
+    def test_expand_is_lazy(self, matrix_endpoint: EndpointNode.RelativeURLNode):
+        urls = matrix_endpoint.expand()
+        assert next(urls) == 'https://management.azure.com/regions/westeurope/tenants/a/usage'
+
+    def test_expand_all_combinations(self, matrix_endpoint: EndpointNode.RelativeURLNode):
+        urls = list(matrix_endpoint.expand())
+        assert len(urls) == matrix_endpoint.matrix_size == 6
+        assert len(set(urls)) == 6, "each combination must produce a distinct url"
+
+    def test_expand_with_params(self, base: EndpointNode.BaseURLNode):
+        endpoint = EndpointNode.RelativeURLNode(
+            name='scope', kind='relativeurl', base=base, 
+            relative='/{region}/scope/{userId}', matrix={'region': ['eu']}
+        )
+        assert list(endpoint.expand({'userId': 7})) == ['https://management.azure.com/eu/scope/7']
+
+    def test_without_matrix(self, base: EndpointNode.BaseURLNode):
+        endpoint = EndpointNode.RelativeURLNode(name='users', kind='relativeurl', base=base, relative='/users/')
+        assert list(endpoint.expand()) == ['https://management.azure.com/users/']
+
+
+class TestFootprint:
+    """
+    Memory benchmark of the node representation. Run with `-s` to
+    print the per-node footprint of a large resolution graph.
+    """
+    count = 50_000
+
+    @pytest.mark.parametrize('node_type', [EndpointNode.BaseURLNode, EndpointNode.RelativeURLNode, ParamNode, DBResolver])
+    def test_nodes_are_slotted(self, node_type):
+        assert '__dict__' not in dir(node_type), "nodes must not carry a per instance __dict__"
+
+    def test_repeated_strings_are_interned(self, base: EndpointNode.BaseURLNode):
+        kinds = [EndpointNode.RelativeURLNode(name=f'e{i}', kind=''.join(['relative', 'url']), base=base, relative='/').kind for i in range(2)]
+        assert kinds[0] is kinds[1]
+
+    def test_per_node_footprint(self):
+        # Measured in a fresh interpreter, the allocations of earlier tests must not skew it
+        script = FOOTPRINT_SCRIPT.format(count=self.count)
+        result = subprocess.run(
+            [sys.executable, '-c', script], capture_output=True, text=True, check=True,
+            env={**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}
+        )
+        per_node = float(result.stdout)
+        print(f"\nRelativeURLNode footprint: {per_node:.0f} bytes per node over {self.count} nodes")
+        assert per_node < 400, f"node footprint regressed to {per_node:.0f} bytes"
+
+
+class TestURLTemplate:
+
+    @pytest.fixture
+    def scope(self, base: EndpointNode.BaseURLNode):
+        return EndpointNode.RelativeURLNode(name='scope', kind='relativeurl', base=base, relative='/scope/{userId}')
+
+    @pytest.mark.parametrize('template, values', [
+        ('/scope/{userId}', {'userId': 7}),
+        ('/users/', {}),
+        ('/{region}/scope/{userId}/{region}', {'region': 'eu', 'userId': 'a'}),
+        ('/scope/{userId:05d}', {'userId': 7}),
+        ('/scope/{userId!r}', {'userId': 'a'}),
+    ])
+    def test_matches_str_format(self, template: str, values: dict):
+        assert URLTemplate(template, prefix='https://host').format(values) == 'https://host' + template.format(**values)
+
+    def test_template_compiled_once(self, scope: EndpointNode.RelativeURLNode):
+        assert scope.url_template is scope.url_template
+        assert scope.url_template.prefix == 'https://management.azure.com'
+
+    def test_build_urls_from_column(self, scope: EndpointNode.RelativeURLNode):
+        urls = scope.build_urls(range(3))
+        assert urls == [f'https://management.azure.com/scope/{i}' for i in range(3)]
+
+    def test_build_urls_from_mappings(self, scope: EndpointNode.RelativeURLNode):
+        assert scope.build_urls([{'userId': 1}, {'userId': 2}]) == [
+            'https://management.azure.com/scope/1', 'https://management.azure.com/scope/2'
+        ]
+        assert scope.build_urls([]) == []
+
+    def test_column_requires_field(self, base: EndpointNode.BaseURLNode):
+        endpoint = EndpointNode.RelativeURLNode(name='e', kind='relativeurl', base=base, relative='/{a}/{b}')
+        with pytest.raises(ValueError):
+            endpoint.build_urls([1, 2])
+        with pytest.raises(KeyError):
+            endpoint.build_urls([1], field='a')
+        repeated = EndpointNode.RelativeURLNode(name='r', kind='relativeurl', base=base, relative='/{a}/x/{a}')
+        assert repeated.build_urls([1]) == ['https://management.azure.com/1/x/1']
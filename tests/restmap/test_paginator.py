@@ -0,0 +1,197 @@
+"""
+Tests the declarative pagination of list endpoints
+"""
+import asyncio
+import json
+import threading
+from urllib.parse import parse_qs, urlsplit
+import pytest
+from restmap.executor.Local.Fetcher import BaseFetcher, Response
+from restmap.executor.Local.LocalExecutor import LocalExecutor
+from restmap.executor.Local.Paginator import next_link, paginate, with_query
+from restmap.resolver.ResolutionGraph import ResolutionGraph
+from restmap.resolver.nodes import EndpointNode
+from restmap.resolver.nodes.EndpointOptions import EndpointOptions
+from restmap.resolver.nodes.Pagination import Pagination
+from restmap.resolver.nodes.RateLimit import RateLimit
+from restmap.sink.MemorySink import MemorySink
+
+RECORDS = list(range(23))
+URL = 'https://management.azure.com/items?api-version=1'
+
+class PagedApi:
+    """Serves RECORDS in pages of any of the pagination types, recording the requests"""
+    def __init__(self, size: int = 5):
+        self.size = size
+        self.requested = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, url: str) -> Response:
+        self.requested.append(url)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.001)
+        finally:
+            # Pages requested beyond the last one are cancelled while in flight
+            self.in_flight -= 1
+        query = {key: values[0] for key, values in parse_qs(urlsplit(url).query).items()}
+        start = int(query.get('offset', query.get('cursor', query.get('skip', 0))))
+        limit = int(query.get('limit', self.size))
+        records = RECORDS[start:start + limit]
+        following = start + limit if start + limit < len(RECORDS) else None
+        body = {'value': records, 'count': len(RECORDS), 'next': following}
+        headers = {}
+        if following is not None:
+            body['nextLink'] = with_query(url, {'skip': following})
+            headers['Link'] = f'<{with_query(url, {"skip": following})}>; rel="next", <{URL}>; rel="first"'
+        return Response('items', url, 200, headers, json.dumps(body).encode())
+
+def collect(api: PagedApi, pagination: Pagination) -> list:
+    async def pages():
+        return [page async for page in paginate(api, URL, pagination)]
+    return asyncio.run(pages())
+
+def records(pages: list) -> list:
+    return [record for page in pages for record in page.json()['value']]
+
+class TestPaginate:
+
+    @pytest.mark.parametrize('pagination', [
+        Pagination(type='cursor'),
+        Pagination(type='nextLink'),
+        Pagination(type='link'),
+        Pagination(type='offset', limit=5, records='$.value[*]'),
+        Pagination(type='offset', limit=5, records='$.value[*]', total='$.count', parallel=3),
+    ])
+    def test_reads_all_pages(self, pagination: Pagination):
+        pages = collect(PagedApi(), pagination)
+        assert records(pages) == RECORDS, "pages must be yielded in order without gaps"
+        assert [page.page for page in pages] == list(range(5))
+
+    def test_keeps_query(self):
+        pages = collect(PagedApi(), Pagination(type='cursor'))
+        assert all('api-version=1' in page.url for page in pages)
+
+    def test_offset_parallel(self):
+        api = PagedApi()
+        collect(api, Pagination(type='offset', limit=5, records='$.value[*]', total='$.count', parallel=3))
+        assert api.max_in_flight == 3, "offset pages must be requested concurrently"
+        assert len(api.requested) == 5, "no pages beyond the total must be requested"
+
+    def test_offset_without_total_stops_at_short_page(self):
+        api = PagedApi()
+        pages = collect(api, Pagination(type='offset', limit=5, records='$.value[*]', parallel=4))
+        assert records(pages) == RECORDS
+
+    def test_prefetches_next_page(self):
+        api = PagedApi()
+        async def first_page():
+            pages = paginate(api, URL, Pagination(type='nextLink'))
+            await pages.__anext__()
+            # The consumer handles the first page while the second is requested
+            await asyncio.sleep(0.01)
+            requested = len(api.requested)
+            await pages.aclose()
+            return requested
+        assert asyncio.run(first_page()) == 2
+
+    def test_max_pages(self):
+        api = PagedApi()
+        pages = collect(api, Pagination(type='cursor', max_pages=2))
+        assert len(pages) == 2 and len(api.requested) == 2
+
+    def test_stops_at_failed_page(self):
+        async def failing(url):
+            return Response('items', url, 500, {}, b'')
+        pages = collect(failing, Pagination(type='offset', parallel=3))
+        assert len(pages) == 1
+
+
+class TestHelpers:
+
+    def test_with_query(self):
+        assert with_query('https://a.b/c?x=1&cursor=a', {'cursor': 'b'}) == 'https://a.b/c?x=1&cursor=b'
+
+    def test_next_link(self):
+        header = '<https://a.b/c?page=1>; rel="prev", <https://a.b/c?page=3>; rel="next"'
+        assert next_link(header) == 'https://a.b/c?page=3'
+        assert next_link('<https://a.b/c>; rel="last"') is None
+        assert next_link(None) is None
+
+    def test_defaults_by_type(self):
+        assert Pagination(type='cursor').param == 'cursor'
+        assert Pagination(type='nextLink').next == '$.nextLink'
+        with pytest.raises(ValueError):
+            Pagination(type='page')
+
+
+class TestExecutorPagination:
+
+    def test_writes_every_page(self):
+        api = PagedApi()
+        class Fetcher(BaseFetcher):
+            async def fetch(self, endpoint, url, params=None):
+                return await api(url)
+        graph = ResolutionGraph()
+        base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com')
+        graph.add_endpoint(base)
+        graph.add_endpoint(EndpointNode.RelativeURLNode(
+            name='items', kind='relativeurl', base=base, relative='/items?api-version=1',
+            options=EndpointOptions(pagination=Pagination(type='link'))
+        ))
+        sink = MemorySink()
+        stats = LocalExecutor(sink, fetcher=Fetcher()).run(graph)
+        assert stats.requests == stats.succeeded == 5
+        assert records(sink.responses) == RECORDS
+
+    @pytest.mark.parametrize('concurrency', [1, 2, 3])
+    def test_parallel_pages_of_more_urls_than_slots(self, concurrency: int):
+        api = PagedApi(size=2)
+        class Fetcher(BaseFetcher):
+            async def fetch(self, endpoint, url, params=None):
+                return await api(url)
+        graph = ResolutionGraph()
+        base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com')
+        graph.add_endpoint(base)
+        graph.add_endpoint(EndpointNode.RelativeURLNode(
+            name='items', kind='relativeurl', base=base, relative='/items?api-version=1&region={region}',
+            matrix={'region': ['eu', 'us', 'asia', 'africa']},
+            options=EndpointOptions(pagination=Pagination(type='offset', limit=2, parallel=4, records='$.value[*]'))
+        ))
+        result = {}
+        running = threading.Thread(target=lambda: result.update(stats=LocalExecutor(
+            MemorySink(), fetcher=Fetcher(), concurrency=concurrency
+        ).run(graph)), daemon=True)
+        running.start()
+        running.join(timeout=10)
+        assert not running.is_alive(), "pages must not wait for slots held by the urls waiting for them"
+        assert result['stats'].succeeded == 4 * 12 and result['stats'].failed == 0
+        assert api.max_in_flight <= concurrency
+
+    def test_parallel_pages_within_concurrency(self):
+        api = PagedApi(size=2)
+        throttled = set()
+        class Fetcher(BaseFetcher):
+            async def fetch(self, endpoint, url, params=None):
+                response = await api(url)
+                if url not in throttled:
+                    # Throttles each page once, the retries back off without holding their slot
+                    throttled.add(url)
+                    return Response(response.endpoint, url, 429, {'Retry-After': '0'}, b'')
+                return response
+        graph = ResolutionGraph()
+        base = EndpointNode.BaseURLNode(
+            name='baseurl', kind='baseurl', url='https://management.azure.com',
+            rate_limit=RateLimit(concurrency=10, max_concurrency=10, backoff=0.001)
+        )
+        graph.add_endpoint(base)
+        graph.add_endpoint(EndpointNode.RelativeURLNode(
+            name='items', kind='relativeurl', base=base, relative='/items?api-version=1&region={region}',
+            matrix={'region': ['eu', 'us', 'asia']},
+            options=EndpointOptions(pagination=Pagination(type='offset', limit=2, parallel=4, records='$.value[*]'))
+        ))
+        stats = LocalExecutor(MemorySink(), fetcher=Fetcher(), concurrency=2).run(graph)
+        assert stats.succeeded == 3 * 12 and stats.failed == 0
+        assert api.max_in_flight <= 2, "parallel pages must stay within the global concurrency limit"
@@ -0,0 +1,116 @@
+"""
+Tests the lazy combination of param value streams
+"""
+import itertools
+import pytest
+from restmap.resolver.nodes import EndpointNode
+from restmap.resolver.nodes.ParamNode import ParamNode
+from restmap.resolver.nodes.ParamExpansion import ParamExpansion, ParamFilter
+from restmap.resolver.nodes.resolvers.ResolverNode import ResolverNode
+from restmap.resolver.nodes.resolvers.SharedStream import SharedStream
+
+class CountingStream:
+    """Generates integers recording how many were read"""
+    def __init__(self, size: int):
+        self.size = size
+        self.pulled = 0
+
+    def __iter__(self):
+        for i in range(self.size):
+            self.pulled += 1
+            yield i
+
+class StaticResolver(ResolverNode):
+    __slots__ = ('values',)
+
+    def resolve(self, provider):
+        return iter(self.values)
+
+def make_param(name: str, values) -> ParamNode:
+    resolver = StaticResolver(name=f"{name}Resolver", kind='static', authentication={})
+    resolver.values = values
+    return ParamNode(name=name, type='Int', resolver=resolver)
+
+class TestParamExpansion:
+
+    def test_product_streams_first_param(self):
+        users, scopes = CountingStream(100_000), CountingStream(50)
+        combinations = ParamExpansion().expand({'userId': iter(users), 'scope': iter(scopes)})
+        first = list(itertools.islice(combinations, 120))
+        assert first[0] == {'userId': 0, 'scope': 0}
+        assert first[-1] == {'userId': 2, 'scope': 19}
+        assert users.pulled == 3, "the outer param must be streamed instead of materialized"
+        assert scopes.pulled == 50
+
+    def test_product_all_combinations(self):
+        combinations = list(ParamExpansion().expand({'a': iter([1, 2]), 'b': iter('xyz')}))
+        assert len(combinations) == 6
+        assert {'a': 2, 'b': 'z'} in combinations
+
+    def test_product_with_empty_param(self):
+        assert list(ParamExpansion().expand({'a': iter([1, 2]), 'b': iter([])})) == []
+
+    def test_product_closes_unread_streams(self):
+        closed = []
+        def source():
+            try:
+                yield from range(10)
+            finally:
+                closed.append(True)
+        stream = SharedStream(source(), consumers=2, buffer_size=2)
+        users, other = stream.subscribe(), stream.subscribe()
+        assert list(ParamExpansion().expand({'userId': users, 'scope': iter([])})) == []
+        assert list(other) == list(range(10)), "the unread subscription must not hold back the other consumers"
+        assert stream.finished and closed
+
+    def test_without_params(self):
+        assert list(ParamExpansion().expand({})) == [{}]
+
+    def test_zip(self):
+        expansion = ParamExpansion(mode='zip')
+        combinations = list(expansion.expand({'a': iter([1, 2, 3]), 'b': iter('xy')}))
+        assert combinations == [{'a': 1, 'b': 'x'}, {'a': 2, 'b': 'y'}]
+
+    def test_filter_value(self):
+        expansion = ParamExpansion(filters=(ParamFilter('a', '!=', 2),))
+        assert [c['a'] for c in expansion.expand({'a': iter([1, 2, 3])})] == [1, 3]
+
+    def test_filter_other_field(self):
+        expansion = ParamExpansion(filters=(ParamFilter('a', '<', other='b'),))
+        combinations = list(expansion.expand({'a': iter(range(3)), 'b': iter(range(3))}))
+        assert combinations == [{'a': 0, 'b': 1}, {'a': 0, 'b': 2}, {'a': 1, 'b': 2}]
+
+    def test_from_template(self):
+        expansion = ParamExpansion.from_template({'mode': 'zip', 'filter': [{'field': 'a', 'op': 'in', 'value': [1]}]})
+        assert expansion == ParamExpansion('zip', (ParamFilter('a', 'in', [1]),))
+        assert ParamExpansion.from_template(None) == ParamExpansion()
+
+    @pytest.mark.parametrize('expansion', [{'mode': 'cross'}, {'filter': [{'field': 'a', 'op': '=~'}]}])
+    def test_rejects_unknown_semantics(self, expansion):
+        with pytest.raises(ValueError):
+            ParamExpansion.from_template(expansion)
+
+
+class TestEndpointExpansion:
+
+    @pytest.fixture
+    def base(self):
+        return EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com')
+
+    def test_iter_urls(self, base: EndpointNode.BaseURLNode):
+        endpoint = EndpointNode.RelativeURLNode(
+            name='scope', kind='relativeurl', base=base, relative='/{region}/scope/{userId}/{orderId}',
+            params=[make_param('userId', [1, 2]), make_param('orderId', ['a', 'b'])],
+            matrix={'region': ['eu', 'us']},
+            expansion=ParamExpansion(mode='zip'),
+        )
+        urls = list(endpoint.iter_urls())
+        assert urls[:2] == ['https://management.azure.com/eu/scope/1/a', 'https://management.azure.com/us/scope/1/a']
+        assert len(urls) == 4
+
+    def test_defaults_to_product(self, base: EndpointNode.BaseURLNode):
+        endpoint = EndpointNode.RelativeURLNode(
+            name='scope', kind='relativeurl', base=base, relative='/scope/{userId}/{orderId}',
+            params=[make_param('userId', [1, 2]), make_param('orderId', ['a', 'b'])],
+        )
+        assert len(list(endpoint.iter_urls())) == 4
@@ -1,7 +1,9 @@
 from pathlib import Path
+from dataclasses import replace
 import pytest
 from restmap.templateParser.TemplateParser import TemplateSchema, TemplateParser
 from restmap.resolver.ResolutionGraph import ResolutionGraph
+from restmap.resolver.Resolver import Resolver
 from restmap.resolver.nodes import EndpointNode, ParamNode, BaseNode
 from restmap.resolver.nodes.resolvers.ResolverNode import ResolverNode
 from restmap.resolver.nodes.resolvers.EndpointResolver import EndpointResolver
@@ -75,4 +77,48 @@ class TestResolvers:
     def test_remove_resolver(self, graph: ResolutionGraph, resolver: ResolverNode):
         graph.add_resolver(resolver) 
         response = graph.remove_resolver(resolver.name)
-        assert len(graph._resolvers) == 0, "must remove EndpointNode from array of endpoints"
\ No newline at end of file
+        assert len(graph._resolvers) == 0, "must remove EndpointNode from array of endpoints"
+
+class TestDependents:
+
+    @pytest.fixture
+    def resolved(self, template_path: Path) -> ResolutionGraph:
+        template = TemplateParser().load(template_path)
+        return Resolver().resolve(template)
+
+    def test_direct_dependents(self, resolved: ResolutionGraph):
+        assert resolved.get_dependents('resolver', 'UserIdResolver') == {('param', 'userId')}
+        assert resolved.get_dependents('endpoint', 'baseurl') == {
+            ('endpoint', 'reservationlist'), ('endpoint', 'scope'), ('endpoint', 'userIdEndpoint')
+        }
+
+    def test_affected_endpoints(self, resolved: ResolutionGraph):
+        assert set(resolved.get_affected_endpoints('resolver', 'UserIdResolver')) == {'scope'}
+        assert set(resolved.get_affected_endpoints('endpoint', 'userIdEndpoint')) == {'scope'}
+        assert resolved.get_affected('endpoint', 'scope') == set(), "leaf endpoints must not have dependents"
+
+    def test_remove_updates_index(self, resolved: ResolutionGraph):
+        resolved.remove_endpoint('scope')
+        assert resolved.get_affected_endpoints('param', 'userId') == [], "removed endpoints must be dropped from the index"
+        resolved.remove_parameter('userId')
+        assert resolved.get_dependents('resolver', 'UserIdResolver') == set()
+
+    def test_replace_updates_index(self, resolved: ResolutionGraph, param: ParamNode.ParamNode):
+        scope = replace(resolved.get_endpoint('scope'), params=[param])
+        resolved.add_endpoint(scope)
+        assert resolved.get_dependents('param', param.name) == {('endpoint', 'scope')}
+        assert resolved.get_dependents('param', 'userId') == set(), "replaced nodes must be dropped from the index"
+
+    def test_execution_stages(self, resolved: ResolutionGraph):
+        stages = resolved.execution_stages()
+        assert sum(len(stage) for stage in stages) == len(resolved._resolvers) + len(resolved._params) + len(resolved._endpoints)
+        assert [e.name for e in stages[0].endpoints] == ['baseurl'], "nodes without dependencies must form the first stage"
+        assert {r.name for r in stages[0].resolvers} == {'DBReservationLoader', 'DBOtherResolver'}
+        position = {
+            (section, node.name): i for i, stage in enumerate(stages)
+            for section, nodes in [('resolver', stage.resolvers), ('param', stage.params), ('endpoint', stage.endpoints)]
+            for node in nodes
+        }
+        for (section, name), i in position.items():
+            for dependent in resolved.get_dependents(section, name):
+                assert position[dependent] > i, "dependents must be placed in a later stage"
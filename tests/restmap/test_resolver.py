@@ -4,6 +4,7 @@ from restmap.resolver.nodes.resolvers import ResolverNode
 from restmap.templateParser.TemplateParser import TemplateSchema
 from restmap.manager.Manager import Manager
 from restmap.resolver.Resolver import Resolver
+from restmap.resolver.dependencies import CircularDependencyError
 from restmap.resolver.ResolutionGraph import ResolutionGraph
 from restmap.resolver.nodes import EndpointNode, ParamNode
 from restmap.templateParser.TemplateParser import TemplateParser
@@ -47,4 +48,96 @@ class TestNodeResolution:
         # response = manager._resolver._resolve_resolver(name='test', resolver=resolver_dict)
         # assert isinstance(response, EndpointNode.EndpointNode)
         # manager._resolver._resolve_resolver()
-        assert False
\ No newline at end of file
+        assert False
+
+class TestResolve:
+
+    def test_resolve_orders_components(self, template: TemplateSchema):
+        graph = Resolver().resolve(template)
+        assert set(graph._endpoints) == {'baseurl', 'reservationlist', 'scope', 'userIdEndpoint'}
+        assert set(graph._params) == {'reservationOrderId', 'userId', 'other'}
+        assert graph._resolvers['UserIdResolver'].endpoint is graph._endpoints['userIdEndpoint']
+        assert graph._endpoints['scope'].params[0] is graph._params['userId']
+
+    def test_resolve_keeps_template_reusable(self, template: TemplateSchema):
+        Resolver().resolve(template)
+        graph = Resolver().resolve(template)
+        assert isinstance(graph._endpoints['scope'].base, EndpointNode.BaseURLNode)
+
+    def test_resolve_matrix_endpoint(self, template: TemplateSchema):
+        template.config.endpoints.append({
+            'usage': {'kind': 'relativeurl', 'base': 'baseurl', 'relative': '/{region}/usage', 'matrix': {'region': ['eu', 'us']}}
+        })
+        graph = Resolver().resolve(template)
+        usage = graph.get_endpoint('usage')
+        assert isinstance(usage, EndpointNode.RelativeURLNode), "a matrix must resolve into a single node"
+        assert usage.matrix_size == 2
+
+    def test_resolve_expansion(self, template: TemplateSchema):
+        template.config.endpoints[2]['scope']['expansion'] = {'mode': 'zip', 'filter': [{'field': 'userId', 'op': '!=', 'value': 0}]}
+        graph = Resolver().resolve(template)
+        expansion = graph.get_endpoint('scope').expansion
+        assert expansion.mode == 'zip' and len(expansion.filters) == 1
+
+    def test_resolve_rate_limit(self, template: TemplateSchema):
+        template.config.endpoints[0]['baseurl']['rate_limit'] = {'rate': 20, 'max_concurrency': 32}
+        graph = Resolver().resolve(template)
+        assert graph.get_endpoint('baseurl').rate_limit.max_concurrency == 32
+        assert graph.get_endpoint('scope').base.rate_limit.rate == 20
+
+    def test_resolve_pagination(self, template: TemplateSchema):
+        template.config.endpoints[3]['userIdEndpoint']['pagination'] = {'type': 'offset', 'limit': 50, 'parallel': 4}
+        pagination = Resolver().resolve(template).get_endpoint('userIdEndpoint').pagination
+        assert (pagination.type, pagination.param, pagination.parallel) == ('offset', 'offset', 4)
+
+    def test_resolve_streaming(self, template: TemplateSchema):
+        template.config.endpoints[3]['userIdEndpoint']['streaming'] = {'records': '$.value[*]', 'batch_size': 50}
+        streaming = Resolver().resolve(template).get_endpoint('userIdEndpoint').streaming
+        assert (streaming.records, streaming.batch_size) == ('$.value[*]', 50)
+
+    def test_resolve_watermark(self, template: TemplateSchema):
+        template.config.endpoints[3]['userIdEndpoint']['watermark'] = {'param': 'since', 'value': '$.modified', 'initial': 0}
+        watermark = Resolver().resolve(template).get_endpoint('userIdEndpoint').watermark
+        assert (watermark.param, watermark.mode, watermark.initial) == ('since', 'max', 0)
+
+    def test_resolve_conditional(self, template: TemplateSchema):
+        template.config.endpoints[3]['userIdEndpoint']['conditional'] = True
+        assert Resolver().resolve(template).get_endpoint('userIdEndpoint').conditional
+
+    def test_resolve_reports_cycle(self, template: TemplateSchema):
+        template.config.endpoints[3]['userIdEndpoint']['params'] = [{'userId': {'param': 'userId'}}]
+        with pytest.raises(CircularDependencyError) as error:
+            Resolver().resolve(template)
+        assert ('endpoint', 'userIdEndpoint') in error.value.cycle
+        assert ('resolver', 'UserIdResolver') in error.value.cycle
+
+
+class TestResolveDelta:
+
+    @pytest.fixture
+    def previous(self, template: TemplateSchema) -> ResolutionGraph:
+        return Resolver().resolve(template)
+
+    def test_unchanged_template_reuses_nodes(self, previous: ResolutionGraph, template: TemplateSchema):
+        graph = Resolver().resolve_delta(previous, template)
+        assert graph is not previous
+        assert all(graph._endpoints[name] is node for name, node in previous._endpoints.items())
+        assert all(graph._resolvers[name] is node for name, node in previous._resolvers.items())
+
+    def test_changed_node_rebuilds_dependents(self, previous: ResolutionGraph, template: TemplateSchema):
+        template.config.endpoints[3]['userIdEndpoint']['relative'] = '/v2/users/'
+        graph = Resolver().resolve_delta(previous, template)
+        assert graph._endpoints['userIdEndpoint'].relative == '/v2/users/'
+        assert graph._resolvers['UserIdResolver'].endpoint is graph._endpoints['userIdEndpoint']
+        assert graph._endpoints['scope'] is not previous._endpoints['scope'], "dependents of a changed node must be rebuilt"
+        assert graph._endpoints['scope'].params[0] is graph._params['userId']
+        assert graph._endpoints['reservationlist'] is previous._endpoints['reservationlist'], "unaffected nodes must be reused"
+        assert graph._endpoints['baseurl'] is previous._endpoints['baseurl']
+
+    def test_removed_node(self, previous: ResolutionGraph, template: TemplateSchema):
+        del template.config.params['other']
+        del template.config.resolvers['DBOtherResolver']
+        graph = Resolver().resolve_delta(previous, template)
+        assert 'other' not in graph._params
+        assert 'DBOtherResolver' not in graph._resolvers
+        assert 'other' in previous._params, "the previous graph must be left untouched"
@@ -0,0 +1,106 @@
+"""
+Tests the memoization of resolver outputs
+"""
+import pytest
+from pathlib import Path
+from restmap.resolver.nodes import EndpointNode
+from restmap.resolver.nodes.resolvers.EndpointResolver import EndpointResolver
+from restmap.resolver.nodes.resolvers.ResolverCache import ResolverCache
+from restmap.resolver.nodes.resolvers.ResolverNode import ResolverNode
+
+class CountingResolver(ResolverNode):
+    """Resolver recording how often it was executed"""
+    __slots__ = ('executions',)
+
+    def resolve(self, provider):
+        self.executions = getattr(self, 'executions', 0) + 1
+        yield from provider
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture()
+def clock():
+    return Clock()
+
+@pytest.fixture()
+def cache(clock: Clock):
+    return ResolverCache(maxsize=2, default_ttl=60, clock=clock)
+
+def make_resolver(name: str = 'UserIdResolver', kind: str = 'EndpointResolver', **options) -> CountingResolver:
+    return CountingResolver(name=name, kind=kind, authentication={}, **options)
+
+class TestResolverCache:
+
+    def test_hit_skips_resolution(self, cache: ResolverCache):
+        resolver = make_resolver()
+        assert list(cache.resolve(resolver, [1, 2, 3])) == [1, 2, 3]
+        assert list(cache.resolve(resolver, [4])) == [1, 2, 3]
+        assert resolver.executions == 1, "cached resolvers must be executed once per ttl"
+
+    def test_partial_reads_are_not_cached(self, cache: ResolverCache):
+        resolver = make_resolver()
+        next(cache.resolve(resolver, [1, 2, 3]))
+        assert list(cache.resolve(resolver, [1, 2, 3])) == [1, 2, 3]
+        assert resolver.executions == 2
+
+    def test_expires_after_ttl(self, cache: ResolverCache, clock: Clock):
+        resolver = make_resolver(ttl=10)
+        list(cache.resolve(resolver, [1]))
+        clock.now += 9
+        assert list(cache.resolve(resolver, [2])) == [1]
+        clock.now += 1
+        assert list(cache.resolve(resolver, [2])) == [2], "expired entries must be resolved again"
+
+    def test_zero_ttl_disables_cache(self, cache: ResolverCache):
+        resolver = make_resolver(ttl=0)
+        list(cache.resolve(resolver, [1]))
+        assert list(cache.resolve(resolver, [2])) == [2]
+        assert len(cache) == 0
+
+    def test_keyed_by_inputs(self, cache: ResolverCache):
+        list(cache.resolve(make_resolver(), [1]))
+        assert list(cache.resolve(make_resolver(kind='DatabaseResolver'), [2])) == [2], "resolvers with other inputs must not share entries"
+        assert list(cache.resolve(make_resolver(descr='other', ttl=30), [3])) == [1]
+
+    def test_evicts_least_recently_used(self, cache: ResolverCache):
+        first, second, third = (make_resolver(name) for name in ('first', 'second', 'third'))
+        list(cache.resolve(first, [1]))
+        list(cache.resolve(second, [2]))
+        list(cache.resolve(first, [1]))
+        list(cache.resolve(third, [3]))
+        assert len(cache) == 2
+        list(cache.resolve(first, [1]))
+        list(cache.resolve(second, [2]))
+        assert (first.executions, second.executions) == (1, 2)
+
+    def test_disk_tier_survives_runs(self, clock: Clock, tmp_path: Path):
+        resolver = make_resolver()
+        list(ResolverCache(directory=tmp_path, clock=clock).resolve(resolver, [1, 2]))
+        cache = ResolverCache(directory=tmp_path, clock=clock)
+        assert list(cache.resolve(resolver, [3])) == [1, 2], "entries must be read from the disk tier"
+        assert resolver.executions == 1
+        cache.clear()
+        assert list(tmp_path.glob('*.pickle')) == []
+
+    def test_shared_stream_uses_cache(self, cache: ResolverCache):
+        resolver = make_resolver()
+        list(resolver.subscribe([1, 2], cache=cache))
+        assert list(resolver.subscribe([3], cache=cache)) == [1, 2]
+
+    def test_rejects_endpoint_resolvers(self, cache: ResolverCache):
+        base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://x')
+        users = EndpointNode.RelativeURLNode(name='users', kind='relativeurl', base=base, relative='/users/')
+        resolver = EndpointResolver(name='UserIdResolver', kind='EndpointResolver', authentication={}, endpoint=users)
+        with pytest.raises(ValueError):
+            cache.resolve(resolver, None)
+
+        class Provider:
+            def resolve_endpoint(self, endpoint):
+                return [7, 8]
+        assert list(resolver.subscribe(Provider(), cache=cache)) == [7, 8]
+        assert len(cache) == 0, "shared resolutions must bypass the cache for endpoint resolvers"
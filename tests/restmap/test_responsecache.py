@@ -0,0 +1,143 @@
+"""
+Tests the conditional requests of endpoints and their response cache
+"""
+import json
+from pathlib import Path
+import pytest
+from restmap.executor.Local.Fetcher import BaseFetcher, Response
+from restmap.executor.Local.LocalExecutor import LocalExecutor
+from restmap.resolver.ResolutionGraph import ResolutionGraph
+from restmap.resolver.nodes import EndpointNode
+from restmap.resolver.nodes.EndpointOptions import EndpointOptions
+from restmap.resolver.nodes.Pagination import Pagination
+from restmap.resolver.nodes.ParamNode import ParamNode
+from restmap.resolver.nodes.resolvers.EndpointResolver import EndpointResolver
+from restmap.sink.LocalStore import LocalStore
+from restmap.sink.MemorySink import MemorySink
+from restmap.state.ResponseCache import ResponseCache
+
+USERS = list(range(5))
+
+
+def response(url: str, status: int = 200, headers: dict = None, body: bytes = b'[1, 2]') -> Response:
+    return Response('users', url, status, headers or {}, body)
+
+
+class TestResponseCache:
+
+    def test_commits_staged(self):
+        cache = ResponseCache()
+        assert cache.stage(response('https://a/users', headers={'etag': '"v1"'}, body=b'[1]'), keep_body=True)
+        assert cache.lookup('https://a/users') is None, "validators must only be stored on commit"
+        assert cache.commit() == 1
+        entry = cache.lookup('https://a/users')
+        assert entry.headers == {'If-None-Match': '"v1"'}
+        assert cache.body(entry) == b'[1]'
+
+    def test_ignores_responses_without_validators(self):
+        cache = ResponseCache()
+        assert not cache.stage(response('https://a/users'))
+        assert cache.commit() == 0
+
+    def test_persists(self, tmp_path: Path):
+        cache = ResponseCache(LocalStore(tmp_path))
+        cache.stage(response('https://a/users', headers={'Last-Modified': 'Sun, 20 Nov 2022 00:00:00 GMT'}))
+        cache.commit()
+        entry = ResponseCache(LocalStore(tmp_path)).lookup('https://a/users')
+        assert entry.headers == {'If-Modified-Since': 'Sun, 20 Nov 2022 00:00:00 GMT'}
+        assert not entry.has_body
+        with pytest.raises(KeyError):
+            ResponseCache(LocalStore(tmp_path)).body(entry)
+
+
+class VersionedFetcher(BaseFetcher):
+    """Serves the users and their scopes with an ETag, answering 304 to its current version"""
+    def __init__(self, version: str = '"v1"'):
+        self.version = version
+        self.conditional = 0
+
+    async def fetch(self, endpoint, url, params=None, headers=None) -> Response:
+        if headers:
+            self.conditional += 1
+            if headers.get('If-None-Match') == self.version:
+                return Response(endpoint.name, url, 304, {'ETag': self.version}, b'', params)
+        body = USERS if url.endswith('/users/') else {'user': params['userId']}
+        return Response(endpoint.name, url, 200, {'ETag': self.version}, json.dumps(body).encode(), params)
+
+def make_graph(conditional_scope: bool = False) -> ResolutionGraph:
+    graph = ResolutionGraph()
+    base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com')
+    users = EndpointNode.RelativeURLNode(
+        name='userIdEndpoint', kind='relativeurl', base=base, relative='/users/', options=EndpointOptions(conditional=True)
+    )
+    resolver = EndpointResolver(name='UserIdResolver', kind='EndpointResolver', authentication={}, endpoint=users)
+    param = ParamNode(name='userId', type='Int', resolver=resolver)
+    scope = EndpointNode.RelativeURLNode(
+        name='scope', kind='relativeurl', base=base, relative='/scope/{userId}', params=[param],
+        options=EndpointOptions(conditional=conditional_scope)
+    )
+    for endpoint in (base, users):
+        graph.add_endpoint(endpoint)
+    graph.add_resolver(resolver)
+    graph.add_parameter(param)
+    graph.add_endpoint(scope)
+    return graph
+
+class FailingSink(MemorySink):
+    def flush(self):
+        raise IOError("bucket unavailable")
+
+class TestExecutorConditional:
+
+    def test_skips_unmodified(self):
+        cache = ResponseCache()
+        fetcher = VersionedFetcher()
+        LocalExecutor(MemorySink(), fetcher=fetcher, response_cache=cache).run(make_graph(conditional_scope=True))
+        assert fetcher.conditional == 0, "the first run must request all urls unconditionally"
+
+        sink = MemorySink()
+        stats = LocalExecutor(sink, fetcher=fetcher, response_cache=cache).run(make_graph(conditional_scope=True))
+        assert stats.not_modified == len(USERS) + 1 and stats.succeeded == len(USERS) + 1
+        assert sink.responses == [], "unmodified records must not be written again"
+
+    def test_resolves_kept_body(self):
+        cache = ResponseCache()
+        LocalExecutor(MemorySink(), fetcher=VersionedFetcher(), response_cache=cache).run(make_graph())
+        sink = MemorySink()
+        stats = LocalExecutor(sink, fetcher=VersionedFetcher(), response_cache=cache).run(make_graph())
+        assert stats.not_modified == 1
+        assert sorted(response.json()['user'] for response in sink.responses) == USERS, \
+            "resolvers must read the records of the kept body of an unmodified endpoint"
+
+    def test_refetches_modified(self):
+        cache = ResponseCache()
+        LocalExecutor(MemorySink(), fetcher=VersionedFetcher(), response_cache=cache).run(make_graph())
+        sink = MemorySink()
+        stats = LocalExecutor(sink, fetcher=VersionedFetcher('"v2"'), response_cache=cache).run(make_graph())
+        assert stats.not_modified == 0
+        assert len([response for response in sink.responses if response.endpoint == 'userIdEndpoint']) == 1
+        assert cache.lookup('https://management.azure.com/users/').etag == '"v2"'
+
+    def test_refetches_missing_body(self):
+        cache = ResponseCache()
+        LocalExecutor(MemorySink(), fetcher=VersionedFetcher(), response_cache=cache).run(make_graph())
+        for key in list(cache.store.list()):
+            if key.endswith('.body'):
+                cache.store.delete(key)
+        sink = MemorySink()
+        stats = LocalExecutor(sink, fetcher=VersionedFetcher(), response_cache=cache).run(make_graph())
+        assert stats.failed == 0 and len(sink.responses) == len(USERS) + 1
+
+    def test_commits_after_flush(self):
+        cache = ResponseCache()
+        with pytest.raises(IOError):
+            LocalExecutor(FailingSink(), fetcher=VersionedFetcher(), response_cache=cache).run(make_graph())
+        assert list(cache.store.list()) == [], "validators must not be stored for records the sink did not persist"
+
+    def test_rejects_paginated(self):
+        base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com')
+        with pytest.raises(ValueError):
+            EndpointNode.RelativeURLNode(
+                name='users', kind='relativeurl', base=base, relative='/users',
+                options=EndpointOptions(conditional=True, pagination=Pagination(type='nextLink', next='$.nextLink'))
+            )
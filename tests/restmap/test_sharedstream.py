@@ -0,0 +1,91 @@
+"""
+Tests the broadcast of a single resolver execution to multiple consumers
+"""
+import threading
+import pytest
+from restmap.resolver.nodes.resolvers.SharedStream import SharedStream
+from restmap.resolver.nodes.resolvers.ResolverNode import ResolverNode
+from restmap.resolver.nodes.ParamNode import ParamNode
+
+class CountingSource:
+    """Iterable recording how often it was read"""
+    def __init__(self, size: int):
+        self.size = size
+        self.pulled = 0
+        self.iterations = 0
+
+    def __iter__(self):
+        self.iterations += 1
+        for i in range(self.size):
+            self.pulled += 1
+            yield i
+
+class StaticResolver(ResolverNode):
+    __slots__ = ()
+
+    def resolve(self, provider):
+        return iter(provider)
+
+def test_source_is_read_once():
+    source = CountingSource(100)
+    stream = SharedStream(source, consumers=3, buffer_size=200)
+    consumers = [stream.subscribe() for _ in range(3)]
+    results = [list(consumer) for consumer in consumers]
+    assert all(result == list(range(100)) for result in results)
+    assert source.iterations == 1 and source.pulled == 100, "the source must be executed once for all consumers"
+    assert stream.finished
+
+def test_backpressure_bounds_buffer():
+    stream = SharedStream(range(1000), consumers=2, buffer_size=8)
+    consumers = [stream.subscribe() for _ in range(2)]
+    results = [None, None]
+    def read(i):
+        results[i] = list(consumers[i])
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    assert results[0] == results[1] == list(range(1000))
+    assert len(stream._buffer) <= 8
+
+def test_full_buffer_in_single_thread_raises():
+    stream = SharedStream(range(100), consumers=2, buffer_size=4)
+    fast, slow = stream.subscribe(), stream.subscribe()
+    with pytest.raises(RuntimeError):
+        list(fast)
+
+def test_spill_to_disk(tmp_path):
+    stream = SharedStream(range(1000), consumers=2, buffer_size=16, spill=True, spill_dir=tmp_path)
+    fast, slow = stream.subscribe(), stream.subscribe()
+    assert list(fast) == list(range(1000))
+    assert stream.spilled > 0, "items the slow consumer did not read must be moved to disk"
+    assert len(stream._buffer) <= 16
+    assert list(slow) == list(range(1000))
+
+def test_late_subscriber():
+    stream = SharedStream(range(10), consumers=1)
+    list(stream.subscribe())
+    with pytest.raises(RuntimeError):
+        stream.subscribe()
+
+def test_errors_reach_all_consumers():
+    def failing():
+        yield 1
+        raise ConnectionError("lost connection")
+    stream = SharedStream(failing(), consumers=2)
+    first, second = stream.subscribe(), stream.subscribe()
+    with pytest.raises(ConnectionError):
+        list(first)
+    with pytest.raises(ConnectionError):
+        list(second)
+
+def test_params_share_resolver():
+    source = CountingSource(50)
+    resolver = StaticResolver(name='UserIdResolver', kind='EndpointResolver', authentication={})
+    params = [ParamNode(name=f'param{i}', type='Int', resolver=resolver) for i in range(2)]
+    resolver.share(source, consumers=len(params))
+    values = [param.resolve(source) for param in params]
+    assert [list(v) for v in values] == [list(range(50))] * 2
+    assert source.iterations == 1
+    assert list(params[0].resolve(source)) == list(range(50)), "a finished resolution must be restarted"
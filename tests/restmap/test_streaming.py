@@ -0,0 +1,156 @@
+"""
+Tests the streamed parsing of large responses
+"""
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from restmap.executor.Local.Fetcher import BaseFetcher, Response
+from restmap.executor.Local.LocalExecutor import LocalExecutor
+from restmap.executor.Local.SessionFetcher import SessionFetcher
+from restmap.resolver.ResolutionGraph import ResolutionGraph
+from restmap.resolver.nodes import EndpointNode
+from restmap.resolver.nodes.EndpointOptions import EndpointOptions
+from restmap.resolver.nodes.Pagination import Pagination
+from restmap.resolver.nodes.Streaming import Streaming
+from restmap.sink.MemorySink import MemorySink
+
+RECORDS = [{'id': index, 'name': f'resource-{index}'} for index in range(250)]
+BODY = json.dumps({'value': RECORDS, 'count': len(RECORDS)}).encode()
+
+def make_endpoint(url: str, streaming: Streaming) -> EndpointNode.RelativeURLNode:
+    base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url=url)
+    return EndpointNode.RelativeURLNode(name='resources', kind='relativeurl', base=base, relative='/resources', options=EndpointOptions(streaming=streaming))
+
+def make_graph(endpoint: EndpointNode.RelativeURLNode) -> ResolutionGraph:
+    graph = ResolutionGraph()
+    graph.add_endpoint(endpoint.base)
+    graph.add_endpoint(endpoint)
+    return graph
+
+
+class TestStreaming:
+
+    def test_from_template(self):
+        assert Streaming.from_template({'records': '$.value[*]'}) == Streaming(records='$.value[*]')
+        assert Streaming.from_template(None) == Streaming()
+
+    @pytest.mark.parametrize('options', [{'records': 'value'}, {'batch_size': 0}, {'chunk_size': 0}])
+    def test_rejects_invalid(self, options):
+        with pytest.raises(ValueError):
+            Streaming(**options)
+
+    def test_rejects_pagination(self):
+        base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com')
+        with pytest.raises(ValueError):
+            EndpointNode.RelativeURLNode(
+                name='resources', kind='relativeurl', base=base, relative='/resources',
+                options=EndpointOptions(streaming=Streaming(), pagination=Pagination(type='cursor'))
+            )
+
+
+class StaticFetcher(BaseFetcher):
+    """Returns BODY for every url, streamed by the default of BaseFetcher"""
+    def __init__(self, status: int = 200):
+        self.status = status
+
+    async def fetch(self, endpoint, url, params=None) -> Response:
+        return Response(endpoint.name, url, self.status, {}, BODY, params or {})
+
+class TestExecutorStreaming:
+
+    def test_writes_batches(self):
+        sink = MemorySink()
+        endpoint = make_endpoint('https://management.azure.com', Streaming(records='$.value[*]', batch_size=100))
+        stats = LocalExecutor(sink, fetcher=StaticFetcher()).run(make_graph(endpoint))
+        assert [len(response.records) for response in sink.responses] == [100, 100, 50], \
+            "records must be handed to the sink in batches of batch_size"
+        assert [record for response in sink.responses for record in response.json()] == RECORDS
+        assert stats.requests == stats.succeeded == 1
+        assert stats.bytes == len(BODY)
+
+    def test_failed_response(self):
+        sink = MemorySink()
+        endpoint = make_endpoint('https://management.azure.com', Streaming(records='$.value[*]'))
+        stats = LocalExecutor(sink, fetcher=StaticFetcher(status=404)).run(make_graph(endpoint))
+        assert stats.failed == 1 and len(sink) == 0
+
+    def test_invalid_body_fails_request(self):
+        class TruncatingFetcher(StaticFetcher):
+            async def fetch(self, endpoint, url, params=None):
+                response = await super().fetch(endpoint, url, params)
+                response.body = response.body[:-100]
+                return response
+        endpoint = make_endpoint('https://management.azure.com', Streaming(records='$.value[*]'))
+        stats = LocalExecutor(MemorySink(), fetcher=TruncatingFetcher()).run(make_graph(endpoint))
+        assert stats.requests == stats.failed == 1 and stats.succeeded == 0
+
+
+@pytest.fixture
+def server():
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        def do_GET(self):
+            if self.path != '/resources':
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            # Sends the body in small chunks of a chunked transfer encoding
+            self.send_response(200)
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for start in range(0, len(BODY), 1000):
+                chunk = BODY[start:start + 1000]
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.write(b'0\r\n\r\n')
+        def log_message(self, *args):
+            pass
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+class TestSessionFetcherStreaming:
+
+    def test_streams_chunks(self, server: str):
+        endpoint = make_endpoint(server, Streaming(records='$.value[*]', batch_size=60, chunk_size=512))
+        fetcher = SessionFetcher(timeout=5)
+        async def read():
+            batches = []
+            for _ in range(2):
+                response = await fetcher.stream(endpoint, server + '/resources', {}, endpoint.streaming)
+                batches.append([batch async for batch in response.batches])
+            await fetcher.close()
+            return response, batches
+        session = fetcher.session(endpoint)
+        response, batches = asyncio.run(read())
+        assert [record for batch in batches[0] for record in batch] == RECORDS
+        assert max(len(batch) for batch in batches[0]) == 60
+        assert response.received == len(BODY)
+        assert session.connections == 1, "connections must be reused once the body was read completely"
+
+    def test_stops_early(self, server: str):
+        endpoint = make_endpoint(server, Streaming(records='$.value[*]', batch_size=1, chunk_size=64))
+        fetcher = SessionFetcher(timeout=5)
+        async def read_first():
+            response = await fetcher.stream(endpoint, server + '/resources', {}, endpoint.streaming)
+            first = await response.batches.__anext__()
+            await response.aclose()
+            # The pool is not blocked by the abandoned response
+            following = await fetcher.fetch(endpoint, server + '/resources')
+            await fetcher.close()
+            return first, following
+        first, following = asyncio.run(asyncio.wait_for(read_first(), 5))
+        assert first == RECORDS[:1] and following.ok
+
+    def test_error_status(self, server: str):
+        endpoint = make_endpoint(server, Streaming())
+        async def read():
+            return await SessionFetcher(timeout=5).stream(endpoint, server + '/missing', {}, endpoint.streaming)
+        response = asyncio.run(read())
+        assert response.status == 404 and response.batches is None
@@ -0,0 +1,50 @@
+"""
+Tests the on-disk cache of parsed templates
+"""
+import pytest
+from pathlib import Path
+from restmap.templateParser.TemplateParser import TemplateParser, TemplateSchema
+from restmap.templateParser.TemplateCache import TemplateCache
+from restmap.templateParser import TemplateCache as cache_module
+
+@pytest.fixture()
+def template_path():
+    return Path('./ingestless/tests/restmap/assets/complex_endpoint.yml')
+
+@pytest.fixture()
+def cache_dir(tmp_path: Path):
+    return tmp_path / 'cache'
+
+@pytest.fixture()
+def parser(cache_dir: Path):
+    return TemplateParser(cache_dir=cache_dir)
+
+def test_load_populates_cache(parser: TemplateParser, cache_dir: Path, template_path: Path):
+    template = parser.load(template_path)
+    entries = list(cache_dir.rglob('*.pickle'))
+    assert len(entries) == 1, "must store the parsed template"
+    cached = parser.load(template_path)
+    assert cached == template
+    assert isinstance(cached, TemplateSchema)
+
+def test_cache_hit_skips_parsing(parser: TemplateParser, template_path: Path, monkeypatch):
+    parser.load(template_path)
+    def fail(*args):
+        raise AssertionError("must not parse cached templates")
+    monkeypatch.setattr(parser, '_load_yaml', fail)
+    assert isinstance(parser.load(template_path), TemplateSchema)
+
+def test_changed_content_misses(parser: TemplateParser, template_path: Path, tmp_path: Path):
+    path = tmp_path / 'endpoint.yml'
+    path.write_text(template_path.read_text())
+    parser.load(path)
+    path.write_text(template_path.read_text().replace('banking_data_api', 'other_api'))
+    assert parser.load(path).metadata.name == {'name': 'other_api'}
+
+def test_schema_change_invalidates(cache_dir: Path, template_path: Path, monkeypatch):
+    TemplateParser(cache_dir=cache_dir).load(template_path)
+    monkeypatch.setattr(cache_module, 'PARSER_VERSION', cache_module.PARSER_VERSION + 1)
+    cache = TemplateCache(cache_dir)
+    assert cache.get(cache.key(template_path.read_bytes())) is None, "entries of other schema versions must not be served"
+    cache.prune()
+    assert len(list(cache_dir.iterdir())) == 0
@@ -4,6 +4,7 @@ Tests the templateparser implementation
 
 import pytest
 import json
+import jsonschema
 import yaml
 from pathlib import Path
 from restmap.templateParser.TemplateParser import TemplateParser, TemplateSchema, MetadataDict, ConfigurationDict
@@ -38,4 +39,80 @@ def test_logic(parser: TemplateParser, template_path):
     # Create an endpoint template
 
     parser.load(template_path)
-    # ``
\ No newline at end of file
+    # ``
+
+@pytest.fixture()
+def template_dir(tmp_path: Path, template_path: Path):
+    for i in range(4):
+        (tmp_path / f"endpoint_{i}.yml").write_text(template_path.read_text())
+    (tmp_path / "notes.txt").write_text("not a template")
+    return tmp_path
+
+def test_load_dir(parser: TemplateParser, template_dir: Path):
+    templates = list(parser.load_dir(template_dir, max_workers=2))
+    assert len(templates) == 4, "must load every template file in the folder"
+    assert all(isinstance(template, TemplateSchema) for template in templates)
+
+def test_load_many_sequential(parser: TemplateParser, template_dir: Path):
+    templates = list(parser.load_many(sorted(template_dir.glob('*.yml')), max_workers=1))
+    assert len(templates) == 4
+
+def test_load_many_raises(parser: TemplateParser, template_dir: Path):
+    (template_dir / "broken.yml").write_text("kind: Endpoint")
+    with pytest.raises(jsonschema.ValidationError):
+        list(parser.load_dir(template_dir, max_workers=2))
+
+def test_validate_collects_all_errors(parser: TemplateParser, tmp_path: Path):
+    path = tmp_path / "invalid.yml"
+    path.write_text(yaml.safe_dump({
+        'version': 1,
+        'kind': 'Endpoint',
+        'metadata': {'name': 2},
+        'config': {'endpoints': [], 'params': {}},
+    }))
+    errors = parser.validate(path)
+    assert len(errors) == 3, "must report every violation in a single pass"
+    assert all(isinstance(error, jsonschema.ValidationError) for error in errors)
+
+def test_validate_valid_template(parser: TemplateParser, template_path: Path):
+    assert parser.validate(template_path) == []
+
+def test_validate_missing_file(parser: TemplateParser, tmp_path: Path):
+    errors = parser.validate(tmp_path / "missing.yml")
+    assert [error.message for error in errors] == ["The file provided does not exist"], \
+        "a missing file must be reported as an error instead of raising"
+
+def test_validators_are_reused(parser: TemplateParser, template_path: Path):
+    from restmap.templateParser.TemplateParser import _validator
+    parser.load(template_path)
+    validator = _validator('config')
+    parser.load(template_path)
+    assert _validator('config') is validator, "validators must be built once per schema"
+
+def test_load_all_streams_bundle(parser: TemplateParser, template_path: Path, tmp_path: Path):
+    bundle = tmp_path / "bundle.yml"
+    document = template_path.read_text()
+    bundle.write_text('\n---\n'.join([document] * 3) + '\n---\n')
+    templates = parser.load_all(bundle)
+    assert not isinstance(templates, list), "must return a lazy iterator"
+    templates = list(templates)
+    assert len(templates) == 3
+    assert all(isinstance(template, TemplateSchema) for template in templates)
+
+def test_load_all_validates_each_document(parser: TemplateParser, template_path: Path, tmp_path: Path):
+    bundle = tmp_path / "bundle.yml"
+    bundle.write_text(template_path.read_text() + '\n---\nkind: Endpoint\n')
+    templates = parser.load_all(bundle)
+    assert isinstance(next(templates), TemplateSchema), "valid documents before an invalid one must be yielded"
+    with pytest.raises(jsonschema.ValidationError):
+        next(templates)
+
+def test_validate_matrix(parser: TemplateParser, template_path: Path):
+    template_dict = yaml.safe_load(template_path.read_text())
+    template_dict['config']['endpoints'].append({
+        'usage': {'kind': 'relativeurl', 'base': 'baseurl', 'relative': '/{region}/usage', 'matrix': {'region': ['eu', 'us']}}
+    })
+    assert parser._validate(template_dict)
+    template_dict['config']['endpoints'][-1]['usage']['matrix'] = {'region': 'eu'}
+    with pytest.raises(jsonschema.ValidationError):
+        parser._validate(template_dict)
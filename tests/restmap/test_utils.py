@@ -1,7 +1,10 @@
+import json
 import pytest
 
 from pathlib import Path
 from utils import io as ioutils
+from utils import jsonpath
+from utils.jsonstream import JSONStream, ijson_prefix, iter_records
 
 class TestIOUtils:
 
@@ -10,4 +13,94 @@ class TestIOUtils:
         testpath_path = Path('/test/tmp/dir/subfolder/test.csv')
         return_path = ioutils.ensure_path(testpath_str)
         return_path = ioutils.ensure_path(testpath_path)
-        assert isinstance(return_path, Path)
\ No newline at end of file
+        assert isinstance(return_path, Path)
+
+    def test_atomic_write(self, tmp_path: Path):
+        path = tmp_path / 'nested' / 'entry.json'
+        with ioutils.atomic_write(path, 'w') as file:
+            file.write('{}')
+        with pytest.raises(RuntimeError):
+            with ioutils.atomic_write(path) as file:
+                file.write(b'partial')
+                raise RuntimeError("interrupted")
+        assert path.read_text() == '{}', "a failed write must keep the previous file"
+        assert [child.name for child in path.parent.iterdir()] == ['entry.json'], "temporary files must be removed"
+
+class TestJSONPath:
+
+    document = {'value': [{'id': 1, 'tags': ['a']}, {'id': 2, 'tags': []}], 'meta': {'next link': 'x'}}
+
+    @pytest.mark.parametrize('path, expected', [
+        ('$', [document]),
+        ('$.value[*].id', [1, 2]),
+        ('$.value[-1].id', [2]),
+        ("$.meta['next link']", ['x']),
+        ('$.value.*.tags[0]', ['a']),
+        ('$.missing.id', []),
+    ])
+    def test_iter_matches(self, path, expected):
+        assert list(jsonpath.iter_matches(self.document, path)) == expected
+
+    def test_find_default(self):
+        assert jsonpath.find(self.document, '$.value[5]', default=0) == 0
+
+    @pytest.mark.parametrize('path', ['value', '$.value[', '$value'])
+    def test_rejects_invalid(self, path):
+        with pytest.raises(ValueError):
+            jsonpath.compile_path(path)
+
+
+def chunked(document: bytes, size: int) -> list:
+    return [document[start:start + size] for start in range(0, len(document), size)]
+
+class TestJSONStream:
+
+    document = TestJSONPath.document
+    encoded = json.dumps({**document, 'unicode': 'ü€😀', 'numbers': [-1.5e3, 0, True, None]}).encode()
+
+    @pytest.mark.parametrize('path', ['$', '$.value[*]', '$.value[*].tags', '$.value[1].id', '$.numbers[*]', '$.*'])
+    @pytest.mark.parametrize('size', [1, 3, 4096])
+    def test_matches_jsonpath(self, path, size):
+        expected = list(jsonpath.iter_matches(json.loads(self.encoded), path))
+        assert list(iter_records(chunked(self.encoded, size), path)) == expected, \
+            "records must not depend on where the chunks are split"
+
+    def test_emits_records_as_they_complete(self):
+        stream = JSONStream('$.value[*]')
+        assert stream.feed(b'{"value": [{"id": 1}, {"id"') == [{'id': 1}]
+        assert stream.feed(b': 2}, 3') == [{'id': 2}]
+        assert stream.feed(b']}') == [3], "numbers must be emitted once they cannot continue"
+        assert stream.close() == []
+        assert stream.bytes == 36
+
+    def test_buffers_only_current_record(self):
+        stream = JSONStream('$.value[*]')
+        stream.feed(b'{"skipped": "' + b'x' * 10000 + b'", "value": [')
+        for _ in range(100):
+            stream.feed(b'{"id": 1, "name": "' + b'n' * 100 + b'"},')
+        assert len(stream._buffer) < 200, "parsed records must be dropped from the buffer"
+
+    @pytest.mark.parametrize('size', [1, 7, 4096])
+    def test_skips_large_siblings(self, size):
+        sibling = {'nested': [{'text': 'a\\"]}[{' * 10, 'id': index} for index in range(1000)], 'quoted': '\\' * 50}
+        encoded = json.dumps({'meta': sibling, 'value': [{'id': 1}, {'id': 2}], 'count': 2}).encode()
+        stream = JSONStream('$.value[*]', max_record_size=1000)
+        records = [record for chunk in chunked(encoded, size) for record in stream.feed(chunk)] + stream.close()
+        assert records == [{'id': 1}, {'id': 2}], "values outside of the selection must not count as records"
+        assert len(stream._buffer) == 0
+
+    @pytest.mark.parametrize('document', [b'', b'{"a": 1', b'[1, 2', b'[1]x', b'[1,]', b'{"a" 1}'])
+    def test_rejects_invalid(self, document):
+        with pytest.raises(ValueError):
+            list(iter_records([document], '$[*]'))
+
+    def test_max_record_size(self):
+        with pytest.raises(ValueError):
+            JSONStream('$[*]', max_record_size=10).feed(b'["' + b'x' * 20)
+
+    def test_ijson_prefix(self):
+        assert ijson_prefix('$.value[*]') == 'value.item'
+        assert ijson_prefix('$') == ''
+        with pytest.raises(ValueError):
+            ijson_prefix('$.value[0]')
+
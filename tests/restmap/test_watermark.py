@@ -0,0 +1,161 @@
+"""
+Tests the incremental ingestion of endpoints by their watermarks
+"""
+import json
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+import pytest
+from enums import StatusCode
+from restmap.executor.Local.Fetcher import BaseFetcher, Response
+from restmap.executor.Local.LocalExecutor import LocalExecutor
+from restmap.resolver.ResolutionGraph import ResolutionGraph
+from restmap.resolver.nodes import EndpointNode
+from restmap.resolver.nodes.EndpointOptions import EndpointOptions
+from restmap.resolver.nodes.Streaming import Streaming
+from restmap.resolver.nodes.Watermark import Watermark
+from restmap.sink.MemorySink import MemorySink
+from restmap.state.DynamoStateStore import DynamoStateStore
+from restmap.state.LocalStateStore import LocalStateStore
+
+CHANGES = [{'id': index, 'changed': f'2022-11-{index:02d}T00:00:00Z'} for index in range(1, 21)]
+
+
+class TestWatermark:
+
+    def test_max(self):
+        watermark = Watermark(param='since', value='$.changed')
+        assert watermark.advance(None, CHANGES[::-1]) == CHANGES[-1]['changed']
+        assert watermark.advance('2023-01-01', CHANGES) == '2023-01-01', "the watermark must never move back"
+
+    def test_last(self):
+        watermark = Watermark(param='cursor', value='$.deltaLink', records='$', mode='last')
+        assert watermark.advance('a', [{'deltaLink': 'b'}, {'deltaLink': None}]) == 'b'
+
+    def test_mixed_types(self):
+        assert Watermark(param='since', value='$.id').advance(9, [{'id': '10'}]) == 9
+
+    @pytest.mark.parametrize('options', [{'mode': 'min'}, {'value': 'changed'}])
+    def test_rejects_invalid(self, options):
+        with pytest.raises(ValueError):
+            Watermark(**{'param': 'since', 'value': '$.changed', **options})
+
+
+class TestLocalStateStore:
+
+    def test_persists(self, tmp_path: Path):
+        store = LocalStateStore(tmp_path / 'state.json')
+        store.put('watermark/a', '2022-11-20')
+        store.put('watermark/b', 5)
+        store.put('checkpoint/c', [1])
+        store.delete('watermark/b')
+        reopened = LocalStateStore(tmp_path / 'state.json')
+        assert reopened.get('watermark/a') == '2022-11-20'
+        assert reopened.get('watermark/b', 0) == 0
+        assert list(reopened.keys('watermark/')) == ['watermark/a']
+
+    def test_rejects_unserializable(self):
+        with pytest.raises(TypeError):
+            LocalStateStore().put('a', object())
+
+
+class FakeDatabaseHandler:
+    """Stands in for the DatabaseHandler of the manager"""
+    def __init__(self, status: StatusCode = StatusCode.SUCCESS):
+        self.items = {}
+        self.status = status
+    def read_state(self, key):
+        return self.items.get(key)
+    def write_state(self, key, value):
+        self.items[key] = value
+        return self.status
+    def delete_state(self, key):
+        self.items.pop(key, None)
+        return StatusCode.SUCCESS
+    def read_state_keys(self, prefix=''):
+        # Queries the folder of the prefix, like the State table
+        return [key for key in self.items if key.startswith(prefix) and '/' not in key[len(prefix):]]
+
+class TestDynamoStateStore:
+
+    def test_prefixes_keys(self):
+        handler = FakeDatabaseHandler()
+        store = DynamoStateStore(handler, prefix='pipeline/')
+        store.put('watermark/a', 1)
+        assert handler.items == {'pipeline/watermark/a': 1}
+        assert store.get('watermark/a') == 1 and store.get('missing', 2) == 2
+        assert list(store.keys('watermark/')) == ['watermark/a']
+
+    def test_raises_failed_writes(self):
+        with pytest.raises(IOError):
+            DynamoStateStore(FakeDatabaseHandler(StatusCode.DB_WRITE_ERROR)).put('a', 1)
+
+
+class TestStateStoreKeys:
+
+    @pytest.mark.parametrize('make_store', [LocalStateStore, lambda: DynamoStateStore(FakeDatabaseHandler(), prefix='pipeline/')])
+    def test_lists_keys_of_one_folder(self, make_store):
+        store = make_store()
+        for key in ['a', 'checkpoint/other', 'checkpoint/run/groups', 'checkpoint/run/users', 'checkpoint/run/users/0']:
+            store.put(key, 1)
+        assert sorted(store.keys('checkpoint/run/')) == ['checkpoint/run/groups', 'checkpoint/run/users']
+        assert sorted(store.keys('checkpoint/run/u')) == ['checkpoint/run/users']
+        assert sorted(store.keys('checkpoint/')) == ['checkpoint/other'], "keys of folders below the prefix must not be listed"
+        assert sorted(store.keys()) == ['a']
+
+
+class ChangesFetcher(BaseFetcher):
+    """Serves the CHANGES after the `since` query parameter"""
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.requested = []
+
+    async def fetch(self, endpoint, url, params=None) -> Response:
+        self.requested.append(url)
+        if self.fail and params['region'] == 'west':
+            return Response(endpoint.name, url, 500, {}, b'', params)
+        since = parse_qs(urlsplit(url).query)['since'][0]
+        changes = [change for change in CHANGES if change['changed'] > since]
+        return Response(endpoint.name, url, 200, {}, json.dumps({'value': changes}).encode(), params)
+
+def make_graph(**options) -> ResolutionGraph:
+    graph = ResolutionGraph()
+    base = EndpointNode.BaseURLNode(name='baseurl', kind='baseurl', url='https://management.azure.com')
+    graph.add_endpoint(base)
+    graph.add_endpoint(EndpointNode.RelativeURLNode(
+        name='changes', kind='relativeurl', base=base, relative='/changes?region={region}&since={since}',
+        matrix={'region': ['east', 'west']},
+        options=EndpointOptions(
+            watermark=Watermark(param='since', value='$.changed', records='$.value[*]', initial='2022-11-10T00:00:00Z'),
+            **options
+        )
+    ))
+    return graph
+
+class TestExecutorWatermarks:
+
+    def test_advances_between_runs(self, tmp_path: Path):
+        state = LocalStateStore(tmp_path / 'state.json')
+        sink = MemorySink()
+        fetcher = ChangesFetcher()
+        stats = LocalExecutor(sink, fetcher=fetcher, state=state).run(make_graph())
+        assert 'since=2022-11-10T00%3A00%3A00Z' in fetcher.requested[0], "the first run must start at the initial watermark"
+        assert len(sink.responses[0].json()['value']) == 10
+        assert stats.watermarks == {'changes': '2022-11-20T00:00:00Z'}
+
+        sink = MemorySink()
+        stats = LocalExecutor(sink, fetcher=fetcher, state=LocalStateStore(tmp_path / 'state.json')).run(make_graph())
+        assert all(response.json()['value'] == [] for response in sink.responses), \
+            "the next run must only request records after the stored watermark"
+        assert stats.watermarks == {}
+
+    def test_keeps_watermark_on_failure(self):
+        state = LocalStateStore()
+        stats = LocalExecutor(MemorySink(), fetcher=ChangesFetcher(fail=True), state=state).run(make_graph())
+        assert stats.failed == 1 and stats.watermarks == {}
+        assert state.get('watermark/changes') is None
+
+    def test_streamed_records(self):
+        state = LocalStateStore()
+        graph = make_graph(streaming=Streaming(records='$.value[*]', batch_size=3))
+        stats = LocalExecutor(MemorySink(), fetcher=ChangesFetcher(), state=state).run(graph)
+        assert stats.watermarks == {'changes': '2022-11-20T00:00:00Z'}
@@ -0,0 +1,55 @@
+"""
+Tests the ingestion state kept in the State table, against DynamoDB mocked by moto
+"""
+import pytest
+
+pytest.importorskip('pynamodb')
+moto = pytest.importorskip('moto')
+
+from manager.database import DatabaseHandler
+from manager.models import StateModel
+from manager.utils import dynamoutils
+from restmap.state.DynamoStateStore import DynamoStateStore
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    # Sends the requests to the mocked AWS endpoint instead of DynamoDB Local
+    monkeypatch.setattr(StateModel.Meta, 'host', None)
+    monkeypatch.setattr(StateModel, '_connection', None, raising=False)
+    mock = getattr(moto, 'mock_aws', None) or moto.mock_dynamodb
+    with mock():
+        StateModel.create_table(read_capacity_units=1, write_capacity_units=1, wait=True)
+        yield DatabaseHandler()
+    StateModel._connection = None
+
+
+@pytest.mark.parametrize('key, namespace, name', [
+    ('checkpoint/run/users', 'checkpoint/run/', 'users'),
+    ('users', dynamoutils.ROOT_NAMESPACE, 'users'),
+    ('checkpoint/run/', 'checkpoint/run/', ''),
+])
+def test_splits_state_keys(key: str, namespace: str, name: str):
+    assert dynamoutils.split_state_key(key) == (namespace, name)
+    assert dynamoutils.join_state_key(namespace, name) == key
+
+
+def test_reads_state_keys(handler: DatabaseHandler):
+    for key in ['a', 'checkpoint/other', 'checkpoint/run/groups', 'checkpoint/run/users', 'checkpoint/run/users/0']:
+        handler.write_state(key, {'partition': 1})
+    assert sorted(handler.read_state_keys('checkpoint/run/')) == ['checkpoint/run/groups', 'checkpoint/run/users']
+    assert handler.read_state_keys('checkpoint/run/u') == ['checkpoint/run/users']
+    assert handler.read_state_keys('checkpoint/') == ['checkpoint/other'], "keys of folders below must not be listed"
+    assert handler.read_state_keys() == ['a']
+    assert handler.read_state('checkpoint/run/users') == {'partition': 1}
+
+
+def test_state_store(handler: DatabaseHandler):
+    store = DynamoStateStore(handler, prefix='pipeline/')
+    store.put('watermark/changes', '2022-11-20')
+    assert list(store.keys('watermark/')) == ['watermark/changes']
+    store.delete('watermark/changes')
+    assert store.get('watermark/changes') is None
@@ -1,7 +1,10 @@
 """
 Utils handling IO
 """
-from typing import Union
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterator, Union
 from pathlib import Path
 
 def ensure_path(path: Union[str, Path]) -> Path:
@@ -9,3 +12,21 @@ def ensure_path(path: Union[str, Path]) -> Path:
         path =  Path(path)
     return path
 
+@contextmanager
+def atomic_write(path: Union[str, Path], mode: str = 'wb') -> Iterator[IO]:
+    """
+    Opens a hidden temporary file next to the path, which replaces the path once
+    written completely, so concurrent readers never see partially written files.
+    The temporary file is removed if writing fails.
+    @mode: 'wb' for bytes, 'w' for text
+    """
+    path = ensure_path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, mode) as file:
+            yield file
+        os.replace(temporary, path)
+    except BaseException:
+        Path(temporary).unlink(missing_ok=True)
+        raise
@@ -0,0 +1,75 @@
+"""
+Utils selecting values from JSON documents with JSONPath-style selectors
+
+Supported syntax: the root `$`, keys `.key` or `['key']`, indices `[0]`
+and wildcards `[*]` or `.*`, e.g. `$.value[*]` or `$.meta.paging.next`.
+"""
+import re
+from functools import lru_cache
+from typing import Any, Iterator, Tuple, Union
+
+# Marks a wildcard step in a compiled path
+WILDCARD = object()
+
+_STEP = re.compile(r"""
+    \.(?P<key>[^.\[\]]+)            # .key or .*
+  | \[(?P<index>-?\d+)\]            # [0]
+  | \[\*\]                          # [*]
+  | \[['"](?P<quoted>[^'"]*)['"]\]  # ['key']
+""", re.VERBOSE)
+
+Step = Union[str, int, object]
+
+
+@lru_cache(maxsize=256)
+def compile_path(path: str) -> Tuple[Step, ...]:
+    """
+    Compiles a selector into its steps: keys, indices and WILDCARD
+    return: Tuple of steps, empty for the root
+    """
+    path = path.strip()
+    if not path.startswith('$'):
+        raise ValueError(f"'{path}' is not a valid selector, selectors start with '$'")
+    steps = []
+    position = 1
+    while position < len(path):
+        match = _STEP.match(path, position)
+        if match is None:
+            raise ValueError(f"'{path}' is not a valid selector, unexpected '{path[position:]}'")
+        if match.group('key') is not None:
+            key = match.group('key')
+            steps.append(WILDCARD if key == '*' else key)
+        elif match.group('index') is not None:
+            steps.append(int(match.group('index')))
+        elif match.group('quoted') is not None:
+            steps.append(match.group('quoted'))
+        else:
+            steps.append(WILDCARD)
+        position = match.end()
+    return tuple(steps)
+
+
+def iter_matches(document: Any, path: str) -> Iterator[Any]:
+    """Lazily yields all values of the document matching the selector"""
+    yield from _walk(document, compile_path(path))
+
+
+def find(document: Any, path: str, default: Any = None) -> Any:
+    """Returns the first value matching the selector, or the default"""
+    return next(iter_matches(document, path), default)
+
+
+def _walk(value: Any, steps: Tuple[Step, ...]) -> Iterator[Any]:
+    if not steps:
+        yield value
+        return
+    step, rest = steps[0], steps[1:]
+    if step is WILDCARD:
+        children = value.values() if isinstance(value, dict) else value if isinstance(value, list) else ()
+        for child in children:
+            yield from _walk(child, rest)
+    elif isinstance(step, int):
+        if isinstance(value, list) and -len(value) <= step < len(value):
+            yield from _walk(value[step], rest)
+    elif isinstance(value, dict) and step in value:
+        yield from _walk(value[step], rest)
@@ -0,0 +1,320 @@
+"""
+Utils parsing JSON documents incrementally, chunk by chunk
+
+A JSONStream is fed the chunks of a document as they are received and
+returns the values matching a JSONPath-style selector as soon as they are
+complete, e.g. the items of `$.value[*]`. Only the value currently being
+received is buffered, so memory is bound by the size of the largest
+record instead of the size of the document.
+
+Values outside of the selected records are scanned past without being
+parsed or buffered, whatever their size.
+Selectors support the syntax of utils.jsonpath, negative indices never match.
+"""
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator, List, Optional, Union
+
+from utils import jsonpath
+
+# Parser states, what is expected at the current position
+_VALUE, _KEY, _COLON, _ELEMENT, _NEXT, _SKIP = range(6)
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+# Rest of a string after its opening quote, up to and including the closing quote
+_STRING_END = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# Content of a string up to its closing quote, or to an escape cut off by the end of the chunk
+_STRING_CONTENT = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+_STRUCTURE = re.compile(r'[\[\]{}"]')
+_SCALAR = re.compile(r'[^,:\[\]{}\s]*')
+_DECODER = json.JSONDecoder()
+_DELIMITERS = frozenset(' \t\n\r,]}')
+
+
+class JSONStream:
+    """
+    Incremental parser emitting the values matching a selector.
+
+        stream = JSONStream('$.value[*]')
+        for chunk in chunks:
+            for record in stream.feed(chunk):
+                ...
+        records = stream.close()
+    """
+
+    def __init__(self, selector: str = '$', max_record_size: int = 64 * 2**20) -> None:
+        """
+        @selector: Selects the records to emit, `$` emits the whole document
+        @max_record_size: Characters a single record may span before the document is rejected
+        """
+        self.selector = selector
+        self.max_record_size = max_record_size
+        self._steps = jsonpath.compile_path(selector)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        # Keys and indices of the current position, and the kind of each open container
+        self._path: List[Union[str, int, None]] = []
+        self._containers: List[str] = []
+        self._state = _VALUE
+        # Progress of scanning an incomplete container: offset from its start and open depth
+        self._scan: Optional[tuple] = None
+        # Progress of skipping a value outside of the selection: open depth and whether within a string
+        self._skipping: Optional[tuple] = None
+        self._started = False
+        self._closed = False
+        # Number of bytes fed
+        self.bytes = 0
+
+    def feed(self, chunk: Union[bytes, str]) -> list:
+        """
+        Parses the next chunk of the document
+        return: The records completed by the chunk
+        """
+        if self._closed:
+            raise ValueError("Cannot feed a closed JSONStream")
+        if isinstance(chunk, bytes):
+            self.bytes += len(chunk)
+            chunk = self._decoder.decode(chunk)
+        else:
+            self.bytes += len(chunk)
+        self._buffer += chunk
+        return self._parse(final=False)
+
+    def close(self) -> list:
+        """
+        Ends the document
+        return: The records completed by the end of the document
+        """
+        if self._closed:
+            return []
+        self._buffer += self._decoder.decode(b'', final=True)
+        records = self._parse(final=True)
+        self._closed = True
+        if not self._started or self._containers or self._state != _NEXT:
+            raise ValueError("Incomplete JSON document")
+        return records
+
+    # INTERNAL API_______________
+    def _parse(self, final: bool) -> list:
+        records = []
+        buffer, position = self._buffer, 0
+        while True:
+            position = _WHITESPACE.match(buffer, position).end()
+            if position >= len(buffer):
+                break
+            char = buffer[position]
+            state = self._state
+            if state == _VALUE:
+                self._started = True
+                match = self._match()
+                if match is False and char in '{[':
+                    # The selector continues within this container, enter it
+                    self._open(char)
+                    position += 1
+                    continue
+                if match is None and char in '{["':
+                    self._skipping = (0, True) if char == '"' else (1, False)
+                    self._state = _SKIP
+                    position += 1
+                    continue
+                value, end = self._decode(buffer, position, final)
+                if end is None:
+                    if len(buffer) - position > self.max_record_size:
+                        raise ValueError(f"Record at {self.selector} exceeds {self.max_record_size} characters")
+                    break
+                if match is True:
+                    records.append(value)
+                position = end
+                self._state = _NEXT
+            elif state == _SKIP:
+                position, skipped = self._skip(buffer, position)
+                if not skipped:
+                    break
+                self._skipping = None
+                self._state = _NEXT
+            elif state == _NEXT:
+                if not self._containers:
+                    raise ValueError(f"Unexpected data after the JSON document: '{buffer[position:position + 20]}'")
+                if char == ',':
+                    position += 1
+                    if self._containers[-1] == 'array':
+                        self._path[-1] += 1
+                        self._state = _VALUE
+                    else:
+                        self._state = _KEY
+                elif char == ('}' if self._containers[-1] == 'object' else ']'):
+                    position += 1
+                    self._containers.pop()
+                    self._path.pop()
+                else:
+                    raise self._unexpected(char)
+            elif state == _KEY:
+                if char == '}' and self._path[-1] is None:
+                    position += 1
+                    self._containers.pop()
+                    self._path.pop()
+                    self._state = _NEXT
+                    continue
+                if char != '"':
+                    raise self._unexpected(char)
+                end = _STRING_END.match(buffer, position + 1)
+                if end is None:
+                    break
+                self._path[-1] = json.loads(buffer[position:end.end()])
+                position = end.end()
+                self._state = _COLON
+            elif state == _COLON:
+                if char != ':':
+                    raise self._unexpected(char)
+                position += 1
+                self._state = _VALUE
+            else:
+                # _ELEMENT: the first element of an array, or its end
+                if char == ']':
+                    position += 1
+                    self._containers.pop()
+                    self._path.pop()
+                    self._state = _NEXT
+                else:
+                    self._state = _VALUE
+        # Drops the parsed part, keeping only the value being received
+        self._buffer = buffer[position:]
+        return records
+
+    def _match(self) -> Optional[bool]:
+        """return: True if the current path is selected, False if a selected path continues below it, None otherwise"""
+        path, steps = self._path, self._steps
+        if len(path) > len(steps):
+            return None
+        for key, step in zip(path, steps):
+            if step is not jsonpath.WILDCARD and (key != step or type(key) is not type(step)):
+                return None
+        return len(path) == len(steps)
+
+    def _open(self, char: str):
+        if char == '{':
+            self._containers.append('object')
+            self._path.append(None)
+            self._state = _KEY
+        else:
+            self._containers.append('array')
+            self._path.append(0)
+            self._state = _ELEMENT
+
+    def _skip(self, buffer: str, position: int) -> tuple:
+        """
+        Scans past a value outside of the selection, tracking only its brackets and strings
+        return: The position after the value, or the position to resume from with the next chunk,
+                and whether the value ended
+        """
+        depth, quoted = self._skipping
+        while True:
+            if quoted:
+                end = _STRING_CONTENT.match(buffer, position).end()
+                if end == len(buffer) or buffer[end] == '\\':
+                    # The string continues in the next chunk, an escape cut off is scanned again
+                    self._skipping = (depth, True)
+                    return end, False
+                position, quoted = end + 1, False
+                if depth == 0:
+                    return position, True
+                continue
+            match = _STRUCTURE.search(buffer, position)
+            if match is None:
+                self._skipping = (depth, False)
+                return len(buffer), False
+            char, position = match.group(), match.end()
+            if char == '"':
+                quoted = True
+            elif char in '{[':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return position, True
+
+    def _decode(self, buffer: str, start: int, final: bool) -> tuple:
+        """
+        Decodes the value starting at `start`. Values complete within the buffer are
+        decoded at once, incomplete ones are scanned for their end as chunks arrive.
+        return: The value and the position after it, None as position if it is not complete yet
+        """
+        if self._scan is None:
+            try:
+                value, end = _DECODER.raw_decode(buffer, start)
+            except ValueError:
+                pass
+            else:
+                # Numbers and literals may continue in the next chunk
+                if buffer[start] in '{["' or final or (end < len(buffer) and buffer[end] in _DELIMITERS):
+                    return value, end
+        end = self._value_end(buffer, start, final)
+        if end is None:
+            return None, None
+        return json.loads(buffer[start:end]), end
+
+    def _value_end(self, buffer: str, start: int, final: bool) -> Optional[int]:
+        """
+        Finds the end of the value starting at `start`, resuming the scan of incomplete containers
+        return: The position after the value, None if it is not complete yet
+        """
+        char = buffer[start]
+        if char == '"':
+            end = _STRING_END.match(buffer, start + 1)
+            return end.end() if end else None
+        if char not in '{[':
+            end = _SCALAR.match(buffer, start).end()
+            if end == start:
+                raise self._unexpected(char)
+            return end if end < len(buffer) or final else None
+        offset, depth = self._scan or (1, 1)
+        position = start + offset
+        while True:
+            match = _STRUCTURE.search(buffer, position)
+            if match is None:
+                self._scan = (len(buffer) - start, depth)
+                return None
+            char, position = match.group(), match.end()
+            if char == '"':
+                end = _STRING_END.match(buffer, position)
+                if end is None:
+                    # Resumes at the opening quote of the incomplete string
+                    self._scan = (match.start() - start, depth)
+                    return None
+                position = end.end()
+            elif char in '{[':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    self._scan = None
+                    return position
+
+    def _unexpected(self, char: str) -> ValueError:
+        path = ''.join(f'[{key}]' if isinstance(key, int) else f'.{key}' for key in self._path if key is not None)
+        return ValueError(f"Invalid JSON, unexpected '{char}' at ${path}")
+
+
+def iter_records(chunks: Iterable[Union[bytes, str]], selector: str = '$') -> Iterator[Any]:
+    """Lazily yields the records matching the selector from the chunks of a document"""
+    stream = JSONStream(selector)
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    yield from stream.close()
+
+
+def ijson_prefix(selector: str) -> str:
+    """
+    Translates a selector into the prefix of ijson.items, used by compiled functions
+    to stream records, e.g. `$.value[*]` into `value.item`
+    """
+    parts = []
+    for step in jsonpath.compile_path(selector):
+        if step is jsonpath.WILDCARD:
+            parts.append('item')
+        elif isinstance(step, str) and '.' not in step:
+            parts.append(step)
+        else:
+            raise ValueError(f"'{selector}' cannot be streamed by ijson, use keys and [*] only")
+    return '.'.join(parts)